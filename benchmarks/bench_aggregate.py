@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark /aggregate's two sources on synthetic event metadata:
+- index: GROUP BY over the SQLite events index (bridge_index.EventIndex)
+- scan: folding metadata pages as Chroma returns them (bridge_query.aggregate_metadata),
+  excluding the time Chroma itself spends producing the pages
+Queries: count by tool_name where level=error since T (a table scan), by
+event_type within one run (an index seek), and run_id, event_type over
+everything.
+
+Usage:
+    python benchmarks/bench_aggregate.py [--events 100000 1000000] [--repeat 3]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bridge_index import EventIndex  # noqa: E402
+from bridge_query import aggregate_metadata  # noqa: E402
+
+BASE_MS = 1_760_000_000_000
+TOOLS = ["Bash", "Read", "Edit", "Write", "Grep", ""]
+QUERIES = {
+    "tool_name | level=error, since": (["tool_name"], {"level": "error"}, BASE_MS + 43_200_000),
+    "event_type | run_id": (["event_type"], {"run_id": "run-3"}, None),
+    "run_id, event_type": (["run_id", "event_type"], {}, None),
+}
+
+
+def make_metadatas(count):
+    rng = random.Random(7)
+    for i in range(count):
+        yield {
+            "event_id": f"event-{i}",
+            "ts_ms": BASE_MS + rng.randrange(86_400_000),
+            "run_id": f"run-{rng.randrange(50)}",
+            "session_id": f"session-{rng.randrange(200)}",
+            "event_type": rng.choice(["tool_invocation", "progress", "error", "decision"]),
+            "level": rng.choice(["info", "info", "info", "error"]),
+            "worker_id": f"worker-{rng.randrange(16)}",
+            "task_id": "",
+            "tool_name": rng.choice(TOOLS),
+        }
+
+
+def scan(metadatas, group_by, equals, since_ms):
+    def pages():
+        page = []
+        for meta in metadatas:
+            if all(meta.get(k) == v for k, v in equals.items()) and (since_ms is None or meta["ts_ms"] >= since_ms):
+                page.append(meta)
+                if len(page) == 5000:
+                    yield page
+                    page = []
+        yield page
+    return aggregate_metadata(pages(), group_by, 10000)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'query':<32} {'index ms':>9} {'scan ms':>9} {'groups':>7}")
+    for count in args.events:
+        metadatas = list(make_metadatas(count))
+        with tempfile.TemporaryDirectory() as tmp:
+            index = EventIndex(str(Path(tmp) / "events.db"))
+            index.rebuild([([m["event_id"] for m in metadatas], metadatas)])
+            for name, (group_by, equals, since_ms) in QUERIES.items():
+                indexed, rows = best_of(lambda: index.aggregate(group_by, equals, 10000, since_ms), args.repeat)
+                scanned, _ = best_of(lambda: scan(metadatas, group_by, equals, since_ms), args.repeat)
+                print(f"{count:>8} {name:<32} {indexed * 1e3:9.1f} {scanned * 1e3:9.1f} {len(rows):>7}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark envelope hashing + serialization against the previous path.
+The previous path hashed with hash_content() (its own json.dumps of the
+hash fields) and serialized the envelope twice more, for the JSONL log and
+the POST body. The new path serializes `data` once in seal_envelope() and
+reuses it for the hash and the single line encode_event() returns.
+Also times the bare digests (sha256 vs blake2b-256) on the canonical bytes.
+
+Usage:
+    python benchmarks/bench_hashing.py [--sizes 1024 10240 102400 1048576] [--repeat 20]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "hooks"))
+
+from bench_redaction import make_payload  # noqa: E402
+from event_utils import HASH_ALGS, encode_event, hash_content, seal_envelope  # noqa: E402
+
+
+def make_envelope(size):
+    return {
+        "event_id": "3f1c2a9e-8d4b-4e6f-9a0b-1c2d3e4f5a6b",
+        "ts": "2024-10-17T09:12:44.331Z",
+        "schema_version": "1.0",
+        "session_id": "bench-session",
+        "run_id": "bench-run",
+        "event_type": "tool_invocation",
+        "level": "info",
+        "source": {"host": "host_0123456789ab", "remote": False, "cwd": "~/project", "project_dir": "project"},
+        "hook_event_name": "PostToolUse",
+        "msg": "PostToolUse: Bash",
+        "data": make_payload(size)
+    }
+
+
+def previous_path(envelope):
+    envelope = dict(envelope)
+    envelope["hash"] = hash_content(envelope)
+    log_line = (json.dumps(envelope, ensure_ascii=False) + "\n").encode("utf-8")
+    body = json.dumps(envelope).encode("utf-8")
+    return log_line, body
+
+
+def new_path(alg):
+    def run(envelope):
+        sealed = seal_envelope(dict(envelope), alg)
+        line = encode_event(sealed)
+        return line + b"\n", encode_event(sealed)
+    return run
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 10240, 102400, 1048576])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'previous ms':>12} {'sha256 ms':>10} {'blake2b ms':>11} {'speedup':>8}"
+          f" | {'digest sha256 us':>16} {'digest blake2b us':>17}")
+    for size in args.sizes:
+        envelope = make_envelope(size)
+        sealed = seal_envelope(dict(envelope), "sha256")
+        if sealed["hash"] != hash_content(envelope):
+            raise SystemExit(f"hash mismatch at size {size}")
+        if json.loads(encode_event(sealed)) != sealed:
+            raise SystemExit(f"encoded line does not round-trip at size {size}")
+
+        old = best_of(previous_path, envelope, args.repeat)
+        sha = best_of(new_path("sha256"), envelope, args.repeat)
+        blake = best_of(new_path("blake2b-256"), envelope, args.repeat)
+
+        canonical = json.dumps({k: envelope[k] for k in ("session_id", "ts", "event_type", "data")},
+                               sort_keys=True, ensure_ascii=False).encode("utf-8")
+        digests = {alg: best_of(lambda b, f=HASH_ALGS[alg]: f(b).digest(), canonical, args.repeat)
+                   for alg in ("sha256", "blake2b-256")}
+        print(f"{size:9d} {old * 1000:12.3f} {sha * 1000:10.3f} {blake * 1000:11.3f} {old / sha:7.2f}x"
+              f" | {digests['sha256'] * 1e6:16.1f} {digests['blake2b-256'] * 1e6:17.1f}")
+
+
+if __name__ == "__main__":
+    main()
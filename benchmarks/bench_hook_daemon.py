@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-hook wall time with and without the resident hook daemon.
+Runs every hook as a subprocess (the way Claude Code does) with HTTP
+delivery disabled, first in-process and then through hooks/hook_daemon.py.
+
+Usage:
+    python benchmarks/bench_hook_daemon.py [--runs 30]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HOOKS_DIR = ROOT / "hooks"
+
+SAMPLE_INPUTS = {
+    "zo_report_event": {
+        "hook_event_name": "PostToolUse",
+        "session_id": "bench-session",
+        "tool_name": "Bash",
+        "tool_use_id": "tool-1",
+        "permission_mode": "ask"
+    },
+    "mcp_telemetry": {
+        "hook_event_name": "PostToolUse",
+        "session_id": "bench-session",
+        "tool_name": "mcp_bench_tool",
+        "tool_use_id": "tool-2",
+        "tool_parameters": {"query": "select 1", "contact": "ops@example.com"}
+    },
+    "session_start": {"hook_event_name": "SessionStart", "session_id": "bench-session"},
+    "worker_spawn": {
+        "session_id": "bench-session",
+        "task": {"task_id": "task-1", "description": "Benchmark task"}
+    },
+    "artifact_produced": {
+        "session_id": "bench-session",
+        "artifact_path": str(ROOT / "README.md"),
+        "artifact_type": "markdown"
+    },
+    "error_event": {
+        "session_id": "bench-session",
+        "error_message": "Benchmark failure",
+        "error_type": "BenchError"
+    }
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def time_hook(hook: str, payload: dict, env: dict, runs: int):
+    """Return wall-clock samples (ms) for running a hook `runs` times."""
+    data = json.dumps(payload)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / f"{hook}.py")],
+            input=data, capture_output=True, text=True, env=env, cwd=str(ROOT)
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"{hook} exited {result.returncode}: {result.stderr}")
+    return samples
+
+
+def wait_for_socket(path: str, timeout: float = 10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(path):
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f"daemon socket {path} did not appear")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=30, help="Invocations per hook and mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "hook-daemon.sock")
+        env = dict(os.environ)
+        env.update({
+            "ZO_EVENT_ENDPOINT": "",  # measure hook work, not bridge latency
+            "ZO_EVENT_LOG_DIR": os.path.join(tmp, "events"),
+            "MCP_TELEMETRY_LOG_DIR": os.path.join(tmp, "mcp"),
+            "ZO_HOOK_DAEMON_SOCKET": socket_path
+        })
+
+        results = {}
+        for hook, payload in SAMPLE_INPUTS.items():
+            results[(hook, "in-process")] = time_hook(hook, payload, env, args.runs)
+
+        daemon = subprocess.Popen(
+            [sys.executable, str(HOOKS_DIR / "hook_daemon.py"), "--socket", socket_path],
+            env=env, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_socket(socket_path)
+            for hook, payload in SAMPLE_INPUTS.items():
+                results[(hook, "daemon")] = time_hook(hook, payload, env, args.runs)
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+    print(f"{'hook':<20} {'mode':<11} {'mean':>8} {'p50':>8} {'p95':>8}  (ms, {args.runs} runs)")
+    for hook in SAMPLE_INPUTS:
+        for mode in ("in-process", "daemon"):
+            s = results[(hook, mode)]
+            print(f"{hook:<20} {mode:<11} {statistics.mean(s):8.1f} "
+                  f"{percentile(s, 50):8.1f} {percentile(s, 95):8.1f}")
+        speedup = statistics.mean(results[(hook, "in-process")]) / statistics.mean(results[(hook, "daemon")])
+        print(f"{'':<20} {'speedup':<11} {speedup:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
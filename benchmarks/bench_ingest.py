@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark bridge ingest throughput per storage mode.
+Each mode runs in a fresh subprocess against a temporary local Chroma
+database and pushes synthetic envelopes through ingest_events(), the
+same path /ingest and /ingest/batch use.
+
+Usage:
+    python benchmarks/bench_ingest.py [--events 2000] [--batch-size 1]
+    python benchmarks/bench_ingest.py --modes full lean --batch-size 100
+"""
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Mix roughly matching a PostToolUse-heavy session
+EVENT_MIX = [
+    ("progress", 0.70),
+    ("tool_invocation", 0.15),
+    ("error", 0.05),
+    ("worker_spawn", 0.05),
+    ("artifact", 0.05),
+]
+
+
+def make_events(count: int, seed: int = 7):
+    sys.path.insert(0, str(ROOT / "hooks"))
+    from event_utils import build_event_envelope
+
+    rng = random.Random(seed)
+    types = [t for t, _ in EVENT_MIX]
+    weights = [w for _, w in EVENT_MIX]
+    events = []
+    for i in range(count):
+        event_type = rng.choices(types, weights)[0]
+        kwargs = {}
+        if event_type == "error":
+            kwargs["error_detail"] = {"type": "ToolError", "message": f"command {i} failed"}
+        if event_type in ("worker_spawn", "progress"):
+            kwargs["worker_id"] = f"worker_{i % 8}"
+        if event_type == "artifact":
+            kwargs["artifact_refs"] = [{"path": f"out/{i}.md", "type": "markdown",
+                                        "hash": f"sha256:{i:064x}", "size_bytes": 100 + i}]
+        events.append(build_event_envelope(
+            event_type=event_type,
+            session_id=f"bench-session-{i % 4}",
+            run_id="bench-run",
+            level="error" if event_type == "error" else "info",
+            hook_event_name="PostToolUse",
+            msg=f"PostToolUse: Bash #{i}",
+            tool_name="Bash",
+            data={"command": f"pytest -k case_{i}", "stdout": "ok " * rng.randint(10, 200)},
+            **kwargs
+        ))
+    return events
+
+
+def run_worker(args):
+    """Child process: ingest into the configured (temporary) database."""
+    events = make_events(args.events)
+    sys.path.insert(0, str(ROOT))
+    with redirect_stdout(io.StringIO()):
+        import chroma_bridge_server_v2 as bridge
+
+    started = time.perf_counter()
+    for i in range(0, len(events), args.batch_size):
+        results = bridge.ingest_events(events[i:i + args.batch_size])
+        if any(r["status"] == "error" for r in results):
+            raise RuntimeError(f"ingest failed: {results}")
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"events": len(events), "seconds": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--modes", nargs="+", default=["full", "lean"])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    rows = []
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env.update({
+                "USE_CHROMA_CLOUD": "false",
+                "CHROMA_DB_PATH": os.path.join(tmp, "chroma_db"),
+                "CHROMA_STORAGE_MODE": mode
+            })
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", "--events", str(args.events),
+                 "--batch-size", str(args.batch_size)],
+                env=env, capture_output=True, text=True, cwd=str(ROOT)
+            )
+            if out.returncode != 0:
+                print(out.stderr, file=sys.stderr)
+                sys.exit(out.returncode)
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            rows.append((mode, result["events"], result["seconds"]))
+
+    print(f"{'mode':<6} {'events':>7} {'seconds':>9} {'events/s':>10} {'ms/event':>9}  (batch size {args.batch_size})")
+    for mode, events, seconds in rows:
+        print(f"{mode:<6} {events:7d} {seconds:9.2f} {events / seconds:10.1f} {seconds * 1000 / events:9.3f}")
+    if len(rows) > 1:
+        base = rows[0][1] / rows[0][2]
+        for mode, events, seconds in rows[1:]:
+            print(f"{mode} vs {rows[0][0]}: {(events / seconds) / base:.2f}x throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON shims (hooks/fast_json.py, bridge_json.py) against the
+stdlib json calls they replace, on event envelopes of several payload sizes:
+- loads: parse an event line (hook stdin, /ingest body, log scans)
+- document: json.dumps(event) vs the shim, for the Chroma document
+- ingest: the bridge's per-event parse + document serialization
+- query: parsing 100 stored documents for a /query response
+Reports MB/s of JSON and the speedup. With orjson missing the shim rows
+measure the stdlib fallback plus the shim's own overhead.
+
+Usage:
+    python benchmarks/bench_json.py [--sizes 1024 16384 262144] [--repeat 50]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hooks"))
+sys.path.insert(0, str(ROOT))
+
+import bridge_json  # noqa: E402
+import fast_json  # noqa: E402
+from bench_hashing import make_envelope  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def cases(line, documents):
+    event = json.loads(line)
+    return {
+        "loads": (lambda: json.loads(line), lambda: fast_json.loads(line)),
+        "document": (lambda: json.dumps(event), lambda: bridge_json.dumps(event)),
+        "ingest": (lambda: json.dumps(json.loads(line)), lambda: bridge_json.dumps(bridge_json.loads(line))),
+        "query x100": (lambda: [json.loads(d) for d in documents], lambda: [bridge_json.loads(d) for d in documents]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 16384, 262144])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    fast_json.preload()
+    print(f"fast_json: {fast_json.backend()}, bridge_json: {bridge_json.BACKEND}")
+    print(f"{'payload':>9} {'case':<11} {'bytes':>9} {'stdlib MB/s':>12} {'shim MB/s':>10} {'speedup':>8}")
+    for size in args.sizes:
+        envelope = make_envelope(size)
+        line = json.dumps(envelope, ensure_ascii=False).encode("utf-8")
+        documents = [json.dumps(envelope)] * 100
+        for name, (stdlib, shim) in cases(line, documents).items():
+            nbytes = len(line) * (100 if name.startswith("query") else 1)
+            old, new = best_of(stdlib, args.repeat), best_of(shim, args.repeat)
+            print(f"{size:>9} {name:<11} {nbytes:>9} {nbytes / old / 1e6:12.1f} {nbytes / new / 1e6:10.1f} "
+                  f"{old / new:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
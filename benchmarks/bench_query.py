@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark /query response formatting: CPU time and peak memory per page.
+The previous path parsed every stored document and serialized the whole
+response again (json.loads per row + one json.dumps of the page); the new
+path streams the page in chunks with the stored JSON spliced in unparsed
+(bridge_query.stream_json / stream_ndjson). Peak memory is what
+tracemalloc sees on top of the Chroma results already in memory.
+
+Usage:
+    python benchmarks/bench_query.py [--rows 100 1000] [--sizes 1024 16384] [--repeat 10]
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hooks"))
+sys.path.insert(0, str(ROOT))
+
+import bridge_json  # noqa: E402
+from bench_hashing import make_envelope  # noqa: E402
+from bridge_query import result_rows, stream_json, stream_ndjson  # noqa: E402
+
+HEAD = {"collection": "events"}
+TAIL = {"filters": {"run_id": "bench-run"}, "limit": 1000, "offset": 0}
+
+
+def make_results(rows, size):
+    envelope = make_envelope(size)
+    documents, metadatas = [], []
+    for i in range(rows):
+        envelope["event_id"] = f"event-{i}"
+        documents.append(bridge_json.dumps(envelope))
+        metadatas.append({"event_id": envelope["event_id"], "ts": envelope["ts"], "event_type": "tool_invocation",
+                          "level": "info", "run_id": "bench-run", "session_id": "bench-session"})
+    return {"ids": [f"event-{i}" for i in range(rows)], "documents": documents, "metadatas": metadatas}
+
+
+def previous(results, loads, dumps):
+    events = [{
+        "id": doc_id,
+        "document": loads(results["documents"][idx]),
+        "metadata": results["metadatas"][idx],
+        "distance": None
+    } for idx, doc_id in enumerate(results["ids"])]
+    body = dumps({**HEAD, "count": len(events), "events": events, **TAIL})
+    return [body.encode("utf-8") if isinstance(body, str) else body]
+
+
+def streamed_json(results):
+    rows = result_rows(results)
+    return stream_json({**HEAD, "count": len(rows)}, "events", rows, TAIL, raw_documents=True)
+
+
+def streamed_ndjson(results):
+    return stream_ndjson(result_rows(results), raw_documents=True)
+
+
+PATHS = {
+    "stdlib (before)": lambda r: previous(r, json.loads, lambda v: json.dumps(v, ensure_ascii=False)),
+    "shim, parsed": lambda r: previous(r, bridge_json.loads, bridge_json.dumps_bytes),
+    "stream json": streamed_json,
+    "stream ndjson": streamed_ndjson,
+}
+
+
+def consume(chunks):
+    """Write-out stand-in: each chunk is dropped once 'sent'."""
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+    return total
+
+
+def measure(fn, results, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        size = consume(fn(results))
+        best = min(best, time.process_time() - started)
+    tracemalloc.start()
+    consume(fn(results))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 16384])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"json codec: {bridge_json.BACKEND}")
+    print(f"{'rows':>5} {'payload':>8} {'path':<16} {'body bytes':>11} {'cpu ms':>8} {'peak MB':>8}")
+    for rows in args.rows:
+        for size in args.sizes:
+            results = make_results(rows, size)
+            for name, fn in PATHS.items():
+                cpu, peak, body = measure(fn, results, args.repeat)
+                print(f"{rows:>5} {size:>8} {name:<16} {body:>11} {cpu * 1e3:8.2f} {peak / 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-event round-trip latency from a hook to a co-located bridge.
+Starts the bridge (temporary local Chroma database) listening on a TCP
+port and a Unix socket, then times the same requests through:
+
+  urllib tcp      the previous hook path (new connection per request)
+  transport tcp   hooks/transport.py over TCP loopback
+  transport unix  hooks/transport.py over the Unix socket
+
+"metrics" (GET /metrics, no Chroma work) isolates the transport cost;
+"ingest" (POST /ingest of a fresh event) is the full per-event path.
+
+Usage:
+    python benchmarks/bench_unix_socket.py [--requests 500] [--engine threaded|asyncio]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hooks"))
+
+import transport  # noqa: E402
+from event_utils import build_event_envelope, encode_event  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_bridge(tmp: str, engine: str):
+    port = free_port()
+    sock_path = os.path.join(tmp, "bridge.sock")
+    env = dict(os.environ)
+    env.update({
+        "USE_CHROMA_CLOUD": "false",
+        "CHROMA_DB_PATH": os.path.join(tmp, "chroma_db"),
+        "BRIDGE_BLOB_DIR": os.path.join(tmp, "blobs"),
+        "CHROMA_BRIDGE_PORT": str(port),
+        "BRIDGE_UNIX_SOCKET": sock_path,
+        "BRIDGE_ENGINE": engine,
+        "ZO_API_KEY": ""
+    })
+    proc = subprocess.Popen([sys.executable, str(ROOT / "chroma_bridge_server_v2.py")], env=env, cwd=tmp,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"bridge exited: {proc.stderr.read().decode(errors='replace')}")
+        if os.path.exists(sock_path):
+            try:
+                transport.request("GET", f"http://127.0.0.1:{port}/health")
+                return proc, port, sock_path
+            except transport.TransportError:
+                pass
+        time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("bridge did not start")
+
+
+def urllib_request(method, url, body=None):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method=method)
+    with urllib.request.urlopen(req, timeout=5) as response:
+        return response.read()
+
+
+def transport_request(method, url, body=None):
+    return transport.request(method, url, body, {"Content-Type": "application/json"})
+
+
+def make_bodies(count: int, tag: str):
+    return [encode_event(build_event_envelope(
+        event_type="progress", session_id=f"bench-{tag}", run_id="bench-run", hook_event_name="PostToolUse",
+        msg=f"PostToolUse: Bash #{i}", tool_name="Bash", data={"command": f"pytest -k case_{i}", "stdout": "ok " * 50}
+    )) for i in range(count)]
+
+
+def time_interleaved(clients, method, path, bodies):
+    """p50/p99 per client; clients take turns request by request so drift hits all alike."""
+    samples = {name: [] for name, _, _ in clients}
+    for i in range(len(next(iter(bodies.values())))):
+        for name, send, base in clients:
+            started = time.perf_counter()
+            send(method, f"{base}{path}", bodies[name][i])
+            samples[name].append(time.perf_counter() - started)
+    result = {}
+    for name, times in samples.items():
+        times.sort()
+        result[name] = (statistics.median(times), times[int(len(times) * 0.99) - 1])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--engine", choices=("threaded", "asyncio"), default="threaded")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc, port, sock_path = start_bridge(tmp, args.engine)
+        try:
+            clients = [
+                ("urllib tcp", urllib_request, f"http://127.0.0.1:{port}"),
+                ("transport tcp", transport_request, f"http://127.0.0.1:{port}"),
+                ("transport unix", transport_request, f"unix://{sock_path}"),
+            ]
+            print(f"engine {args.engine}, {args.requests} requests per row")
+            print(f"{'target':<8} {'client':<15} {'p50 us':>9} {'p99 us':>9}")
+            for target, method, path in (("metrics", "GET", "/metrics"), ("ingest", "POST", "/ingest")):
+                if target == "metrics":
+                    bodies = {name: [None] * args.requests for name, _, _ in clients}
+                else:
+                    bodies = {name: make_bodies(args.requests, name.replace(" ", "-")) for name, _, _ in clients}
+                results = time_interleaved(clients, method, path, bodies)
+                baseline = results[clients[0][0]][0]
+                for name, (p50, p99) in results.items():
+                    print(f"{target:<8} {name:<15} {p50 * 1e6:9.0f} {p99 * 1e6:9.0f}"
+                          f"  ({(baseline - p50) * 1e6:+.0f} us saved vs urllib tcp)")
+        finally:
+            transport.close_connections()
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark wire formats for hook -> bridge traffic: bytes and CPU per event.
+For each ZO_WIRE_FORMAT x ZO_WIRE_ENCODING combination, encodes envelopes
+the way the hooks do (transport.encode_body) and decodes them the way the
+bridge does (bridge_codec.decompress + JSON / MessagePack / CBOR parsing),
+for single events of several payload sizes and for outbox-style batches.
+Combinations whose package (msgpack, cbor2, zstandard) is missing are skipped.
+
+Usage:
+    python benchmarks/bench_wire.py [--sizes 1024 16384 65536] [--batch 100] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "hooks"))
+sys.path.insert(0, str(ROOT))
+
+import bridge_codec  # noqa: E402
+import transport  # noqa: E402
+from bench_redaction import make_payload  # noqa: E402
+from event_utils import build_event_envelope, encode_event  # noqa: E402
+
+FORMATS = ("json", "msgpack", "cbor")
+ENCODINGS = ("identity", "gzip", "zstd")
+
+
+def make_envelopes(size, count):
+    # Offloading is disabled so the payload actually travels in the envelope
+    os.environ["ZO_PAYLOAD_BUDGET_BYTES"] = "0"
+    os.environ["ZO_BLOB_THRESHOLD_BYTES"] = "0"
+    return [build_event_envelope(
+        event_type="tool_invocation", session_id="bench-session", run_id="bench-run", level="info",
+        hook_event_name="PostToolUse", msg=f"PostToolUse: Bash #{i}", tool_name="Bash",
+        data=make_payload(size, seed=i), redaction_mode="disabled"
+    ) for i in range(count)]
+
+
+def bridge_decode(body, headers, batch):
+    data = bridge_codec.decompress(body, headers.get("Content-Encoding"), 1 << 30)
+    content_type = headers["Content-Type"]
+    if bridge_codec.is_binary(content_type):
+        return bridge_codec.loads_batch(data, content_type) if batch else [bridge_codec.loads_event(data, content_type)]
+    if batch:
+        return [json.loads(line) for line in data.splitlines() if line.strip()]
+    return [json.loads(data)]
+
+
+def measure(envelopes, batch, repeat):
+    """(wire bytes, client CPU s, bridge CPU s) per event, best of `repeat`."""
+    if batch:
+        lines = [encode_event(e) for e in envelopes]
+        jobs = [(b"\n".join(lines) + b"\n", "application/x-ndjson", None)]
+    else:
+        jobs = [(encode_event(e), "application/json", e) for e in envelopes]
+
+    best_client = best_bridge = float("inf")
+    wire_bytes = 0
+    for _ in range(repeat):
+        started = time.process_time()
+        encoded = [transport.encode_body(body, content_type, value) for body, content_type, value in jobs]
+        client = time.process_time() - started
+        started = time.process_time()
+        decoded = sum(len(bridge_decode(body, headers, batch)) for body, headers in encoded)
+        bridge = time.process_time() - started
+        if decoded != len(envelopes):
+            raise SystemExit("decoded event count does not match")
+        best_client, best_bridge = min(best_client, client), min(best_bridge, bridge)
+        wire_bytes = sum(len(body) for body, _ in encoded)
+    n = len(envelopes)
+    return wire_bytes / n, best_client / n, best_bridge / n
+
+
+def available(wire_format, encoding):
+    os.environ["ZO_WIRE_FORMAT"], os.environ["ZO_WIRE_ENCODING"] = wire_format, encoding
+    got_format, got_encoding = transport.wire_settings()
+    return (got_format or "json") == wire_format and (got_encoding or "identity") == encoding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 16384, 65536])
+    parser.add_argument("--batch", type=int, default=100, help="Events per batch row")
+    parser.add_argument("--events", type=int, default=20, help="Single events per size")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    os.environ["ZO_WIRE_MIN_BYTES"] = "0"
+
+    cases = [(f"single {size}B", make_envelopes(size, args.events), False) for size in args.sizes]
+    cases.append((f"batch {args.batch}x1KB", make_envelopes(1024, args.batch), True))
+
+    print(f"{'case':<16} {'format':<8} {'encoding':<9} {'bytes/event':>12} {'ratio':>6} "
+          f"{'client us':>10} {'bridge us':>10}")
+    for name, envelopes, batch in cases:
+        baseline = None
+        for wire_format in FORMATS:
+            for encoding in ENCODINGS:
+                if not available(wire_format, encoding):
+                    continue
+                size, client, bridge = measure(envelopes, batch, args.repeat)
+                baseline = baseline or size
+                print(f"{name:<16} {wire_format:<8} {encoding:<9} {size:12.0f} {size / baseline:6.2f} "
+                      f"{client * 1e6:10.1f} {bridge * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Sustained-load test for the bridge's /ingest endpoint.
+Concurrent clients POST unique envelopes for a fixed duration, each over
+one http.client connection (reused when the server keeps it alive), and
+the run reports sustained events/s plus p50/p99 latency.
+
+With --engines the script starts the bridge itself once per engine on a
+temporary local Chroma database, so the threaded and asyncio engines can
+be compared on the same machine:
+    python benchmarks/load_test_bridge.py --engines threaded asyncio
+
+Or point it at a running bridge:
+    python benchmarks/load_test_bridge.py --url http://localhost:9000/ingest
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def template_event():
+    sys.path.insert(0, str(ROOT / "hooks"))
+    from event_utils import build_event_envelope
+    return build_event_envelope(
+        event_type="progress",
+        session_id="load-session",
+        run_id="load-run",
+        hook_event_name="PostToolUse",
+        msg="PostToolUse: Bash",
+        tool_name="Bash",
+        data={"command": "pytest -q", "stdout": "ok " * 100}
+    )
+
+
+def client_loop(url, api_key, template, deadline, latencies, errors):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["X-API-Key"] = api_key
+    while time.perf_counter() < deadline:
+        event = dict(template)
+        event["event_id"] = str(uuid.uuid4())
+        event["hash"] = uuid.uuid4().hex * 2  # unique, so nothing is deduplicated
+        body = json.dumps(event).encode("utf-8")
+        started = time.perf_counter()
+        try:
+            conn.request("POST", parsed.path or "/ingest", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 300:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def run_load(url, api_key, clients, duration, warmup):
+    template = template_event()
+    if warmup:
+        client_loop(url, api_key, template, time.perf_counter() + warmup, [], [])
+
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [threading.Thread(target=client_loop,
+                                args=(url, api_key, template, deadline, latencies, errors))
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "events": len(latencies),
+        "errors": len(errors),
+        "events_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def wait_healthy(port, proc, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"bridge exited with code {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("bridge did not become healthy")
+
+
+def run_engine(engine, port, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            "BRIDGE_ENGINE": engine,
+            "CHROMA_BRIDGE_PORT": str(port),
+            "USE_CHROMA_CLOUD": "false",
+            "CHROMA_DB_PATH": os.path.join(tmp, "chroma_db"),
+            "ZO_API_KEY": "",
+        })
+        proc = subprocess.Popen([sys.executable, str(ROOT / "chroma_bridge_server_v2.py")],
+                                env=env, cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            wait_healthy(port, proc)
+            return run_load(f"http://127.0.0.1:{port}/ingest", "", args.clients, args.duration, args.warmup)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", nargs="+", choices=("threaded", "asyncio"),
+                        help="Start the bridge with each engine and compare")
+    parser.add_argument("--url", default="http://localhost:9000/ingest",
+                        help="Ingest URL of a running bridge (ignored with --engines)")
+    parser.add_argument("--api-key", default=os.getenv("ZO_API_KEY", ""))
+    parser.add_argument("--port", type=int, default=9100, help="Port used with --engines")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of sustained load")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.engines:
+        rows = [(engine, run_engine(engine, args.port, args)) for engine in args.engines]
+    else:
+        rows = [(args.url, run_load(args.url, args.api_key, args.clients, args.duration, args.warmup))]
+
+    print(f"{'target':<10} {'events':>8} {'errors':>7} {'events/s':>10} {'p50 ms':>8} {'p99 ms':>8}"
+          f"  ({args.clients} clients, {args.duration:.0f}s)")
+    for name, r in rows:
+        print(f"{name:<10} {r['events']:8d} {r['errors']:7d} {r['events_per_s']:10.1f} "
+              f"{r['p50_ms']:8.2f} {r['p99_ms']:8.2f}")
+    if len(rows) > 1:
+        base = rows[0][1]
+        for name, r in rows[1:]:
+            if base["events_per_s"]:
+                print(f"{name} vs {rows[0][0]}: {r['events_per_s'] / base['events_per_s']:.2f}x throughput, "
+                      f"p99 {r['p99_ms']:.1f}ms vs {base['p99_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
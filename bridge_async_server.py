@@ -0,0 +1,270 @@
+"""
+Asyncio serving engine for the Chroma bridge (BRIDGE_ENGINE=asyncio).
+
+Requests are parsed on the event loop with HTTP/1.1 persistent connections;
+the route handlers (which block on Chroma) run on a bounded thread pool.
+When more than `queue_depth` requests are waiting for or running on the
+pool, new ones are answered 503 immediately instead of piling up threads
+the way ThreadingMixIn does during a burst.
+
+This module knows nothing about routes or Chroma: the server passes in its
+transport-agnostic dispatch() callable, which returns an object with
+`status`, `headers` and `body`, or `chunks` (an iterator of bytes) for a
+body that is streamed with chunked transfer encoding.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, Optional
+
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+
+
+class BadRequest(Exception):
+    """Malformed request; the connection is closed after replying."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class HeaderMap(dict):
+    """Header dict keyed by lower-case name (dispatch() looks headers up in lower case)."""
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
+
+
+def _encode_head(status: int, headers, keep_alive: bool, length: Optional[int] = None, chunked: bool = False) -> bytes:
+    """Status line and headers; with neither length nor chunked the body ends at close."""
+    lines = [f"HTTP/1.1 {status} {_reason(status)}"]
+    for name, value in headers:
+        if name.lower() not in ("content-length", "connection", "transfer-encoding"):
+            lines.append(f"{name}: {value}")
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    elif chunked:
+        lines.append("Transfer-Encoding: chunked")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _encode_response(status: int, headers, body: bytes, keep_alive: bool) -> bytes:
+    return _encode_head(status, headers, keep_alive, length=len(body)) + body
+
+
+def _error_response(status: int, message: str, keep_alive: bool = False) -> bytes:
+    body = json.dumps({"error": message}).encode("utf-8")
+    return _encode_response(status, [("Content-type", "application/json")], body, keep_alive)
+
+
+class AsyncBridgeServer:
+    """
+    HTTP/1.1 front end that hands each request to `dispatch` on a worker pool.
+
+    Args:
+        dispatch: dispatch(method, target, headers, read_body, start_time) -> response
+        workers: Executor threads running dispatch (i.e. concurrent Chroma calls)
+        queue_depth: Max requests queued or running before answering 503
+        max_body: Largest request body accepted (bytes)
+        keepalive_timeout: Seconds an idle persistent connection is kept open
+    """
+
+    def __init__(self, dispatch: Callable, workers: int = 8, queue_depth: int = 256,
+                 max_body: int = 10 * 1024 * 1024, keepalive_timeout: float = 15.0):
+        self.dispatch = dispatch
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.max_body = max_body
+        self.keepalive_timeout = keepalive_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bridge-worker")
+        self.pending = 0  # only touched on the event loop thread
+        self.rejected = 0
+
+    async def _read_head(self, reader: asyncio.StreamReader):
+        """
+        Read the request line and headers; None on a cleanly closed or idle
+        connection. The keep-alive timeout covers the whole head, so a
+        client that stalls mid-headers is answered 408 and dropped.
+        """
+        started = []  # Set once the request line is in
+        try:
+            return await asyncio.wait_for(self._read_head_lines(reader, started), self.keepalive_timeout)
+        except asyncio.TimeoutError:
+            if started:
+                raise BadRequest(408, "Request header timeout")
+            return None
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader, status: int, message: str) -> bytes:
+        """One CRLF line; a line past the StreamReader limit is answered `status`."""
+        try:
+            line = await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise BadRequest(status, message)
+        if len(line) > MAX_REQUEST_LINE:
+            raise BadRequest(status, message)
+        return line
+
+    async def _read_head_lines(self, reader: asyncio.StreamReader, started: list):
+        line = await self._read_line(reader, 414, "Request line too long")
+        if not line:
+            return None
+        started.append(True)
+        if not line.endswith(b"\n"):
+            raise BadRequest(400, "Connection closed mid-request line")
+
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise BadRequest(400, "Malformed request line")
+        method, target, version = parts
+
+        headers = HeaderMap()
+        while True:
+            line = await self._read_line(reader, 431, "Request headers too large")
+            if line in (b"\r\n", b"\n"):
+                break
+            if not line:
+                raise BadRequest(400, "Connection closed mid-headers")
+            if len(headers) >= MAX_HEADERS:
+                raise BadRequest(431, "Request headers too large")
+            name, sep, value = line.decode("latin-1").partition(":")
+            if not sep:
+                raise BadRequest(400, "Malformed header")
+            headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, version, headers
+
+    @staticmethod
+    def _wants_keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, response, version: str, keep_alive: bool) -> bool:
+        """
+        Send a response whose body is an iterator of chunks. Chunks are
+        produced on the worker pool and written with backpressure, so the
+        body is never held in full. HTTP/1.0 clients get a close-delimited
+        body. Returns whether the connection can be reused.
+        """
+        loop = asyncio.get_running_loop()
+        chunked = version != "HTTP/1.0"
+        keep_alive = keep_alive and chunked
+        writer.write(_encode_head(response.status, response.headers, keep_alive, chunked=chunked))
+        while True:
+            try:
+                chunk = await loop.run_in_executor(self.executor, next, response.chunks, None)
+            except Exception as e:
+                # Headers are out; dropping the connection without the final chunk marks the body truncated
+                print(f"Stream error: {e}")
+                return False
+            if chunk is None:
+                break
+            if chunk:
+                writer.write(b"%x\r\n%b\r\n" % (len(chunk), chunk) if chunked else chunk)
+                await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return keep_alive
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await self._read_head(reader)
+                    if head is None:
+                        break
+                    method, target, version, headers = head
+                    start_time = time.time()
+
+                    if "transfer-encoding" in headers:
+                        raise BadRequest(411, "Chunked request bodies are not supported")
+                    try:
+                        length = int(headers.get("content-length", "0") or 0)
+                    except ValueError:
+                        raise BadRequest(400, "Invalid Content-Length")
+                    if length > self.max_body:
+                        # Body is left unread, so the connection cannot be reused
+                        raise BadRequest(413, "Payload too large")
+                    body = await reader.readexactly(length) if length else b""
+                except BadRequest as e:
+                    writer.write(_error_response(e.status, str(e)))
+                    await writer.drain()
+                    break
+
+                keep_alive = self._wants_keep_alive(version, headers)
+                if self.pending >= self.queue_depth:
+                    self.rejected += 1
+                    writer.write(_encode_response(
+                        503, [("Content-type", "application/json"), ("Retry-After", "1")],
+                        b'{"error": "Server busy"}', keep_alive))
+                    await writer.drain()
+                    if not keep_alive:
+                        break
+                    continue
+
+                self.pending += 1
+                try:
+                    response = await loop.run_in_executor(
+                        self.executor, self.dispatch, method, target, headers,
+                        lambda _length, body=body: body, start_time)
+                except Exception as e:
+                    print(f"Dispatch error: {e}")
+                    writer.write(_error_response(500, "Internal error"))
+                    await writer.drain()
+                    break
+                finally:
+                    self.pending -= 1
+
+                if getattr(response, "chunks", None) is not None:
+                    keep_alive = await self._write_stream(writer, response, version, keep_alive)
+                else:
+                    writer.write(_encode_response(response.status, response.headers, response.body, keep_alive))
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host: str, port: int, on_ready: Callable = None,
+                    unix_path: Optional[str] = None, unix_mode: int = 0o660):
+        servers = [await asyncio.start_server(self.handle_connection, host, port,
+                                              reuse_address=True, backlog=1024)]
+        if unix_path:
+            servers.append(await asyncio.start_unix_server(self.handle_connection, unix_path, backlog=1024))
+            os.chmod(unix_path, unix_mode)
+        if on_ready:
+            on_ready()
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            for server in servers:
+                server.close()
+
+    def run(self, host: str, port: int, on_ready: Callable = None,
+            unix_path: Optional[str] = None, unix_mode: int = 0o660):
+        """Serve until interrupted (also on `unix_path` if given), then let in-flight requests finish."""
+        try:
+            asyncio.run(self.serve(host, port, on_ready, unix_path, unix_mode))
+        finally:
+            self.executor.shutdown(wait=True)
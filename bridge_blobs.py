@@ -0,0 +1,65 @@
+"""
+Content-addressed blob store for the Chroma bridge.
+Holds the large payload fields hooks offload from event envelopes
+(referenced as {"$blob": "sha256:<hex>"}); served by GET /blobs/<hex> and
+filled by PUT /blobs/<hex>, which verifies the digest before storing.
+"""
+import hashlib
+import os
+import re
+import threading
+from typing import Optional
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class DigestMismatch(ValueError):
+    """Uploaded bytes do not hash to the digest in the URL."""
+
+
+class BlobStore:
+    """Immutable blobs stored as <root>/<hex[:2]>/<hex>."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp_seq = 0
+        self._lock = threading.Lock()
+
+    def path(self, digest: str) -> str:
+        if not DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest: str, data: bytes) -> bool:
+        """
+        Store data under its digest.
+
+        Returns:
+            True if the blob was written, False if it was already present
+
+        Raises:
+            DigestMismatch: If sha256(data) != digest
+        """
+        path = self.path(digest)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise DigestMismatch(f"Body does not match sha256 {digest}")
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            self._tmp_seq += 1
+            tmp = f"{path}.{os.getpid()}.{self._tmp_seq}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return True
@@ -0,0 +1,230 @@
+"""
+Content negotiation for Chroma bridge request and response bodies.
+Request bodies may be compressed (Content-Encoding: gzip, or zstd with the
+`zstandard` package) and may be MessagePack (`msgpack`) or CBOR (`cbor2`)
+instead of JSON. Responses are compressed when the client's
+Accept-Encoding allows it. Plain JSON clients see no difference; encodings
+whose package is missing are answered 415.
+"""
+import gzip
+import io
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON_TYPES = ("application/json", "application/x-ndjson", "text/plain", "")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+CBOR_TYPES = ("application/cbor",)
+COMPRESS_MIN_BYTES = 1024  # Smaller responses are not worth the CPU
+
+
+class UnsupportedMediaType(ValueError):
+    """Content-Encoding or Content-Type the bridge cannot decode (415)."""
+
+
+class DecodedTooLarge(ValueError):
+    """Body exceeds the payload limit once decompressed (413)."""
+
+
+class BodyDecodeError(ValueError):
+    """Body is not valid in its declared encoding (400)."""
+
+
+def content_encodings() -> List[str]:
+    """Request/response compressions available, in order of preference."""
+    return (["zstd"] if zstandard else []) + ["gzip"]
+
+
+def media_types() -> List[str]:
+    """Request body types accepted on /ingest and /ingest/batch."""
+    types = ["application/json", "application/x-ndjson"]
+    if msgpack:
+        types.append("application/msgpack")
+    if cbor2:
+        types.append("application/cbor")
+    return types
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """Bare, lower-case media type of a Content-Type header."""
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def is_binary(content_type: Optional[str]) -> bool:
+    """True for MessagePack / CBOR bodies."""
+    return media_type(content_type) in MSGPACK_TYPES + CBOR_TYPES
+
+
+def decompress(body: bytes, content_encoding: Optional[str], limit: int) -> bytes:
+    """
+    Undo Content-Encoding, refusing to inflate past `limit` bytes.
+
+    Raises:
+        UnsupportedMediaType, DecodedTooLarge, BodyDecodeError
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding in ("gzip", "x-gzip"):
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            data = inflater.decompress(body, limit + 1)
+        except zlib.error as e:
+            raise BodyDecodeError(f"Invalid gzip body: {e}")
+        if len(data) > limit:
+            raise DecodedTooLarge(f"Decompressed body exceeds {limit} bytes")
+        if not inflater.eof or inflater.unused_data:
+            raise BodyDecodeError("Truncated or multi-member gzip body")
+        return data
+    if encoding == "zstd" and zstandard:
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)) as reader:
+                data = reader.read(limit + 1)
+        except zstandard.ZstdError as e:
+            raise BodyDecodeError(f"Invalid zstd body: {e}")
+        if len(data) > limit:
+            raise DecodedTooLarge(f"Decompressed body exceeds {limit} bytes")
+        return data
+    raise UnsupportedMediaType(f"Unsupported Content-Encoding: {encoding}")
+
+
+def check_media_type(content_type: Optional[str]):
+    """Raise UnsupportedMediaType for body types this bridge cannot parse."""
+    mtype = media_type(content_type)
+    if mtype in JSON_TYPES or (mtype in MSGPACK_TYPES and msgpack) or (mtype in CBOR_TYPES and cbor2):
+        return
+    raise UnsupportedMediaType(f"Unsupported Content-Type: {mtype}")
+
+
+def loads_binary(body: bytes, content_type: Optional[str]) -> List[Any]:
+    """
+    Decode a MessagePack / CBOR body into its top-level values (one for a
+    single event or an array, several for a concatenated stream).
+    """
+    mtype = media_type(content_type)
+    try:
+        if mtype in MSGPACK_TYPES:
+            unpacker = msgpack.Unpacker(raw=False, strict_map_key=False, max_buffer_size=len(body) or 1)
+            unpacker.feed(body)
+            return list(unpacker)
+        stream = io.BytesIO(body)
+        values = []
+        while stream.tell() < len(body):
+            values.append(cbor2.load(stream))
+        return values
+    except Exception as e:  # Both libraries raise assorted exception types
+        raise BodyDecodeError(f"Invalid {mtype} body: {e or type(e).__name__}")
+
+
+def loads_event(body: bytes, content_type: Optional[str]) -> Any:
+    """One event from a binary body."""
+    values = loads_binary(body, content_type)
+    if len(values) != 1:
+        raise BodyDecodeError("Expected exactly one event")
+    return values[0]
+
+
+def loads_batch(body: bytes, content_type: Optional[str]) -> List[Any]:
+    """Events from a binary batch: one array, or a stream of event maps."""
+    values = loads_binary(body, content_type)
+    if len(values) == 1 and isinstance(values[0], list):
+        return values[0]
+    return values
+
+
+def _qvalues(header: str) -> Dict[str, float]:
+    """Map each token of an Accept / Accept-Encoding header to its q-value."""
+    accepted: Dict[str, float] = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best compression the client accepts (q-values honoured), or None."""
+    if not accept_encoding:
+        return None
+    accepted = _qvalues(accept_encoding)
+    for encoding in content_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def negotiate_media_type(accept: Optional[str], offered: List[str]) -> str:
+    """
+    The offered media type the client's Accept header ranks highest; ties
+    and wildcards go to the first offered (the default).
+    """
+    if not accept:
+        return offered[0]
+    accepted = _qvalues(accept)
+    best, best_q = offered[0], 0.0
+    for mtype in offered:
+        q = accepted.get(mtype, accepted.get(mtype.split("/")[0] + "/*", accepted.get("*/*", 0.0)))
+        if q > best_q:
+            best, best_q = mtype, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def compress_response(body: bytes, headers: List[Tuple[str, str]],
+                      accept_encoding: Optional[str]) -> Tuple[bytes, List[Tuple[str, str]]]:
+    """Compress a response body for the client if it pays off; adds Vary either way."""
+    if len(body) < COMPRESS_MIN_BYTES or any(name.lower() == "content-encoding" for name, _ in headers):
+        return body, headers
+    headers = headers + [("Vary", "Accept-Encoding")]
+    encoding = negotiate_encoding(accept_encoding)
+    if not encoding:
+        return body, headers
+    return compress(body, encoding), headers + [("Content-Encoding", encoding)]
+
+
+def compress_stream(chunks: Iterable[bytes], headers: List[Tuple[str, str]],
+                    accept_encoding: Optional[str]) -> Tuple[Iterator[bytes], List[Tuple[str, str]]]:
+    """compress_response() for a streamed body: chunks are compressed as they are produced."""
+    headers = headers + [("Vary", "Accept-Encoding")]
+    encoding = negotiate_encoding(accept_encoding)
+    if not encoding:
+        return iter(chunks), headers
+
+    def compressed():
+        if encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    return compressed(), headers + [("Content-Encoding", encoding)]
@@ -0,0 +1,91 @@
+"""
+Time-windowed deduplication index for the Chroma bridge.
+Replaces the per-ingest Chroma metadata lookup with an in-memory hash set
+plus a time-ordered expiry queue, giving the 5-minute window documented
+in docs/schema.md at constant cost per event.
+"""
+import time
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from typing import Deque, Dict, Optional, Tuple
+
+
+def parse_rfc3339(ts: str) -> Optional[float]:
+    """Parse an envelope timestamp (RFC3339, 'Z' suffix) to epoch seconds."""
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class DedupIndex:
+    """
+    Bounded set of recently seen event hashes with windowed expiry.
+
+    Entries expire `window_seconds` after they were recorded; when more than
+    `max_entries` are live the oldest are evicted early, so memory stays
+    bounded during bursts. All operations are O(1) amortized and guarded by
+    one lock, which also makes check-then-insert atomic: two concurrent
+    retries of the same event cannot both be accepted.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, max_entries: int = 1_000_000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._expiry: Dict[str, float] = {}
+        self._queue: Deque[Tuple[float, str]] = deque()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._expiry)
+
+    def _expire(self, now: float):
+        queue = self._queue
+        while queue and (queue[0][0] <= now or len(self._expiry) >= self.max_entries):
+            expires_at, key = queue.popleft()
+            # Skip queue entries superseded by a later re-insert of the same key
+            if self._expiry.get(key) == expires_at:
+                del self._expiry[key]
+
+    def _insert(self, key: str, expires_at: float):
+        self._expiry[key] = expires_at
+        self._queue.append((expires_at, key))
+
+    def check_and_add(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Atomically test for a live duplicate and record the key if new.
+
+        Returns:
+            True if the key was not seen within the window (and is now
+            reserved), False if it is a duplicate.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if key in self._expiry:
+                return False
+            self._insert(key, now + self.window_seconds)
+            return True
+
+    def discard(self, key: str):
+        """Release a reservation, e.g. when the write it guarded failed."""
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def add(self, key: str, seen_at: float):
+        """
+        Record a key first seen at `seen_at` (epoch seconds).
+
+        Used to warm the index from stored events at startup; keys already
+        outside the window are ignored. Warm-up should feed keys oldest first
+        so the expiry queue stays ordered.
+        """
+        expires_at = seen_at + self.window_seconds
+        with self._lock:
+            if expires_at <= time.time() or key in self._expiry:
+                return
+            self._insert(key, expires_at)
@@ -0,0 +1,277 @@
+"""
+Ordered secondary index for the events collection: a SQLite sidecar.
+
+Chroma metadata filters return rows unordered, so the composite access
+paths documented in docs/schema.md - (run_id, ts), (event_type, level, ts)
+and (session_id, ts) - live here as real B-tree indexes over one row per
+event (event_id, ts_ms and the filterable metadata). Filtered,
+time-ordered /query pages are answered from the index and their documents
+fetched from Chroma by id in one call; /aggregate groups are counted here
+with GROUP BY, never touching documents.
+
+The index row is written in the same step as the Chroma write: write()
+runs the Chroma write and then inserts the rows in one SQLite
+transaction, only if the Chroma write succeeded; no lock is held while
+Chroma works. A crash between the two commits leaves the index behind
+Chroma (the row counts differ at the next start), and a sidecar error
+marks it stale; either way queries fall back to Chroma until it is
+rebuilt. rebuild() recreates it from a scan of the collection, which the
+bridge does at start-up when the counts differ and
+scripts/check_event_index.py does on demand.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from bridge_query import TS_FIELD, ts_millis
+
+# Metadata columns that /query and /aggregate can filter and group on
+FILTER_COLUMNS = ("run_id", "session_id", "event_type", "level", "worker_id", "task_id", "tool_name")
+
+# Leading columns of the composite indexes: an equality filter on one makes an index seek worthwhile
+LEADING_COLUMNS = ("run_id", "session_id", "event_type")
+# A time range holding less than this share of the index is read through events_ts, not a table scan
+RANGE_SEEK_FRACTION = 0.25
+
+# Bumped when the events table changes; an older index is dropped and rebuilt
+SCHEMA_VERSION = "2"
+META_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id TEXT NOT NULL UNIQUE,
+    ts_ms INTEGER,
+    run_id TEXT, session_id TEXT, event_type TEXT, level TEXT, worker_id TEXT, task_id TEXT, tool_name TEXT
+);
+CREATE INDEX IF NOT EXISTS events_run_ts ON events (run_id, ts_ms, event_id);
+CREATE INDEX IF NOT EXISTS events_type_level_ts ON events (event_type, level, ts_ms, event_id);
+CREATE INDEX IF NOT EXISTS events_session_ts ON events (session_id, ts_ms, event_id);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts_ms, event_id);
+"""
+INSERT_ROW = f"INSERT OR REPLACE INTO events VALUES ({', '.join('?' * (len(FILTER_COLUMNS) + 2))})"
+INSERT_NEW_ROW = INSERT_ROW.replace("OR REPLACE", "OR IGNORE")
+
+Row = Tuple[Any, ...]
+
+
+def index_row(event_id: str, metadata: Dict[str, Any]) -> Row:
+    """(event_id, ts_ms, *FILTER_COLUMNS) for an events-collection row."""
+    ts_ms = metadata.get(TS_FIELD)
+    if ts_ms is None:
+        ts_ms = ts_millis(metadata.get("ts"))  # Stored before ts_ms was written
+    return (event_id, ts_ms) + tuple(metadata.get(column) for column in FILTER_COLUMNS)
+
+
+class EventIndex:
+    """
+    SQLite ordered index of the events collection.
+
+    Writes are serialized on one connection; reads use a connection per
+    thread, which WAL journaling lets run alongside a write.
+
+    Args:
+        path: Database file (its directory is created)
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._writer = self._connect()
+        self._writer.executescript(META_SCHEMA)
+        if self._get_meta("schema") != SCHEMA_VERSION:
+            self._writer.executescript(f"""
+                DROP TABLE IF EXISTS events;
+                {SCHEMA}
+                INSERT OR REPLACE INTO meta VALUES ('schema', '{SCHEMA_VERSION}'), ('state', 'stale');
+            """)
+        else:
+            self._writer.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stale = self._get_meta("state") == "stale"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._writer.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def mark_stale(self, reason: str):
+        """Stop answering queries until rebuild(); persisted across restarts."""
+        with self._lock:
+            self._mark_stale_locked(reason)
+
+    def _mark_stale_locked(self, reason: str):
+        print(f"[event-index] marked stale: {reason}")
+        self.stale = True
+        try:
+            self._writer.execute("INSERT OR REPLACE INTO meta VALUES ('state', 'stale')")
+        except sqlite3.Error:
+            pass  # The in-memory flag still keeps queries on Chroma
+
+    def count(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def rows(self) -> Iterator[Row]:
+        """Every index row, as index_row() builds them."""
+        return self._reader().execute("SELECT * FROM events")
+
+    @contextmanager
+    def write(self, ids: List[str], metadatas: List[Dict[str, Any]], replace: bool = False) -> Iterator[Set[str]]:
+        """
+        Index rows for one Chroma write, committed only if the body succeeds.
+
+        The rows are built up front and inserted in one transaction after
+        the body returns, so the writer lock is never held across the
+        Chroma call. A sidecar failure never fails the write: the index is
+        marked stale instead.
+
+        Yields a set that, once the block exits, holds the ids this write
+        indexed for the first time (every id if the sidecar failed).
+        Rows already indexed are kept unless `replace` is set, mirroring
+        Chroma's add() and upsert().
+        """
+        pending = [index_row(event_id, meta) for event_id, meta in zip(ids, metadatas)]
+        inserted: Set[str] = set()
+        yield inserted  # Raising here discards the rows: nothing was written
+        if not pending:
+            return
+        with self._lock:
+            try:
+                self._writer.execute("BEGIN IMMEDIATE")
+                for row in pending:
+                    # The insert under the writer lock is what decides which
+                    # of two concurrent writes of an event_id is the new one
+                    if self._writer.execute(INSERT_NEW_ROW, row).rowcount:
+                        inserted.add(row[0])
+                    elif replace:
+                        self._writer.execute(INSERT_ROW, row)
+                self._writer.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                inserted.update(row[0] for row in pending)
+                self._mark_stale_locked(f"insert failed: {e}")
+
+    def page(self, equals: Dict[str, Any], limit: int, since_ms: Optional[int] = None,
+             until_ms: Optional[int] = None, after: Optional[Tuple[int, str]] = None,
+             offset: int = 0) -> List[Tuple[int, str]]:
+        """
+        (ts_ms, event_id) of matching events in that order, after `after`
+        (exclusive) and skipping `offset`. Only events with a ts_ms match.
+
+        Raises:
+            KeyError: A filter that is not an indexed column
+        """
+        clauses, args = _where(equals, since_ms, until_ms)
+        clauses.append("ts_ms IS NOT NULL")
+        if after is not None:
+            clauses.append("(ts_ms, event_id) > (?, ?)")
+            args.extend(after)
+        sql = (f"SELECT ts_ms, event_id FROM events WHERE {' AND '.join(clauses)} "
+               f"ORDER BY ts_ms, event_id LIMIT ? OFFSET ?")
+        return self._reader().execute(sql, args + [limit, offset]).fetchall()
+
+    def aggregate(self, group_by: List[str], equals: Dict[str, Any], limit: int, since_ms: Optional[int] = None,
+                  until_ms: Optional[int] = None) -> List[Tuple[Any, ...]]:
+        """
+        (*group values, count, min ts_ms, max ts_ms) per group of matching
+        events, largest groups first, at most `limit` groups.
+
+        Raises:
+            KeyError: A filter or group_by field that is not an indexed column
+        """
+        for column in group_by:
+            if column not in FILTER_COLUMNS:
+                raise KeyError(column)
+        clauses, args = _where(equals, since_ms, until_ms)
+        columns = ", ".join(group_by)
+        conn = self._reader()
+        # Secondary indexes are not covering here, so reading most of the
+        # table through one costs a row lookup per event; scan instead
+        # unless a filter narrows it to a seek
+        source = "events NOT INDEXED"
+        if any(column in equals for column in LEADING_COLUMNS):
+            source = "events"
+        elif since_ms is not None or until_ms is not None:
+            time_clauses, time_args = _where({}, since_ms, until_ms)
+            in_range = conn.execute(f"SELECT COUNT(*) FROM events WHERE {' AND '.join(time_clauses)}",
+                                    time_args).fetchone()[0]
+            rows = conn.execute("SELECT MAX(rowid) FROM events").fetchone()[0] or 0
+            if in_range < rows * RANGE_SEEK_FRACTION:
+                source = "events INDEXED BY events_ts"
+        sql = (f"SELECT {columns + ', ' if group_by else ''}COUNT(*), MIN(ts_ms), MAX(ts_ms) FROM {source}"
+               f"{' WHERE ' + ' AND '.join(clauses) if clauses else ''}"
+               f"{' GROUP BY ' + columns if group_by else ''} ORDER BY COUNT(*) DESC"
+               f"{', ' + columns if group_by else ''} LIMIT ?")
+        return [row for row in conn.execute(sql, args + [limit]) if row[len(group_by)]]
+
+    def rebuild(self, batches: Iterable[Tuple[List[str], List[Dict[str, Any]]]]) -> int:
+        """
+        Replace the index with the given (ids, metadatas) batches in one
+        transaction and mark it ready. Returns the number of rows indexed.
+
+        Events written while the source is being scanned may be missed, so
+        run it with ingest stopped (the bridge does so before serving).
+        """
+        total = 0
+        with self._lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                self._writer.execute("DELETE FROM events")
+                for ids, metadatas in batches:
+                    self._writer.executemany(
+                        INSERT_ROW, [index_row(event_id, meta or {}) for event_id, meta in zip(ids, metadatas)]
+                    )
+                    total += len(ids)
+                self._writer.execute("INSERT OR REPLACE INTO meta VALUES ('state', 'ready')")
+                self._writer.execute("COMMIT")
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self.stale = False
+        return total
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+
+
+def _where(equals: Dict[str, Any], since_ms: Optional[int], until_ms: Optional[int]) -> Tuple[List[str], List[Any]]:
+    """SQL predicates (and their arguments) for equality filters and inclusive ts_ms bounds."""
+    clauses, args = [], []
+    for key, value in equals.items():
+        if key not in FILTER_COLUMNS:
+            raise KeyError(key)
+        clauses.append(f"{key} = ?")
+        args.append(value)
+    if since_ms is not None:
+        clauses.append("ts_ms >= ?")
+        args.append(since_ms)
+    if until_ms is not None:
+        clauses.append("ts_ms <= ?")
+        args.append(until_ms)
+    return clauses, args
+
+
+def scan_collection(collection, page_size: int = 1000) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+    """(ids, metadatas) pages of a Chroma collection, metadata only."""
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+        ids = page.get("ids") or []
+        if not ids:
+            return
+        yield ids, page.get("metadatas") or [{}] * len(ids)
+        offset += len(ids)
@@ -0,0 +1,26 @@
+"""
+JSON codec for the Chroma bridge: the hooks' shim (hooks/fast_json.py),
+orjson when installed and stdlib json otherwise, with the same results
+either way.
+
+Every event is parsed on ingest and serialized into its Chroma document,
+and every /query result document is parsed again, so the bridge loads
+orjson at start-up (fast_json.preload()) instead of on the first large
+document as one-shot hook processes do.
+"""
+import os
+import sys
+
+try:
+    import fast_json
+except ImportError:
+    # Appended, not prepended: hook modules never shadow the bridge's own
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "hooks"))
+    import fast_json
+
+fast_json.preload()
+
+BACKEND = fast_json.backend()
+loads = fast_json.loads
+dumps_bytes = fast_json.dumps_bytes
+dumps = fast_json.dumps
@@ -0,0 +1,156 @@
+"""
+Low-contention metrics for the Chroma bridge.
+
+Every thread records into its own shard (plain dicts, no lock on the hot
+path); /metrics merges the shards when scraped. A thread's first record
+takes a shard without the registry lock: one left by a thread that has
+exited (the threaded engine uses one thread per request), or a new one
+queued for the next scrape. The shard list is therefore as long as the
+largest number of threads alive at once, and since shards are handed on
+rather than merged away, a scrape always sees every count.
+
+Histograms use fixed Prometheus-style buckets and render with the usual
+`_bucket{le=...}`, `_sum` and `_count` series.
+"""
+import threading
+import time
+from collections import deque
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; tuned for sub-millisecond dedup checks up to multi-second embeds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Key = Tuple[str, str, Optional[str]]  # (kind, name, label)
+
+
+def _merge_into(target: Dict, shard: Dict):
+    for key, value in list(shard.items()):
+        if key[0] == "hist":
+            totals = target.get(key)
+            if totals is None:
+                target[key] = list(value)
+            else:
+                for i, v in enumerate(list(value)):
+                    totals[i] += v
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _ShardLease:
+    """Kept in a thread's local storage: frees its shard when the thread exits."""
+
+    def __init__(self, free: deque, shard: Dict[Key, object]):
+        self.free = free
+        self.shard = shard
+
+    def __del__(self):
+        self.free.append(self.shard)
+
+
+class BridgeMetrics:
+    """
+    Sharded counters, gauges and histograms.
+
+    Counters and gauges share one representation: gauges are just counters
+    that are also decremented (e.g. in-flight requests), so increments and
+    decrements from different threads still sum correctly.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._lock = threading.Lock()  # Held by scrapes only, never while recording
+        self._shards: List[Dict[Key, object]] = []
+        # deque append/pop are atomic, so recording threads need no lock
+        self._new: deque = deque()  # Shards created since the last scrape
+        self._free: deque = deque()  # Shards of threads that have exited
+
+    def _shard(self) -> Dict[Key, object]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        try:
+            shard = self._free.pop()
+        except IndexError:
+            shard = {}
+            self._new.append(shard)
+        self._local.shard = shard
+        self._local.lease = _ShardLease(self._free, shard)
+        return shard
+
+    # -- recording -----------------------------------------------------------
+
+    def inc(self, name: str, value: float = 1, label: Optional[str] = None):
+        """Add to a counter (or gauge, with a negative value)."""
+        shard = self._shard()
+        key = ("value", name, label)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name: str, label: Optional[str], seconds: float):
+        """Record one histogram sample."""
+        shard = self._shard()
+        key = ("hist", name, label)
+        counts = shard.get(key)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            counts = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, seconds)] += 1
+        counts[-1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, label: Optional[str] = None):
+        """Observe the wall time of the with-block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, label, time.perf_counter() - started)
+
+    # -- scraping ------------------------------------------------------------
+
+    def snapshot(self) -> Dict[Key, object]:
+        """Merge every shard into one dict keyed by (kind, name, label)."""
+        with self._lock:
+            while self._new:
+                self._shards.append(self._new.popleft())
+            merged: Dict[Key, object] = {}
+            for shard in self._shards:
+                _merge_into(merged, shard)
+        return merged
+
+    def value(self, snapshot: Dict[Key, object], name: str, label: Optional[str] = None) -> float:
+        return snapshot.get(("value", name, label), 0)
+
+    def render_values(self, snapshot: Dict[Key, object], name: str, metric: str,
+                      help_text: str, metric_type: str, label_name: str) -> str:
+        """Render every label of a counter/gauge as one Prometheus metric family."""
+        lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} {metric_type}"]
+        for (kind, key_name, label), value in sorted(snapshot.items(), key=lambda item: str(item[0])):
+            if kind == "value" and key_name == name and label is not None:
+                lines.append(f'{metric}{{{label_name}="{label}"}} {_format_value(value)}')
+        return "\n".join(lines) + "\n"
+
+    def render_histogram(self, snapshot: Dict[Key, object], name: str, metric: str,
+                         help_text: str, label_name: str) -> str:
+        """Render every label of a histogram as one Prometheus metric family."""
+        lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for (kind, key_name, label), counts in sorted(snapshot.items(), key=lambda item: str(item[0])):
+            if kind != "hist" or key_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{label_name}="{label}",le="{bound:g}"}} {cumulative}')
+            cumulative += counts[len(self.buckets)]
+            lines.append(f'{metric}_bucket{{{label_name}="{label}",le="+Inf"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label_name}="{label}"}} {counts[-1]:.6f}')
+            lines.append(f'{metric}_count{{{label_name}="{label}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,351 @@
+"""
+/query helpers: streaming serialization and time-ordered ranges.
+
+Documents in the events, artifacts and agent_state collections are stored
+as JSON text, so they are spliced into the response verbatim instead of
+being parsed and serialized again. Rows are encoded as the response is
+written, in chunks of about STREAM_CHUNK_BYTES, so a large page never
+exists as one parsed object tree or one response buffer. Two shapes:
+- JSON (default): {"collection", "count", "events": [...], "filters",
+  "limit", "offset"}, the same document as before
+- NDJSON (Accept: application/x-ndjson): one row object per line
+
+Time ranges: events carry an epoch-millisecond `ts_ms` metadata field
+next to the RFC3339 `ts`. since/until compile to $gte/$lte predicates on
+it, and ranged pages are returned in (ts_ms, id) order. Offset pages
+(time_ordered_page()) step over the offset with keyset scans, so they read
+metadata for offset + limit rows rather than the whole range, and fetch
+documents just for the requested page.
+
+Keyset pages: keyset_page() walks a ranged query forward from an opaque
+cursor holding the last (ts_ms, id) returned; the first page starts at the
+earliest match, found by bisecting on ts_ms. Each page probes ts_ms
+windows after the cursor, doubling an empty window, and reads only the
+metadata inside them; the cursor also carries a window sized from the
+density just seen, so a page costs about `limit` metadata rows however
+deep the walk is. Events ingested during a walk show up if their ts_ms
+is after the cursor; rows already passed are never repeated.
+"""
+import base64
+import hashlib
+import heapq
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bridge_json import dumps_bytes, loads
+
+JSON_TYPE = "application/json"
+NDJSON_TYPE = "application/x-ndjson"
+QUERY_MEDIA_TYPES = [JSON_TYPE, NDJSON_TYPE]  # First is the default
+STREAM_CHUNK_BYTES = 64 * 1024
+
+TS_FIELD = "ts_ms"
+RELATIVE_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhdw])$')
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+CURSOR_WINDOW_MS = 60 * 1000       # First probe when nothing is known about density
+CURSOR_HORIZON_MS = 86400 * 1000   # Open-ended walks probe up to now + this, then read the rest at once
+OFFSET_SKIP_STEP = 1000            # Keys per keyset step while skipping an offset
+
+Row = Tuple[str, Optional[str], Dict[str, Any], Optional[float]]
+
+
+def ts_millis(ts: Optional[str]) -> Optional[int]:
+    """Epoch milliseconds of an RFC3339 timestamp (UTC if no offset), or None."""
+    if not ts or not isinstance(ts, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+
+def millis_rfc3339(millis: Optional[int]) -> Optional[str]:
+    """RFC3339 UTC timestamp ('Z', millisecond precision) for epoch ms, or None."""
+    if millis is None:
+        return None
+    parsed = datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+    return parsed.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_time_bound(value: str, now: Optional[float] = None) -> int:
+    """
+    Epoch ms for a since/until parameter: epoch milliseconds, RFC3339 /
+    YYYY-MM-DD (UTC), or an age such as 10m, 24h, 7d.
+
+    Raises:
+        ValueError: Unrecognized value
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    if match := RELATIVE_RE.match(value):
+        age = float(match.group(1)) * UNIT_SECONDS[match.group(2)]
+        return round(((now if now is not None else time.time()) - age) * 1000)
+    millis = ts_millis(value)
+    if millis is None:
+        raise ValueError(f"Invalid time: {value!r} (use RFC3339, epoch ms, or an age like 24h)")
+    return millis
+
+
+def compile_where(equals: Dict[str, Any], since_ms: Optional[int] = None,
+                  until_ms: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Chroma where clause: equality filters plus ts_ms bounds (inclusive), $and-ed."""
+    predicates = [{key: value} for key, value in equals.items()]
+    if since_ms is not None:
+        predicates.append({TS_FIELD: {"$gte": since_ms}})
+    if until_ms is not None:
+        predicates.append({TS_FIELD: {"$lte": until_ms}})
+    if not predicates:
+        return None
+    return predicates[0] if len(predicates) == 1 else {"$and": predicates}
+
+
+def time_ordered_page(collection, equals: Dict[str, Any], limit: int, offset: int,
+                      since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+                      now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    One offset page of matches in (ts_ms, id) order, in collection.get() result shape.
+
+    The first `offset` keys are skipped with keyset steps of at most
+    OFFSET_SKIP_STEP rows (metadata only), so the cost follows
+    offset + limit, not the size of the range.
+    """
+    after, window_ms = None, CURSOR_WINDOW_MS
+    while offset > 0:
+        keys, position = ordered_keys(collection, equals, min(offset, OFFSET_SKIP_STEP), since_ms, until_ms,
+                                      after, window_ms, now)
+        if position is None:
+            return fetch_page(collection, [])
+        offset -= len(keys)
+        after, window_ms = position[:2], position[2]
+    keys, _ = ordered_keys(collection, equals, limit, since_ms, until_ms, after, window_ms, now)
+    return fetch_page(collection, [doc_id for _, doc_id in keys])
+
+
+def fetch_page(collection, page_ids: List[str]) -> Dict[str, Any]:
+    """Documents and metadata for page_ids, in that order."""
+    if not page_ids:
+        return {"ids": [], "documents": [], "metadatas": []}
+    fetched = collection.get(ids=page_ids, include=["documents", "metadatas"])
+    position = {doc_id: idx for idx, doc_id in enumerate(fetched.get("ids") or [])}
+    documents, metadatas = fetched.get("documents") or [], fetched.get("metadatas") or []
+    found = [doc_id for doc_id in page_ids if doc_id in position]  # Deleted since the first pass
+    return {
+        "ids": found,
+        "documents": [documents[position[doc_id]] if documents else None for doc_id in found],
+        "metadatas": [metadatas[position[doc_id]] if metadatas else {} for doc_id in found]
+    }
+
+
+def filters_digest(collection_name: str, equals: Dict[str, Any], until_ms: Optional[int]) -> str:
+    """Short digest of the query a cursor belongs to."""
+    key = dumps_bytes([collection_name, sorted(equals.items()), until_ms])
+    return hashlib.sha256(key).hexdigest()[:12]
+
+
+def encode_cursor(ts_ms: int, doc_id: str, window_ms: int, digest: str) -> str:
+    """Opaque, URL-safe token for the position after (ts_ms, doc_id)."""
+    payload = dumps_bytes({"t": ts_ms, "id": doc_id, "w": window_ms, "f": digest})
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, digest: str) -> Tuple[int, str, int]:
+    """
+    (ts_ms, id, window_ms) from a cursor token.
+
+    Raises:
+        ValueError: Malformed token, or one issued for different filters
+    """
+    try:
+        payload = loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        ts_ms, doc_id, window_ms = int(payload["t"]), str(payload["id"]), int(payload["w"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor") from None
+    if payload.get("f") != digest:
+        raise ValueError("Cursor does not match the query filters")
+    return ts_ms, doc_id, max(window_ms, 1)
+
+
+def first_ts(collection, equals: Dict[str, Any], since_ms: Optional[int], until_ms: Optional[int],
+             now: Optional[float] = None) -> Optional[int]:
+    """
+    Smallest ts_ms among the matches, or None if nothing matches.
+
+    Chroma cannot sort, so this bisects on the upper bound with probes that
+    read at most one id each (about 40 for a range starting at 0).
+    """
+    def any_match(upper: Optional[int]) -> bool:
+        probe = collection.get(where=compile_where(equals, since_ms, upper), limit=1, include=[])
+        return bool(probe.get("ids"))
+
+    lo = since_ms if since_ms is not None else 0
+    hi = until_ms if until_ms is not None else round((now if now is not None else time.time()) * 1000) + CURSOR_HORIZON_MS
+    if not any_match(until_ms):
+        return None
+    if until_ms is None and not any_match(hi):
+        return hi  # Only matches stamped beyond the horizon; the walk reads them at once
+    while lo < hi:
+        middle = (lo + hi) // 2
+        if any_match(middle):
+            hi = middle
+        else:
+            lo = middle + 1
+    return lo
+
+
+def ordered_keys(collection, equals: Dict[str, Any], limit: int, since_ms: Optional[int] = None,
+                 until_ms: Optional[int] = None, after: Optional[Tuple[int, str]] = None,
+                 window_ms: int = CURSOR_WINDOW_MS,
+                 now: Optional[float] = None) -> Tuple[List[Tuple[int, str]], Optional[Tuple[int, str, int]]]:
+    """
+    The first `limit` (ts_ms, id) keys of matches after `after`, and unless
+    the range is exhausted, (ts_ms, id, window_ms) to continue from.
+
+    A walk without a cursor starts at the first match (see first_ts()), not
+    at `since`, so an early or absent `since` costs no empty probes.
+    """
+    if after:
+        lo = after[0]
+    elif (lo := first_ts(collection, equals, since_ms, until_ms, now)) is None:
+        return [], None
+    horizon = round((now if now is not None else time.time()) * 1000) + CURSOR_HORIZON_MS
+    window, keys, final = window_ms, [], False
+    while not final:
+        hi = lo + window - 1
+        if until_ms is not None and hi >= until_ms:
+            hi, final = until_ms, True
+        elif until_ms is None and hi >= horizon:
+            hi, final = None, True
+        if hi is not None and hi < lo:
+            break
+        matches = collection.get(where=compile_where(equals, lo, hi), include=["metadatas"])
+        probe = [
+            (meta[TS_FIELD], doc_id)
+            for doc_id, meta in zip(matches.get("ids") or [], matches.get("metadatas") or [])
+            if meta and TS_FIELD in meta
+        ]
+        if after:
+            probe = [key for key in probe if key > after]
+        keys.extend(probe)
+        if len(keys) >= limit or hi is None:
+            break
+        lo, window = hi + 1, window * 2
+
+    page = heapq.nsmallest(limit, keys)
+    if len(page) < limit or (final and len(keys) == limit):
+        return page, None
+    # The next window starts at the last key returned and spans about as
+    # much time as `limit` more keys did on this page
+    span = (page[-1][0] - page[0][0]) * limit // max(limit - 1, 1)
+    return page, (page[-1][0], page[-1][1], span + 1)
+
+
+def keyset_page(collection, equals: Dict[str, Any], limit: int, since_ms: Optional[int] = None,
+                until_ms: Optional[int] = None, after: Optional[Tuple[int, str]] = None,
+                window_ms: int = CURSOR_WINDOW_MS,
+                now: Optional[float] = None) -> Tuple[Dict[str, Any], Optional[Tuple[int, str, int]]]:
+    """
+    The first `limit` matches after `after` in (ts_ms, id) order.
+
+    Returns the page in collection.get() result shape and, unless the range
+    is exhausted, (ts_ms, id, window_ms) to continue from.
+    """
+    keys, position = ordered_keys(collection, equals, limit, since_ms, until_ms, after, window_ms, now)
+    return fetch_page(collection, [doc_id for _, doc_id in keys]), position
+
+
+def aggregate_metadata(pages: Iterable[List[Dict[str, Any]]], group_by: List[str],
+                       limit: int) -> List[Tuple[Any, ...]]:
+    """
+    (*group values, count, min ts_ms, max ts_ms) per group, largest first,
+    folded page by page from metadata (the scan counterpart of
+    EventIndex.aggregate()).
+    """
+    groups: Dict[Tuple[Any, ...], List[Any]] = {}
+    for metadatas in pages:
+        for meta in metadatas:
+            meta = meta or {}
+            key = tuple(meta.get(field) for field in group_by)
+            ts_ms = meta.get(TS_FIELD)
+            if ts_ms is None:
+                ts_ms = ts_millis(meta.get("ts"))
+            if (group := groups.get(key)) is None:
+                groups[key] = [1, ts_ms, ts_ms]
+                continue
+            group[0] += 1
+            if ts_ms is not None:
+                if group[1] is None or ts_ms < group[1]:
+                    group[1] = ts_ms
+                if group[2] is None or ts_ms > group[2]:
+                    group[2] = ts_ms
+    ordered = sorted(groups.items(), key=lambda item: (-item[1][0], tuple(str(v) for v in item[0])))
+    return [key + tuple(group) for key, group in ordered[:limit]]
+
+
+def result_rows(results: Dict[str, Any], nested: bool = False) -> List[Row]:
+    """
+    (id, document, metadata, distance) per result.
+
+    Args:
+        results: collection.get() result, or collection.query() result when nested
+        nested: Results hold one list per query text (only the first is used)
+    """
+    def column(name):
+        values = results.get(name) or []
+        return (values[0] if values else []) if nested else values
+
+    ids, documents, metadatas, distances = column("ids"), column("documents"), column("metadatas"), column("distances")
+    return [(
+        doc_id,
+        documents[idx] if idx < len(documents) else None,
+        metadatas[idx] if idx < len(metadatas) and metadatas[idx] else {},
+        distances[idx] if idx < len(distances) else None
+    ) for idx, doc_id in enumerate(ids)]
+
+
+def encode_row(row: Row, raw_documents: bool) -> bytes:
+    """One result object; raw_documents splices the stored JSON text as-is."""
+    doc_id, document, metadata, distance = row
+    if not document:
+        document_json = b"{}"
+    elif raw_documents:
+        document_json = document.encode("utf-8")
+    else:
+        document_json = dumps_bytes(document)
+    return (b'{"id":' + dumps_bytes(doc_id) + b',"document":' + document_json +
+            b',"metadata":' + dumps_bytes(metadata) + b',"distance":' + dumps_bytes(distance) + b'}')
+
+
+def _chunked(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    """Coalesce small pieces into chunks of about STREAM_CHUNK_BYTES."""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def stream_json(head: Dict[str, Any], key: str, rows: List[Row], tail: Dict[str, Any],
+                raw_documents: bool) -> Iterator[bytes]:
+    """The object {**head, key: [rows...], **tail}, encoded row by row."""
+    def pieces():
+        yield dumps_bytes(head)[:-1] + b',' + dumps_bytes(key) + b':['
+        for idx, row in enumerate(rows):
+            yield (b',' if idx else b'') + encode_row(row, raw_documents)
+        yield b']' + (b',' + dumps_bytes(tail)[1:] if tail else b'}')
+    return _chunked(pieces())
+
+
+def stream_ndjson(rows: List[Row], raw_documents: bool) -> Iterator[bytes]:
+    """One row object per line."""
+    return _chunked(encode_row(row, raw_documents) + b"\n" for row in rows)
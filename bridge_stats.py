@@ -0,0 +1,170 @@
+"""
+Materialized per-run and per-session aggregates for /stats.
+
+Every stored event updates the aggregate of its run_id and of its
+session_id: counts by event_type and level, a tool_name histogram,
+first/last ts, the distinct worker_ids and artifact bytes. /stats is then
+one dictionary lookup however many events a run has.
+
+Aggregates live in memory and are written to a JSON snapshot (tmp +
+rename) every `flush_seconds` by a background thread and on close(). The
+snapshot records how many events it covers; on start-up the bridge
+compares that with the events collection and rebuilds from Chroma when
+they differ (events stored after the last flush, or a missing snapshot).
+"""
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from bridge_json import dumps_bytes, loads
+from bridge_query import TS_FIELD, ts_millis
+
+SCOPES = ("run_id", "session_id")
+SNAPSHOT_VERSION = 1
+
+# (event metadata as written to Chroma, artifact bytes of the event)
+Observation = Tuple[Dict[str, Any], int]
+
+
+def artifact_bytes(event: Dict[str, Any]) -> int:
+    """Sum of artifact_refs size_bytes on an artifact event."""
+    if event.get("event_type") != "artifact":
+        return 0
+    total = 0
+    for artifact in event.get("artifact_refs") or []:
+        if isinstance(artifact, dict) and isinstance(size := artifact.get("size_bytes"), (int, float)):
+            total += int(size)
+    return total
+
+
+def _new_aggregate() -> Dict[str, Any]:
+    return {"events": 0, "event_types": {}, "levels": {}, "tools": {}, "workers": set(),
+            "first_ts": None, "last_ts": None, "first_ts_ms": None, "last_ts_ms": None, "artifact_bytes": 0}
+
+
+def _apply(aggregate: Dict[str, Any], metadata: Dict[str, Any], size: int):
+    aggregate["events"] += 1
+    for field, key in (("event_types", "event_type"), ("levels", "level"), ("tools", "tool_name")):
+        if value := metadata.get(key):
+            counts = aggregate[field]
+            counts[value] = counts.get(value, 0) + 1
+    if worker_id := metadata.get("worker_id"):
+        aggregate["workers"].add(worker_id)
+    ts_ms = metadata.get(TS_FIELD)
+    if ts_ms is None:
+        ts_ms = ts_millis(metadata.get("ts"))  # Stored before ts_ms was written
+    if ts_ms is not None:
+        if aggregate["first_ts_ms"] is None or ts_ms < aggregate["first_ts_ms"]:
+            aggregate["first_ts_ms"], aggregate["first_ts"] = ts_ms, metadata.get("ts")
+        if aggregate["last_ts_ms"] is None or ts_ms > aggregate["last_ts_ms"]:
+            aggregate["last_ts_ms"], aggregate["last_ts"] = ts_ms, metadata.get("ts")
+    aggregate["artifact_bytes"] += size
+
+
+class RunStats:
+    """
+    Per-run and per-session aggregates, updated on ingest.
+
+    Args:
+        path: Snapshot file ("" keeps the aggregates in memory only)
+        flush_seconds: Snapshot interval while changes are pending
+    """
+
+    def __init__(self, path: str, flush_seconds: float = 10.0):
+        self.path = os.path.expanduser(path) if path else ""
+        self.flush_seconds = flush_seconds
+        self.events = 0  # Events aggregated
+        self._scopes: Dict[str, Dict[str, Dict[str, Any]]] = {scope: {} for scope in SCOPES}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, observations: Iterable[Observation]):
+        """Fold stored events into their run and session aggregates."""
+        with self._lock:
+            for metadata, size in observations:
+                for scope in SCOPES:
+                    if key := metadata.get(scope):
+                        aggregates = self._scopes[scope]
+                        if (aggregate := aggregates.get(key)) is None:
+                            aggregate = aggregates[key] = _new_aggregate()
+                        _apply(aggregate, metadata, size)
+                self.events += 1
+                self._dirty = True
+
+    def get(self, scope: str, key: str) -> Optional[Dict[str, Any]]:
+        """The aggregate for run_id/session_id `key` as a JSON-ready dict, or None."""
+        with self._lock:
+            aggregate = self._scopes[scope].get(key)
+            if aggregate is None:
+                return None
+            return {**aggregate, "event_types": dict(aggregate["event_types"]), "levels": dict(aggregate["levels"]),
+                    "tools": dict(aggregate["tools"]), "workers": len(aggregate["workers"])}
+
+    def rebuild(self, observations: Iterable[Observation]):
+        """Replace all aggregates with the given events (e.g. a Chroma scan)."""
+        scratch = RunStats("")
+        scratch.observe(observations)
+        with self._lock:
+            self._scopes, self.events, self._dirty = scratch._scopes, scratch.events, True
+
+    def load(self) -> bool:
+        """Read the snapshot; False if there is none or it is unreadable."""
+        if not self.path:
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = loads(f.read())
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return False
+            scopes = {scope: snapshot[scope] for scope in SCOPES}
+        except (OSError, ValueError, KeyError, AttributeError):
+            return False
+        for aggregates in scopes.values():
+            for aggregate in aggregates.values():
+                aggregate["workers"] = set(aggregate["workers"])
+        with self._lock:
+            self._scopes, self.events, self._dirty = scopes, int(snapshot.get("events", 0)), False
+        return True
+
+    def flush(self):
+        """Write the snapshot if anything changed since the last one."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {"version": SNAPSHOT_VERSION, "events": self.events, **{
+                scope: {key: {**aggregate, "workers": sorted(aggregate["workers"])}
+                        for key, aggregate in aggregates.items()}
+                for scope, aggregates in self._scopes.items()
+            }}
+            data = dumps_bytes(snapshot)
+            self._dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[stats] snapshot failed: {e}")
+                self._dirty = True
+
+    def start(self):
+        """Begin periodic snapshots."""
+        if self.path and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stats-flush", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the flush thread and write a final snapshot."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
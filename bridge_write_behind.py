@@ -0,0 +1,260 @@
+"""
+Write-behind ingest queue for the Chroma bridge (BRIDGE_WRITE_BEHIND=true).
+
+Admitted envelopes are appended to a write-ahead log (one JSON line each)
+and queued in memory; the request is answered 202 right away. A writer
+thread group-commits the queue to Chroma whenever `max_batch` events are
+waiting or the oldest has waited `max_delay_ms`.
+
+After every commit the WAL's committed byte offset is recorded in
+"<wal>.ack" (tmp + rename); once everything is committed the WAL is
+truncated. On startup, lines past the ack offset are replayed. Delivery is
+at-least-once, so the commit function must be idempotent (the bridge
+upserts by event_id).
+
+A failed group commit is split in halves and retried down to single
+events. An event that fails on its own while other events in the same
+pass were committed is tried once more, then written to "<wal>.dead" (one JSON line with
+the error) and acknowledged, so one bad event cannot stall the queue. If
+nothing in the pass could be committed, Chroma is taken to be down: the
+batch is retried whole after a backoff.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from bridge_json import dumps_bytes, loads
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue is at capacity or shutting down."""
+
+
+class WriteBehindQueue:
+    """
+    WAL-backed FIFO of admitted events with a single group-commit writer.
+
+    Args:
+        commit: Called with a list of envelopes; must raise on failure
+        wal_path: Write-ahead log file
+        max_batch: Most events per commit
+        max_delay_ms: Longest an event waits before a commit is started
+        max_depth: Queue capacity; submit() raises QueueFull beyond it
+        fsync: fsync the WAL on every append (survives power loss, slower)
+    """
+
+    def __init__(self, commit: Callable[[List[Dict[str, Any]]], None], wal_path: str,
+                 max_batch: int = 500, max_delay_ms: float = 50, max_depth: int = 100000,
+                 fsync: bool = False):
+        self.commit = commit
+        self.wal_path = os.path.expanduser(wal_path)
+        self.ack_path = self.wal_path + ".ack"
+        self.dead_letter_path = self.wal_path + ".dead"
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_depth = max_depth
+        self.fsync = fsync
+
+        # (event, WAL end offset, enqueued at)
+        self._queue: Deque[Tuple[Dict[str, Any], int, float]] = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = None
+        self._fd = None
+        self._wal_size = 0
+
+        self.committed = 0
+        self.commit_failures = 0
+        self.dead_lettered = 0
+        self.commit_seconds_sum = 0.0
+        self.commit_count = 0
+
+    # -- WAL -----------------------------------------------------------------
+
+    def _read_ack(self) -> int:
+        try:
+            with open(self.ack_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_ack(self, offset: int):
+        tmp = self.ack_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp, self.ack_path)
+
+    def _replay(self) -> List[Dict[str, Any]]:
+        """Queue WAL records past the ack offset; drops a torn final line."""
+        ack = self._read_ack()
+        if ack > self._wal_size:
+            ack = 0  # WAL was replaced or truncated behind the ack file
+        replayed = []
+        with open(self.wal_path, "rb") as f:
+            f.seek(ack)
+            offset = ack
+            for line in f:
+                if not line.endswith(b"\n"):
+                    print(f"Write-behind WAL: dropping torn record at offset {offset}", file=sys.stderr)
+                    break
+                offset += len(line)
+                try:
+                    event = loads(line)
+                except json.JSONDecodeError:
+                    print(f"Write-behind WAL: skipping unreadable record ending at offset {offset}", file=sys.stderr)
+                    continue
+                self._queue.append((event, offset, time.monotonic()))
+                replayed.append(event)
+        if offset < self._wal_size:
+            # Cut the torn tail so new appends start on a record boundary
+            os.truncate(self.wal_path, offset)
+            self._wal_size = offset
+        return replayed
+
+    def start(self) -> List[Dict[str, Any]]:
+        """
+        Open the WAL, replay uncommitted records and start the writer.
+
+        Returns:
+            Replayed envelopes (already queued), e.g. to re-seed dedup state.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.wal_path)), exist_ok=True)
+        self._fd = os.open(self.wal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._wal_size = os.fstat(self._fd).st_size
+        replayed = self._replay()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        return replayed
+
+    # -- producer side -------------------------------------------------------
+
+    def submit(self, events: List[Dict[str, Any]]):
+        """Durably append events to the WAL and queue them for commit."""
+        if not events:
+            return
+        data = [dumps_bytes(event) + b"\n" for event in events]
+        with self._cond:
+            if self._closing or self._fd is None:
+                raise QueueFull("write-behind queue is not accepting events")
+            if len(self._queue) + len(events) > self.max_depth:
+                raise QueueFull(f"write-behind queue full ({len(self._queue)} events)")
+            os.write(self._fd, b"".join(data))
+            if self.fsync:
+                os.fsync(self._fd)
+            now = time.monotonic()
+            for event, line in zip(events, data):
+                self._wal_size += len(line)
+                self._queue.append((event, self._wal_size, now))
+            self._cond.notify_all()
+
+    # -- writer side ---------------------------------------------------------
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closing:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            deadline = self._queue[0][2] + self.max_delay
+            while len(self._queue) < self.max_batch and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue[i] for i in range(min(self.max_batch, len(self._queue)))]
+
+    def _commit_split(self, events: List[Dict[str, Any]]) -> Tuple[int, List[Tuple[Dict[str, Any], str]]]:
+        """
+        Commit events, halving on failure. Returns (events committed,
+        [(event, error)] for events that failed on their own).
+        """
+        try:
+            self.commit(events)
+            return len(events), []
+        except Exception as e:
+            if len(events) == 1:
+                return 0, [(events[0], str(e))]
+        middle = len(events) // 2
+        committed, failed = self._commit_split(events[:middle])
+        right_committed, right_failed = self._commit_split(events[middle:])
+        return committed + right_committed, failed + right_failed
+
+    def _dead_letter(self, failed: List[Tuple[Dict[str, Any], str]]):
+        with open(self.dead_letter_path, "ab") as f:
+            for event, error in failed:
+                f.write(dumps_bytes({"error": error, "event": event}) + b"\n")
+        self.dead_lettered += len(failed)
+        print(f"Write-behind: dead-lettered {len(failed)} events to {self.dead_letter_path} "
+              f"(first error: {failed[0][1]})", file=sys.stderr)
+
+    def _run(self):
+        backoff = 0.1
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            committed, failed = self._commit_split([event for event, _, _ in batch])
+            if failed:
+                self.commit_failures += 1
+            if failed and not committed:
+                print(f"Write-behind commit failed ({len(batch)} events, retrying in {backoff:.1f}s): {failed[0][1]}",
+                      file=sys.stderr)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            backoff = 0.1
+            if failed:
+                # Events that failed before Chroma came back mid-pass get one
+                # more try now that it is accepting writes
+                retried = [self._commit_split([event]) for event, _ in failed]
+                committed += sum(done for done, _ in retried)
+                if failed := [item for _, still in retried for item in still]:
+                    self._dead_letter(failed)
+            elapsed = time.perf_counter() - started
+
+            with self._cond:
+                for _ in batch:
+                    self._queue.popleft()
+                committed_offset = batch[-1][1]
+                if not self._queue and committed_offset == self._wal_size:
+                    # Everything is in Chroma: start the WAL over. Ack 0 goes
+                    # first so a crash in between only causes a re-commit.
+                    self._write_ack(0)
+                    os.ftruncate(self._fd, 0)
+                    self._wal_size = 0
+                else:
+                    self._write_ack(committed_offset)
+                self.committed += committed
+                self.commit_count += 1
+                self.commit_seconds_sum += elapsed
+                self._cond.notify_all()
+
+    # -- lifecycle / introspection -------------------------------------------
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def close(self, timeout: float = 30.0) -> int:
+        """
+        Stop accepting events and wait for the queue to drain.
+
+        Returns:
+            Events still uncommitted (kept in the WAL for the next start).
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._cond:
+            remaining = len(self._queue)
+            if self._fd is not None and not (self._thread and self._thread.is_alive()):
+                os.close(self._fd)
+                self._fd = None
+        return remaining
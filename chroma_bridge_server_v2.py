@@ -1,10 +1,13 @@
 """
 ChromaDB Bridge Server v2.0
 Advanced event ingestion and query API with:
-- Multi-threaded HTTP server
+- Multi-threaded HTTP server, or an asyncio engine with keep-alive (BRIDGE_ENGINE=asyncio)
+- Optional Unix domain socket next to the TCP port (BRIDGE_UNIX_SOCKET)
 - API key authentication
 - Partitioned collections (events, artifacts, embeddings, agent_state)
 - Query endpoints with metadata filters + semantic search
+- Content-addressed blob store for offloaded payload fields (/blobs/<sha256>)
+- gzip/zstd request and response bodies, MessagePack/CBOR ingest (bridge_codec)
 - Health and metrics endpoints
 - Request logging and error handling
 """
@@ -13,13 +16,33 @@ import socketserver
 import json
 import chromadb
 import os
+import signal
 import time
 import hashlib
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from urllib.parse import parse_qs, urlparse
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from collections import defaultdict
-from threading import Lock
+
+from bridge_async_server import AsyncBridgeServer
+from bridge_blobs import BlobStore, DigestMismatch
+from bridge_codec import (
+    BodyDecodeError, DecodedTooLarge, UnsupportedMediaType, check_media_type, compress_response,
+    compress_stream, content_encodings, decompress, is_binary, loads_batch, loads_event, media_types,
+    negotiate_media_type
+)
+from bridge_dedup import DedupIndex, parse_rfc3339
+from bridge_index import EventIndex, scan_collection
+from bridge_json import BACKEND as JSON_BACKEND, dumps as json_dumps, dumps_bytes as json_dumps_bytes, loads as json_loads
+from bridge_query import (
+    CURSOR_WINDOW_MS, JSON_TYPE, NDJSON_TYPE, QUERY_MEDIA_TYPES, TS_FIELD, aggregate_metadata, compile_where,
+    decode_cursor, encode_cursor, fetch_page, filters_digest, keyset_page, millis_rfc3339, parse_time_bound,
+    result_rows, stream_json, stream_ndjson, time_ordered_page, ts_millis
+)
+from bridge_metrics import BridgeMetrics
+from bridge_stats import RunStats, artifact_bytes
+from bridge_write_behind import QueueFull, WriteBehindQueue
 
 # Load environment variables from .env file
 try:
@@ -33,6 +56,49 @@ PORT = int(os.getenv("CHROMA_BRIDGE_PORT", "9000"))
 DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
 API_KEY = os.getenv("ZO_API_KEY", "")  # Set via environment for security
 MAX_PAYLOAD_SIZE = int(os.getenv("MAX_PAYLOAD_MB", "10")) * 1024 * 1024  # 10MB default
+MAX_BATCH_EVENTS = int(os.getenv("MAX_BATCH_EVENTS", "1000"))  # Events per /ingest/batch request
+BLOB_DIR = os.getenv("BRIDGE_BLOB_DIR", "./blobs")  # Offloaded payload fields (PUT/GET /blobs/<sha256>)
+# SQLite ordered index of the events collection for time-ordered /query
+# pages (bridge_index); empty disables it. Keep it off when several bridges
+# write to one Chroma Cloud database, since each only sees its own writes.
+EVENT_INDEX_PATH = os.getenv("BRIDGE_EVENT_INDEX", "./bridge_index/events.db")
+# Per-run/per-session aggregates for /stats, snapshotted every STATS_FLUSH_SECONDS
+STATS_SNAPSHOT = os.getenv("BRIDGE_STATS_SNAPSHOT", "./bridge_stats/stats.json")
+STATS_FLUSH_SECONDS = float(os.getenv("STATS_FLUSH_SECONDS", "10"))
+
+# Serving engine: "threaded" (thread per connection, HTTP/1.0) or "asyncio"
+# (persistent HTTP/1.1 connections, Chroma calls on a bounded worker pool)
+BRIDGE_ENGINE = os.getenv("BRIDGE_ENGINE", "threaded").lower()
+BRIDGE_WORKERS = int(os.getenv("BRIDGE_WORKERS", "8"))
+BRIDGE_QUEUE_DEPTH = int(os.getenv("BRIDGE_QUEUE_DEPTH", "256"))  # Queued + running before 503
+BRIDGE_KEEPALIVE_SECONDS = float(os.getenv("BRIDGE_KEEPALIVE_SECONDS", "15"))
+
+# Optional Unix socket served next to the TCP port, for hooks on the same
+# host (ZO_EVENT_ENDPOINT=unix:///run/zo/bridge.sock)
+BRIDGE_UNIX_SOCKET = os.getenv("BRIDGE_UNIX_SOCKET", "")
+BRIDGE_UNIX_SOCKET_MODE = int(os.getenv("BRIDGE_UNIX_SOCKET_MODE", "660"), 8)
+
+# Write-behind ingest: reply 202 once an event is validated, deduplicated and
+# in the WAL; a writer thread group-commits to Chroma every
+# WRITE_BEHIND_INTERVAL_MS or WRITE_BEHIND_BATCH events
+WRITE_BEHIND = os.getenv("BRIDGE_WRITE_BEHIND", "false").lower() == "true"
+WRITE_BEHIND_WAL = os.getenv("WRITE_BEHIND_WAL", "./bridge_wal/ingest.wal")
+WRITE_BEHIND_BATCH = int(os.getenv("WRITE_BEHIND_BATCH", "500"))
+WRITE_BEHIND_INTERVAL_MS = float(os.getenv("WRITE_BEHIND_INTERVAL_MS", "50"))
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "100000"))
+WRITE_BEHIND_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() == "true"
+
+# Deduplication window (docs/schema.md: duplicates within 5 minutes are dropped)
+DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "300"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "1000000"))
+DEDUP_WARM_SCAN = int(os.getenv("DEDUP_WARM_SCAN", "10000"))  # Newest events read at startup
+
+# Storage mode: "full" lets Chroma embed every collection; "lean" stores a
+# fixed placeholder vector in events/artifacts/agent_state so only the
+# semantic `embeddings` collection runs the embedding model.
+# Existing databases must be migrated first: scripts/migrate_storage_mode.py
+STORAGE_MODE = os.getenv("CHROMA_STORAGE_MODE", "full").lower()
+LEAN_EMBEDDING_DIM = int(os.getenv("CHROMA_LEAN_EMBEDDING_DIM", "1"))
 
 # Chroma Cloud configuration (optional)
 USE_CHROMA_CLOUD = os.getenv("USE_CHROMA_CLOUD", "false").lower() == "true"
@@ -40,17 +106,22 @@ CHROMA_TENANT = os.getenv("CHROMA_TENANT", "")
 CHROMA_DATABASE = os.getenv("CHROMA_DATABASE", "")
 CHROMA_API_KEY = os.getenv("CHROMA_API_KEY", "")
 
-# Metrics
-metrics_lock = Lock()
-metrics = {
-    "total_requests": 0,
-    "ingest_count": 0,
-    "query_count": 0,
-    "error_count": 0,
-    "duplicate_count": 0,
-    "latency_sum": 0.0,
-    "latency_count": 0
+# Metrics (per-thread shards, merged when /metrics is scraped)
+bridge_metrics = BridgeMetrics()
+
+# Path -> endpoint label for per-endpoint latency histograms
+ENDPOINT_LABELS = {
+    "/ingest": "ingest",
+    "/events": "ingest",
+    "/ingest/batch": "ingest_batch",
+    "/events/batch": "ingest_batch",
+    "/query": "query",
+    "/stats": "stats",
+    "/aggregate": "aggregate",
+    "/health": "health",
+    "/metrics": "metrics"
 }
+BLOB_PATH_PREFIX = "/blobs/"
 
 # Initialize ChromaDB with partitioned collections
 if USE_CHROMA_CLOUD:
@@ -90,332 +161,1142 @@ collections = {
     )
 }
 
-print(f"ChromaDB initialized with collections: {list(collections.keys())}")
+# Collections that are never searched semantically
+NON_SEMANTIC_COLLECTIONS = ("events", "artifacts", "agent_state")
 
+if STORAGE_MODE not in ("full", "lean"):
+    raise ValueError(f"Invalid CHROMA_STORAGE_MODE: {STORAGE_MODE}. Must be 'full' or 'lean'")
 
-class ChromaBridgeHandler(http.server.BaseHTTPRequestHandler):
-    """HTTP request handler with routing and authentication."""
+
+def check_storage_mode(mode: str, targets: Dict[str, Any]):
+    """
+    Refuse to start against collections written in the other storage mode;
+    every add would fail with a dimension mismatch.
+
+    Lean collections hold the [1.0] * LEAN_EMBEDDING_DIM placeholder, full
+    ones model-sized vectors. One stored vector per collection is sampled.
+
+    Raises:
+        ValueError: A collection does not match `mode`
+    """
+    for name in NON_SEMANTIC_COLLECTIONS:
+        vectors = targets[name].get(limit=1, include=["embeddings"]).get("embeddings")
+        if vectors is None or len(vectors) == 0:
+            continue
+        vector = vectors[0]
+        placeholder = len(vector) == LEAN_EMBEDDING_DIM and all(float(value) == 1.0 for value in vector)
+        if mode == "lean" and len(vector) != LEAN_EMBEDDING_DIM:
+            raise ValueError(
+                f"Collection '{name}' stores {len(vector)}-dim embeddings; run "
+                f"scripts/migrate_storage_mode.py --mode lean before CHROMA_STORAGE_MODE=lean"
+            )
+        if mode == "full" and placeholder:
+            raise ValueError(
+                f"Collection '{name}' stores lean placeholder vectors; run "
+                f"scripts/migrate_storage_mode.py --mode full, or set CHROMA_STORAGE_MODE=lean"
+            )
+
+
+check_storage_mode(STORAGE_MODE, collections)
+
+print(f"ChromaDB initialized with collections: {list(collections.keys())} (storage mode: {STORAGE_MODE})")
+
+
+# Partition routing
+EMBEDDING_EVENT_TYPES = {"decision", "error", "artifact", "worker_spawn"}
+AGENT_STATE_EVENT_TYPES = {"worker_heartbeat", "progress", "worker_spawn"}
+# Collections whose documents are JSON written by this bridge (embeddings hold plain text)
+JSON_DOCUMENT_COLLECTIONS = {"events", "artifacts", "agent_state"}
+# Collections whose metadata carries ts_ms (see build_event_metadata)
+TIME_RANGE_COLLECTIONS = {"events", "embeddings"}
+# Metadata equality filters accepted by /query and /aggregate (also the /aggregate group_by fields)
+FILTER_FIELDS = ("run_id", "event_type", "level", "worker_id", "task_id", "session_id", "tool_name")
+# Envelope fields copied into Chroma metadata by build_event_metadata
+METADATA_FIELDS = ("event_id", "ts", "event_type", "level", "run_id", "session_id", "worker_id", "task_id",
+                   "tool_name", "hash", "hash_alg")
+AGGREGATE_MAX_GROUPS = 10000
+AGGREGATE_SCAN_PAGE = 5000  # Metadata rows per get() when /aggregate cannot use the events index
+
+
+def placeholder_embeddings(count: int) -> Optional[List[List[float]]]:
+    """
+    Fixed vectors for non-semantic collections in lean mode.
+
+    Returns None in full mode so Chroma computes embeddings as before.
+    """
+    if STORAGE_MODE != "lean":
+        return None
+    return [[1.0] * LEAN_EMBEDDING_DIM for _ in range(count)]
+
+
+def record_metric(metric_name: str, value: float = 1.0):
+    """Thread-safe metric recording."""
+    bridge_metrics.inc(metric_name, value)
+
+
+async_server: Optional[AsyncBridgeServer] = None  # set in __main__ for the asyncio engine
+
+dedup_index = DedupIndex(window_seconds=DEDUP_WINDOW_SECONDS, max_entries=DEDUP_MAX_ENTRIES)
+
+blob_store = BlobStore(BLOB_DIR)
+
+event_index = EventIndex(EVENT_INDEX_PATH) if EVENT_INDEX_PATH else None
+
+run_stats = RunStats(STATS_SNAPSHOT, flush_seconds=STATS_FLUSH_SECONDS)
+
+
+def commit_write_behind(events: List[Dict[str, Any]]):
+    """Group commit run by the write-behind writer thread."""
+    # One upsert cannot carry an id twice; a later envelope for the same
+    # event_id replaces the earlier one
+    latest = {event.get("event_id", "unknown"): event for event in events}
+    with bridge_metrics.timer("stage_seconds", "group_commit"):
+        write_events(list(latest.values()), idempotent=True)
+
+
+write_behind = WriteBehindQueue(
+    commit_write_behind,
+    WRITE_BEHIND_WAL,
+    max_batch=WRITE_BEHIND_BATCH,
+    max_delay_ms=WRITE_BEHIND_INTERVAL_MS,
+    max_depth=WRITE_BEHIND_MAX_QUEUE,
+    fsync=WRITE_BEHIND_FSYNC
+) if WRITE_BEHIND else None
+
+
+def warm_dedup_index() -> int:
+    """
+    Seed the dedup index from the newest stored events so retries that
+    straddle a bridge restart are still recognised.
+
+    Returns:
+        Number of hashes loaded.
+    """
+    try:
+        total = collections["events"].count()
+        results = collections["events"].get(
+            offset=max(0, total - DEDUP_WARM_SCAN),
+            limit=DEDUP_WARM_SCAN,
+            include=["metadatas"]
+        )
+    except Exception as e:
+        print(f"Dedup warm-up failed: {e}")
+        return 0
+
+    recent = []
+    for meta in results.get("metadatas") or []:
+        if meta and (key := dedup_key(meta)) and (seen_at := parse_rfc3339(meta.get("ts", ""))):
+            recent.append((seen_at, key))
+    for seen_at, event_hash in sorted(recent):
+        dedup_index.add(event_hash, seen_at)
+    return len(dedup_index)
+
+
+def sync_event_index() -> str:
+    """
+    Rebuild the events index from Chroma if it is stale or its row count
+    differs from the collection's (run before serving). Returns a status line.
+    """
+    if not event_index:
+        return "off"
+    total = collections["events"].count()
+    if not event_index.stale and event_index.count() == total:
+        return f"{EVENT_INDEX_PATH} ({total} events)"
+    started = time.time()
+    try:
+        indexed = event_index.rebuild(scan_collection(collections["events"]))
+    except Exception as e:
+        event_index.mark_stale(f"rebuild failed: {e}")
+        return f"{EVENT_INDEX_PATH} (stale, queries use Chroma)"
+    return f"{EVENT_INDEX_PATH} (rebuilt {indexed} events in {time.time() - started:.1f}s)"
+
+
+def stored_observations(page_size: int = 1000):
+    """(metadata, artifact bytes) for every stored event; documents are read for artifact events only."""
+    for ids, metadatas in scan_collection(collections["events"], page_size):
+        metadatas = [meta or {} for meta in metadatas]
+        sizes = {}
+        if artifact_ids := [doc_id for doc_id, meta in zip(ids, metadatas) if meta.get("event_type") == "artifact"]:
+            fetched = collections["events"].get(ids=artifact_ids, include=["documents"])
+            for doc_id, document in zip(fetched.get("ids") or [], fetched.get("documents") or []):
+                sizes[doc_id] = artifact_bytes(json_loads(document)) if document else 0
+        for doc_id, meta in zip(ids, metadatas):
+            yield meta, sizes.get(doc_id, 0)
+
+
+def sync_run_stats() -> str:
+    """
+    Load the /stats snapshot, rebuilding from Chroma if it does not cover
+    exactly the stored events (run before serving). Returns a status line.
+    """
+    total = collections["events"].count()
+    if run_stats.load() and run_stats.events == total:
+        return f"{STATS_SNAPSHOT or 'memory'} ({total} events)"
+    started = time.time()
+    run_stats.rebuild(stored_observations())
+    return f"{STATS_SNAPSHOT or 'memory'} (rebuilt from {run_stats.events} events in {time.time() - started:.1f}s)"
+
+
+def dedup_key(event: Dict[str, Any]) -> str:
+    """
+    Dedup index key for an envelope (or its stored metadata).
+
+    Hashes from different algorithms ("hash_alg"; absent means sha256) are
+    kept apart by prefixing the non-default ones.
+    """
+    event_hash = event.get("hash") or ""
+    alg = event.get("hash_alg") or "sha256"
+    return event_hash if alg == "sha256" or not event_hash else f"{alg}:{event_hash}"
+
+
+def metadata_error(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Why an envelope cannot be stored, or None.
+
+    Chroma metadata values must be primitives, so an explicit null or a
+    nested value in a field copied into metadata would fail the write.
+    """
+    if "event_id" in event and not isinstance(event["event_id"], str):
+        return "event_id must be a string"  # It is also the Chroma id
+    for field in METADATA_FIELDS:
+        if field in event and not isinstance(event[field], (str, int, float, bool)):
+            return f"{field} must be a string, number or boolean"
+    artifact_refs = event.get("artifact_refs")
+    if artifact_refs is not None and not (
+            isinstance(artifact_refs, list) and all(isinstance(artifact, dict) for artifact in artifact_refs)):
+        return "artifact_refs must be a list of objects"
+    return None
+
+
+def build_event_metadata(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Build Chroma metadata for an event (primitives only)."""
+    metadata = {
+        "event_id": event.get("event_id", "unknown"),
+        "ts": event.get("ts", ""),
+        "event_type": event.get("event_type", "unknown"),
+        "level": event.get("level", "info"),
+        "run_id": event.get("run_id", "unknown"),
+        "session_id": event.get("session_id", "unknown"),
+        "worker_id": event.get("worker_id", ""),
+        "task_id": event.get("task_id", ""),
+        "tool_name": event.get("tool_name", ""),
+        "hash": event.get("hash", ""),
+        "hash_alg": event.get("hash_alg") or "sha256"
+    }
+    # Numeric copy of ts for since/until range filters and time ordering
+    if (ts_ms := ts_millis(event.get("ts"))) is not None:
+        metadata[TS_FIELD] = ts_ms
+    return metadata
+
+
+def admit_events(events: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate and deduplicate a batch of event envelopes.
+
+    Hashes of admitted events are reserved in the dedup index; release them
+    with release_events() if the events are not stored after all.
+
+    Args:
+        events: Decoded event envelopes (non-dict items are reported as errors)
+
+    Returns:
+        (results, admitted): one result per input event, in order
+        ({"index", "event_id", "status": created|duplicate|error[, "code", "error"]}),
+        and the admitted envelopes, in order.
+    """
+    results: List[Dict[str, Any]] = []
+    admitted: List[Dict[str, Any]] = []
+    seen_ids = set()
+
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            results.append({"index": index, "event_id": None, "status": "error",
+                            "code": 400, "error": "Event must be a JSON object"})
+            continue
+
+        event_id = event.get("event_id", "unknown")
+        event_hash = dedup_key(event)
+
+        # Validate schema version
+        schema_version = event.get("schema_version", "")
+        if schema_version not in ["1.0", ""]:
+            results.append({"index": index, "event_id": event_id, "status": "error",
+                            "code": 400, "error": f"Unsupported schema version: {schema_version}"})
+            continue
+        if error := metadata_error(event):
+            results.append({"index": index, "event_id": event_id, "status": "error", "code": 400, "error": error})
+            continue
+
+        # Check for duplicates using hash (and repeats within this batch);
+        # check_and_add reserves the hash atomically
+        dedup_started = time.perf_counter()
+        is_duplicate = event_id in seen_ids or (event_hash and not dedup_index.check_and_add(event_hash))
+        bridge_metrics.observe("stage_seconds", "dedup", time.perf_counter() - dedup_started)
+        if is_duplicate:
+            results.append({"index": index, "event_id": event_id, "status": "duplicate"})
+            continue
+        seen_ids.add(event_id)
+
+        admitted.append(event)
+        results.append({"index": index, "event_id": event_id, "status": "created"})
+
+    return results, admitted
+
+
+def release_events(events: List[Dict[str, Any]]):
+    """Release the dedup reservations taken by admit_events()."""
+    for event in events:
+        if key := dedup_key(event):
+            dedup_index.discard(key)
+
+
+def write_events(events: List[Dict[str, Any]], idempotent: bool = False):
+    """
+    Partition admitted envelopes into the collections.
+
+    Every partition gets at most one bulk add/upsert per batch, so a batch
+    costs the same number of Chroma transactions as a single event.
+
+    Args:
+        events: Envelopes returned by admit_events()
+        idempotent: Upsert the events partition instead of adding, so a
+            replayed batch can be written twice safely
+
+    Raises:
+        Exception: If the primary events write fails (secondary partitions
+            are best-effort and only logged).
+    """
+    event_ids, event_docs, event_metas, artifact_sizes = [], [], [], []
+    emb_ids, emb_docs, emb_metas = [], [], []
+    artifact_rows: Dict[str, tuple] = {}
+    state_rows: Dict[str, tuple] = {}
+
+    for event in events:
+        event_id = event.get("event_id", "unknown")
+        event_type = event.get("event_type", "unknown")
+        run_id = event.get("run_id", "unknown")
+
+        metadata = build_event_metadata(event)
+
+        # 1. Always add to primary events collection
+        event_ids.append(event_id)
+        event_docs.append(json_dumps(event))
+        event_metas.append(metadata)
+        artifact_sizes.append(artifact_bytes(event))
+
+        # 2. Add to embeddings collection if semantic-searchable type
+        if event_type in EMBEDDING_EVENT_TYPES and event.get("indexable_text"):
+            emb_ids.append(f"{event_id}_emb")
+            emb_docs.append(event.get("indexable_text", ""))
+            emb_metas.append(metadata)
+
+        # 3. Add to artifacts collection if artifact event
+        if event_type == "artifact" and (artifact_refs := event.get("artifact_refs")):
+            for idx, artifact in enumerate(artifact_refs):
+                artifact_id = artifact.get("hash", f"{event_id}_artifact_{idx}")
+                artifact_rows[artifact_id] = (json_dumps(artifact), {
+                    "hash": artifact.get("hash", ""),
+                    "path": artifact.get("path", ""),
+                    "type": artifact.get("type", ""),
+                    "size_bytes": artifact.get("size_bytes", 0),
+                    "run_id": run_id,
+                    "event_id": event_id
+                })
+
+        # 4. Upsert to agent_state if progress/heartbeat event (last one wins)
+        if event_type in AGENT_STATE_EVENT_TYPES and event.get("worker_id"):
+            worker_id = event.get("worker_id")
+            state_rows[f"{run_id}_{worker_id}"] = (json_dumps({
+                "run_id": run_id,
+                "worker_id": worker_id,
+                "status": event.get("msg", ""),
+                "last_heartbeat": event.get("ts"),
+                "task_id": event.get("task_id", "")
+            }), {
+                "run_id": run_id,
+                "worker_id": worker_id,
+                "task_id": event.get("task_id", ""),
+                "last_heartbeat": event.get("ts", "")
+            })
+
+    if not event_ids:
+        return
+
+    # Events already stored (a replayed write-behind batch, or a redelivery
+    # after the dedup window) must not be counted again by /stats. The
+    # events index tells which ids it inserted for the first time; without
+    # it only a replay is checked against Chroma, since on the normal path
+    # the dedup index has already dropped redeliveries
+    stored = set()
+    if idempotent and not event_index:
+        stored = set(collections["events"].get(ids=event_ids, include=[]).get("ids") or [])
+    write = collections["events"].upsert if idempotent else collections["events"].add
+    # Index rows commit together with the Chroma write (rolled back if it fails)
+    with (event_index.write(event_ids, event_metas, replace=idempotent) if event_index
+          else nullcontext()) as inserted, bridge_metrics.timer("stage_seconds", "events_add"):
+        write(
+            documents=event_docs,
+            metadatas=event_metas,
+            ids=event_ids,
+            embeddings=placeholder_embeddings(len(event_ids))
+        )
+    run_stats.observe((meta, size) for event_id, meta, size in zip(event_ids, event_metas, artifact_sizes)
+                      if (event_id in inserted if inserted is not None else event_id not in stored))
+
+    if emb_ids:
+        try:
+            write = collections["embeddings"].upsert if idempotent else collections["embeddings"].add
+            with bridge_metrics.timer("stage_seconds", "embeddings_add"):
+                write(
+                    documents=emb_docs,
+                    metadatas=emb_metas,
+                    ids=emb_ids
+                )
+        except Exception as e:
+            print(f"Embedding add failed: {e}")
+
+    if artifact_rows:
+        try:
+            with bridge_metrics.timer("stage_seconds", "artifacts_upsert"):
+                collections["artifacts"].upsert(
+                    documents=[doc for doc, _ in artifact_rows.values()],
+                    metadatas=[meta for _, meta in artifact_rows.values()],
+                    ids=list(artifact_rows.keys()),
+                    embeddings=placeholder_embeddings(len(artifact_rows))
+                )
+        except Exception as e:
+            print(f"Artifact add failed: {e}")
+
+    if state_rows:
+        try:
+            with bridge_metrics.timer("stage_seconds", "agent_state_upsert"):
+                collections["agent_state"].upsert(
+                    documents=[doc for doc, _ in state_rows.values()],
+                    metadatas=[meta for _, meta in state_rows.values()],
+                    ids=list(state_rows.keys()),
+                    embeddings=placeholder_embeddings(len(state_rows))
+                )
+        except Exception as e:
+            print(f"Agent state upsert failed: {e}")
+
+
+def ingest_events(events: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Validate, deduplicate and synchronously store a batch of envelopes.
+
+    Returns:
+        One result per input event, in order (see admit_events()).
+    """
+    results, admitted = admit_events(events)
+    if not admitted:
+        return results
+
+    created = [result for result in results if result["status"] == "created"]
+    write_split(list(zip(created, admitted)))
+    return results
+
+
+def write_split(pending: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+    """
+    Store (result, envelope) pairs with write_events(), halving the batch
+    on failure so only events that fail on their own are reported as
+    errors (500, hash released for a retry).
+    """
+    try:
+        write_events([event for _, event in pending])
+        return
+    except Exception as e:
+        if len(pending) == 1:
+            result, event = pending[0]
+            print(f"Ingest error ({result['event_id']}): {e}")
+            release_events([event])
+            result.update({"status": "error", "code": 500, "error": str(e)})
+            return
+    middle = len(pending) // 2
+    write_split(pending[:middle])
+    write_split(pending[middle:])
+
+
+def enqueue_events(events: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Validate and deduplicate envelopes, then hand them to the write-behind
+    queue; admitted events are reported as "accepted".
+
+    Raises:
+        QueueFull: If the queue cannot take the batch (nothing is admitted).
+    """
+    results, admitted = admit_events(events)
+    try:
+        with bridge_metrics.timer("stage_seconds", "wal_append"):
+            write_behind.submit(admitted)
+    except QueueFull:
+        release_events(admitted)
+        raise
+    for result in results:
+        if result["status"] == "created":
+            result["status"] = "accepted"
+    return results
+
+
+def parse_event_batch(body: bytes) -> List[Any]:
+    """
+    Decode a batch body: a JSON array of envelopes or NDJSON (one per line).
+
+    Undecodable NDJSON lines are returned as None so they are reported as
+    per-event errors instead of failing the whole batch.
+    """
+    text = body.decode("utf-8").strip()
+    if text.startswith("["):
+        events = json_loads(text)
+        if not isinstance(events, list):
+            raise ValueError("Batch body must be a JSON array or NDJSON")
+        return events
+
+    events = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            events.append(json_loads(line))
+        except json.JSONDecodeError:
+            events.append(None)
+    return events
+
+
+class Response:
+    """
+    Transport-agnostic HTTP response produced by the request handlers.
+
+    A streamed response sets `chunks` (an iterator of bytes, consumed once
+    by the serving engine) instead of `body`.
+    """
+
+    def __init__(self, status: int, body: bytes = b"", headers: Optional[List[tuple]] = None,
+                 chunks: Optional[Iterator[bytes]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or []
+        self.chunks = chunks
+
+
+def json_response(status: int, data: Dict[str, Any]) -> Response:
+    """Build JSON response."""
+    return Response(status, json_dumps_bytes(data), [
+        ('Content-type', 'application/json'),
+        ('Access-Control-Allow-Origin', '*')  # CORS
+    ])
+
+
+def busy_response(detail: str) -> Response:
+    """503 telling clients to back off and retry."""
+    response = json_response(503, {"error": "Server busy", "detail": detail})
+    response.headers.append(('Retry-After', '1'))
+    return response
+
+
+def dispatch(method: str, target: str, headers, read_body, start_time: Optional[float] = None) -> Response:
+    """
+    Authenticate and route one request; shared by every serving engine.
+
+    Args:
+        method: HTTP method
+        target: Request target (path + query string)
+        headers: Case-insensitive header mapping (lower-case keys work for both engines)
+        read_body: Callable returning the request body given its Content-Length
+        start_time: Request arrival time (defaults to now)
+
+    Returns:
+        Response to send
+    """
+    start_time = start_time or time.time()
     
-    def _authenticate(self) -> bool:
-        """Verify API key if configured."""
-        if not API_KEY:
-            return True  # No auth required if not configured
-        
-        auth_header = self.headers.get('X-API-Key', '')
-        return auth_header == API_KEY
-    
-    def _send_json(self, status: int, data: Dict[str, Any]):
-        """Send JSON response."""
-        self.send_response(status)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')  # CORS
-        self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+    if method == "OPTIONS":
+        # CORS preflight
+        return Response(200, b"", [
+            ('Access-Control-Allow-Origin', '*'),
+            ('Access-Control-Allow-Methods', 'GET, POST, PUT, OPTIONS'),
+            ('Access-Control-Allow-Headers', 'Content-Type, Content-Encoding, X-API-Key')
+        ])
     
-    def _record_metric(self, metric_name: str, value: float = 1.0):
-        """Thread-safe metric recording."""
-        with metrics_lock:
-            metrics[metric_name] += value
+    record_metric("total_requests")
+    parsed = urlparse(target)
+    path = parsed.path
+    endpoint = "blobs" if path.startswith(BLOB_PATH_PREFIX) else ENDPOINT_LABELS.get(path, "other")
     
-    def do_OPTIONS(self):
-        """Handle CORS preflight."""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-API-Key')
-        self.end_headers()
+    bridge_metrics.inc("in_flight", 1, endpoint)
+    try:
+        response = route_request(method, parsed, headers, read_body, start_time)
+        if response.chunks is not None:
+            response.chunks, response.headers = compress_stream(
+                response.chunks, response.headers, headers.get('accept-encoding'))
+        else:
+            response.body, response.headers = compress_response(
+                response.body, response.headers, headers.get('accept-encoding'))
+        return response
+    finally:
+        bridge_metrics.inc("in_flight", -1, endpoint)
+        bridge_metrics.observe("request_seconds", endpoint, time.time() - start_time)
+
+
+def route_request(method: str, parsed, headers, read_body, start_time: float) -> Response:
+    """Authenticate and route a parsed request (see dispatch())."""
+    path = parsed.path
     
-    def do_GET(self):
-        """Route GET requests."""
-        self._record_metric("total_requests")
-        
-        parsed = urlparse(self.path)
-        path = parsed.path
-        
+    if method == "GET":
         if path == "/health":
-            self._handle_health()
+            return handle_health()
         elif path == "/metrics":
-            self._handle_metrics()
+            return handle_metrics()
         elif path == "/query":
-            self._handle_query(parsed.query)
-        else:
-            self._send_json(404, {"error": "Not found"})
+            return handle_query(parsed.query, headers.get('accept'))
+        elif path == "/stats":
+            return handle_stats(parsed.query)
+        elif path == "/aggregate":
+            return handle_aggregate(parsed.query)
+        elif path.startswith(BLOB_PATH_PREFIX):
+            return handle_blob_get(path[len(BLOB_PATH_PREFIX):])
+        return json_response(404, {"error": "Not found"})
     
-    def do_POST(self):
-        """Route POST requests."""
-        start_time = time.time()
-        self._record_metric("total_requests")
-        
-        # Authenticate
-        if not self._authenticate():
-            self._send_json(401, {"error": "Unauthorized"})
-            self._record_metric("error_count")
-            return
-        
-        # Size limit
-        content_length = int(self.headers.get('Content-Length', 0))
-        if content_length > MAX_PAYLOAD_SIZE:
-            self._send_json(413, {"error": "Payload too large"})
-            self._record_metric("error_count")
-            return
-        
-        # Route
-        if self.path == "/ingest" or self.path == "/events":
-            self._handle_ingest(content_length, start_time)
-        else:
-            self._send_json(404, {"error": "Not found"})
+    blob_put = method == "PUT" and path.startswith(BLOB_PATH_PREFIX)
+    if method != "POST" and not blob_put:
+        return json_response(405, {"error": "Method not allowed"})
     
-    def _handle_health(self):
-        """Health check endpoint."""
-        try:
-            # Simple DB connectivity test
-            collections["events"].count()
-            self._send_json(200, {
-                "status": "healthy",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "collections": {name: coll.count() for name, coll in collections.items()}
-            })
-        except Exception as e:
-            self._send_json(503, {"status": "unhealthy", "error": str(e)})
-    
-    def _handle_metrics(self):
-        """Prometheus-compatible metrics endpoint."""
-        with metrics_lock:
-            avg_latency = (metrics["latency_sum"] / metrics["latency_count"]) if metrics["latency_count"] > 0 else 0
-            
-            metrics_text = f"""# HELP chroma_bridge_requests_total Total HTTP requests
+    # Authenticate
+    if API_KEY and headers.get('x-api-key', '') != API_KEY:
+        record_metric("error_count")
+        return json_response(401, {"error": "Unauthorized"})
+    
+    # Size limit
+    content_length = int(headers.get('content-length', 0) or 0)
+    if content_length > MAX_PAYLOAD_SIZE:
+        record_metric("error_count")
+        return json_response(413, {"error": "Payload too large"})
+    
+    # Decode (compressed and binary bodies are opt-in for clients)
+    content_type = headers.get('content-type')
+    try:
+        body = decompress(read_body(content_length), headers.get('content-encoding'), MAX_PAYLOAD_SIZE)
+        if not blob_put:
+            check_media_type(content_type)
+    except UnsupportedMediaType as e:
+        record_metric("error_count")
+        response = json_response(415, {"error": str(e), "content_types": media_types()})
+        response.headers.append(('Accept-Encoding', ", ".join(content_encodings())))
+        return response
+    except DecodedTooLarge as e:
+        record_metric("error_count")
+        return json_response(413, {"error": str(e)})
+    except BodyDecodeError as e:
+        record_metric("error_count")
+        return json_response(400, {"error": "Invalid body", "detail": str(e)})
+    
+    # Route
+    if blob_put:
+        return handle_blob_put(path[len(BLOB_PATH_PREFIX):], body)
+    if path == "/ingest" or path == "/events":
+        return handle_ingest(body, start_time, content_type)
+    elif path == "/ingest/batch" or path == "/events/batch":
+        return handle_ingest_batch(body, start_time, content_type)
+    return json_response(404, {"error": "Not found"})
+
+
+def handle_blob_get(digest: str) -> Response:
+    """Serve an offloaded payload field by its sha256."""
+    try:
+        data = blob_store.get(digest)
+    except ValueError as e:
+        return json_response(400, {"error": str(e)})
+    if data is None:
+        return json_response(404, {"error": "Blob not found"})
+    return Response(200, data, [
+        ('Content-type', 'application/octet-stream'),
+        ('Cache-Control', 'public, max-age=31536000, immutable'),
+        ('Access-Control-Allow-Origin', '*')
+    ])
+
+
+def handle_blob_put(digest: str, body: bytes) -> Response:
+    """Store an offloaded payload field; idempotent, verified against its sha256."""
+    try:
+        created = blob_store.put(digest, body)
+    except DigestMismatch as e:
+        record_metric("error_count")
+        return json_response(400, {"error": str(e)})
+    except ValueError as e:
+        return json_response(400, {"error": str(e)})
+    except OSError as e:
+        record_metric("error_count")
+        return json_response(500, {"error": f"Blob store error: {e}"})
+    return json_response(201 if created else 200, {
+        "status": "created" if created else "exists",
+        "blob": f"sha256:{digest}"
+    })
+
+
+def handle_health() -> Response:
+    """Health check endpoint."""
+    try:
+        # Simple DB connectivity test
+        collections["events"].count()
+        return json_response(200, {
+            "status": "healthy",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "collections": {name: coll.count() for name, coll in collections.items()},
+            "event_index": "off" if not event_index else "stale" if event_index.stale else "ready",
+            "wire": {"content_encodings": content_encodings(), "content_types": media_types(), "json": JSON_BACKEND}
+        })
+    except Exception as e:
+        return json_response(503, {"status": "unhealthy", "error": str(e)})
+
+
+def handle_metrics() -> Response:
+    """Prometheus-compatible metrics endpoint."""
+    snapshot = bridge_metrics.snapshot()
+    values = {name: bridge_metrics.value(snapshot, name) for name in (
+        "total_requests", "ingest_count", "query_count", "error_count",
+        "duplicate_count", "latency_sum", "latency_count")}
+    avg_latency = (values["latency_sum"] / values["latency_count"]) if values["latency_count"] > 0 else 0
+    
+    metrics_text = f"""# HELP chroma_bridge_requests_total Total HTTP requests
 # TYPE chroma_bridge_requests_total counter
-chroma_bridge_requests_total {metrics["total_requests"]}
+chroma_bridge_requests_total {values["total_requests"]:.0f}
 
 # HELP chroma_bridge_ingests_total Total event ingestions
 # TYPE chroma_bridge_ingests_total counter
-chroma_bridge_ingests_total {metrics["ingest_count"]}
+chroma_bridge_ingests_total {values["ingest_count"]:.0f}
 
 # HELP chroma_bridge_queries_total Total queries
 # TYPE chroma_bridge_queries_total counter
-chroma_bridge_queries_total {metrics["query_count"]}
+chroma_bridge_queries_total {values["query_count"]:.0f}
 
 # HELP chroma_bridge_errors_total Total errors
 # TYPE chroma_bridge_errors_total counter
-chroma_bridge_errors_total {metrics["error_count"]}
+chroma_bridge_errors_total {values["error_count"]:.0f}
 
 # HELP chroma_bridge_duplicates_total Duplicate events rejected
 # TYPE chroma_bridge_duplicates_total counter
-chroma_bridge_duplicates_total {metrics["duplicate_count"]}
+chroma_bridge_duplicates_total {values["duplicate_count"]:.0f}
 
 # HELP chroma_bridge_latency_seconds_avg Average latency
 # TYPE chroma_bridge_latency_seconds_avg gauge
 chroma_bridge_latency_seconds_avg {avg_latency:.6f}
+
+""" + bridge_metrics.render_histogram(
+        snapshot, "request_seconds", "chroma_bridge_request_duration_seconds",
+        "Request latency by endpoint (arrival to response)", "endpoint"
+    ) + "\n" + bridge_metrics.render_histogram(
+        snapshot, "stage_seconds", "chroma_bridge_ingest_stage_duration_seconds",
+        "Ingest hot-path stage latency (parse, dedup, per-partition writes)", "stage"
+    ) + "\n" + bridge_metrics.render_values(
+        snapshot, "in_flight", "chroma_bridge_requests_in_flight",
+        "Requests currently being handled", "gauge", "endpoint"
+    )
+    
+    if async_server:
+        metrics_text += f"""
+# HELP chroma_bridge_executor_queue_depth Requests queued or running on the asyncio worker pool
+# TYPE chroma_bridge_executor_queue_depth gauge
+chroma_bridge_executor_queue_depth {async_server.pending}
+
+# HELP chroma_bridge_executor_rejected_total Requests answered 503 because the pool queue was full
+# TYPE chroma_bridge_executor_rejected_total counter
+chroma_bridge_executor_rejected_total {async_server.rejected}
 """
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'text/plain')
-        self.end_headers()
-        self.wfile.write(metrics_text.encode('utf-8'))
     
-    def _handle_ingest(self, content_length: int, start_time: float):
-        """Ingest event with partitioning logic."""
-        try:
-            post_data = self.rfile.read(content_length)
-            event = json.loads(post_data)
-            
-            # Validate schema version
-            schema_version = event.get("schema_version", "")
-            if schema_version not in ["1.0", ""]:
-                self._send_json(400, {"error": f"Unsupported schema version: {schema_version}"})
-                return
-            
-            # Extract core fields
-            event_id = event.get("event_id", "unknown")
-            event_type = event.get("event_type", "unknown")
-            run_id = event.get("run_id", "unknown")
-            session_id = event.get("session_id", "unknown")
-            event_hash = event.get("hash", "")
-            
-            # Check for duplicates using hash
-            if event_hash and self._is_duplicate(event_hash):
-                self._send_json(202, {"status": "duplicate", "event_id": event_id})
-                self._record_metric("duplicate_count")
-                return
-            
-            # Build Chroma metadata (primitives only)
-            metadata = {
-                "event_id": event_id,
-                "ts": event.get("ts", ""),
-                "event_type": event_type,
-                "level": event.get("level", "info"),
-                "run_id": run_id,
-                "session_id": session_id,
-                "worker_id": event.get("worker_id", ""),
-                "task_id": event.get("task_id", ""),
-                "tool_name": event.get("tool_name", ""),
-                "hash": event_hash
-            }
-            
-            # 1. Always add to primary events collection
-            collections["events"].add(
-                documents=[json.dumps(event)],
-                metadatas=[metadata],
-                ids=[event_id]
-            )
-            
-            # 2. Add to embeddings collection if semantic-searchable type
-            if event_type in ["decision", "error", "artifact", "worker_spawn"] and event.get("indexable_text"):
-                try:
-                    collections["embeddings"].add(
-                        documents=[event.get("indexable_text", "")],
-                        metadatas=[metadata],
-                        ids=[f"{event_id}_emb"]
-                    )
-                except Exception as e:
-                    print(f"Embedding add failed: {e}")
-            
-            # 3. Add to artifacts collection if artifact event
-            if event_type == "artifact" and (artifact_refs := event.get("artifact_refs")):
-                for idx, artifact in enumerate(artifact_refs):
-                    artifact_id = artifact.get("hash", f"{event_id}_artifact_{idx}")
-                    try:
-                        collections["artifacts"].upsert(
-                            documents=[json.dumps(artifact)],
-                            metadatas={
-                                "hash": artifact.get("hash", ""),
-                                "path": artifact.get("path", ""),
-                                "type": artifact.get("type", ""),
-                                "size_bytes": artifact.get("size_bytes", 0),
-                                "run_id": run_id,
-                                "event_id": event_id
-                            },
-                            ids=[artifact_id]
-                        )
-                    except Exception as e:
-                        print(f"Artifact add failed: {e}")
-            
-            # 4. Upsert to agent_state if progress/heartbeat event
-            if event_type in ["worker_heartbeat", "progress", "worker_spawn"] and event.get("worker_id"):
-                worker_id = event.get("worker_id")
-                state_id = f"{run_id}_{worker_id}"
-                try:
-                    collections["agent_state"].upsert(
-                        documents=[json.dumps({
-                            "run_id": run_id,
-                            "worker_id": worker_id,
-                            "status": event.get("msg", ""),
-                            "last_heartbeat": event.get("ts"),
-                            "task_id": event.get("task_id", "")
-                        })],
-                        metadatas={
-                            "run_id": run_id,
-                            "worker_id": worker_id,
-                            "task_id": event.get("task_id", ""),
-                            "last_heartbeat": event.get("ts", "")
-                        },
-                        ids=[state_id]
-                    )
-                except Exception as e:
-                    print(f"Agent state upsert failed: {e}")
-            
-            # Record metrics
-            latency = time.time() - start_time
-            self._record_metric("ingest_count")
-            self._record_metric("latency_sum", latency)
-            self._record_metric("latency_count")
-            
-            self._send_json(201, {
-                "status": "success",
+    if write_behind:
+        metrics_text += f"""
+# HELP chroma_bridge_write_behind_queue_depth Events accepted but not yet committed to Chroma
+# TYPE chroma_bridge_write_behind_queue_depth gauge
+chroma_bridge_write_behind_queue_depth {write_behind.depth()}
+
+# HELP chroma_bridge_write_behind_committed_total Events committed by the write-behind writer
+# TYPE chroma_bridge_write_behind_committed_total counter
+chroma_bridge_write_behind_committed_total {write_behind.committed}
+
+# HELP chroma_bridge_write_behind_commit_failures_total Failed (retried) group commits
+# TYPE chroma_bridge_write_behind_commit_failures_total counter
+chroma_bridge_write_behind_commit_failures_total {write_behind.commit_failures}
+
+# HELP chroma_bridge_write_behind_dead_lettered_total Events that failed to commit on their own, moved to the dead-letter file
+# TYPE chroma_bridge_write_behind_dead_lettered_total counter
+chroma_bridge_write_behind_dead_lettered_total {write_behind.dead_lettered}
+
+# HELP chroma_bridge_write_behind_commit_seconds Group commit latency
+# TYPE chroma_bridge_write_behind_commit_seconds summary
+chroma_bridge_write_behind_commit_seconds_sum {write_behind.commit_seconds_sum:.6f}
+chroma_bridge_write_behind_commit_seconds_count {write_behind.commit_count}
+"""
+    
+    return Response(200, metrics_text.encode('utf-8'), [('Content-type', 'text/plain')])
+
+
+def handle_ingest(post_data: bytes, start_time: float, content_type: Optional[str] = None) -> Response:
+    """Ingest event with partitioning logic."""
+    try:
+        with bridge_metrics.timer("stage_seconds", "parse"):
+            event = loads_event(post_data, content_type) if is_binary(content_type) else json_loads(post_data)
+        
+        if write_behind:
+            try:
+                result = enqueue_events([event])[0]
+            except QueueFull as e:
+                record_metric("error_count")
+                return busy_response(str(e))
+        else:
+            result = ingest_events([event])[0]
+        event_id = result["event_id"]
+        
+        if result["status"] == "duplicate":
+            record_metric("duplicate_count")
+            return json_response(202, {"status": "duplicate", "event_id": event_id})
+        
+        if result["status"] == "error":
+            if result["code"] == 400:
+                return json_response(400, {"error": result["error"]})
+            record_metric("error_count")
+            return json_response(500, {"error": "Internal error", "detail": result["error"]})
+        
+        # Record metrics
+        latency = time.time() - start_time
+        record_metric("ingest_count")
+        record_metric("latency_sum", latency)
+        record_metric("latency_count")
+        
+        if result["status"] == "accepted":
+            return json_response(202, {
+                "status": "accepted",
                 "event_id": event_id,
-                "collections_updated": ["events"],
                 "latency_ms": round(latency * 1000, 2)
             })
-            
-        except json.JSONDecodeError as e:
-            self._send_json(400, {"error": "Invalid JSON", "detail": str(e)})
-            self._record_metric("error_count")
-        except Exception as e:
-            print(f"Ingest error: {e}")
-            self._send_json(500, {"error": "Internal error", "detail": str(e)})
-            self._record_metric("error_count")
+        
+        return json_response(201, {
+            "status": "success",
+            "event_id": event_id,
+            "collections_updated": ["events"],
+            "latency_ms": round(latency * 1000, 2)
+        })
+        
+    except json.JSONDecodeError as e:
+        record_metric("error_count")
+        return json_response(400, {"error": "Invalid JSON", "detail": str(e)})
+    except BodyDecodeError as e:
+        record_metric("error_count")
+        return json_response(400, {"error": "Invalid body", "detail": str(e)})
+    except Exception as e:
+        print(f"Ingest error: {e}")
+        record_metric("error_count")
+        return json_response(500, {"error": "Internal error", "detail": str(e)})
+
+
+def handle_ingest_batch(post_data: bytes, start_time: float, content_type: Optional[str] = None) -> Response:
+    """Ingest a JSON array / NDJSON (or binary array / stream) batch with one bulk write per partition."""
+    try:
+        with bridge_metrics.timer("stage_seconds", "parse"):
+            if is_binary(content_type):
+                events = loads_batch(post_data, content_type)
+            else:
+                events = parse_event_batch(post_data)
+    except (ValueError, UnicodeDecodeError) as e:
+        record_metric("error_count")
+        return json_response(400, {"error": "Invalid batch", "detail": str(e)})
     
-    def _is_duplicate(self, event_hash: str) -> bool:
-        """Check if event hash exists in recent events (5-minute window)."""
-        try:
-            # Query events collection for matching hash
-            results = collections["events"].get(
-                where={"hash": event_hash},
-                limit=1
-            )
-            return len(results.get("ids", [])) > 0
-        except Exception:
-            return False
+    if len(events) > MAX_BATCH_EVENTS:
+        record_metric("error_count")
+        return json_response(413, {"error": f"Batch too large (max {MAX_BATCH_EVENTS} events)"})
+    
+    try:
+        results = enqueue_events(events) if write_behind else ingest_events(events)
+    except QueueFull as e:
+        record_metric("error_count")
+        return busy_response(str(e))
+    except Exception as e:
+        print(f"Batch ingest error: {e}")
+        record_metric("error_count")
+        return json_response(500, {"error": "Internal error", "detail": str(e)})
+    
+    for pos, event in enumerate(events):
+        if event is None:
+            results[pos]["error"] = "Invalid JSON"
+    
+    summary = {"created": 0, "accepted": 0, "duplicate": 0, "error": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    
+    latency = time.time() - start_time
+    record_metric("ingest_count", summary["created"] + summary["accepted"])
+    record_metric("duplicate_count", summary["duplicate"])
+    record_metric("error_count", summary["error"])
+    record_metric("latency_sum", latency)
+    record_metric("latency_count")
+    
+    return json_response(200, {
+        "status": "success" if not summary["error"] else "partial",
+        "count": len(results),
+        "created": summary["created"],
+        "accepted": summary["accepted"],
+        "duplicates": summary["duplicate"],
+        "errors": summary["error"],
+        "results": results,
+        "latency_ms": round(latency * 1000, 2)
+    })
+
+
+def parse_filters(params: Dict[str, List[str]]) -> Tuple[Dict[str, str], Optional[int], Optional[int]]:
+    """
+    Equality filters and inclusive since/until epoch-ms bounds on ts_ms.
+
+    Raises:
+        ValueError: Invalid since/until value
+    """
+    where_filter = {key: params[key][0] for key in FILTER_FIELDS if key in params}
+    since_ms = parse_time_bound(params["since"][0]) if "since" in params else None
+    until_ms = parse_time_bound(params["until"][0]) if "until" in params else None
+    return where_filter, since_ms, until_ms
+
+
+def handle_query(query_string: str, accept: Optional[str] = None) -> Response:
+    """
+    Query events with metadata filters and semantic search.
+
+    The response is streamed with stored documents spliced in unparsed
+    (see bridge_query); Accept: application/x-ndjson selects one row per line.
+    """
+    record_metric("query_count")
     
-    def _handle_query(self, query_string: str):
-        """Query events with metadata filters and semantic search."""
-        self._record_metric("query_count")
+    try:
+        # Parse query parameters
+        params = parse_qs(query_string)
+        collection_name = params.get("collection", ["events"])[0]
+        
+        if collection_name not in collections:
+            return json_response(400, {"error": f"Invalid collection: {collection_name}"})
         
+        collection = collections[collection_name]
+        
+        # Metadata filters and time range
+        try:
+            where_filter, since_ms, until_ms = parse_filters(params)
+        except ValueError as e:
+            return json_response(400, {"error": str(e)})
+        ranged = since_ms is not None or until_ms is not None
+        if (ranged or "cursor" in params) and collection_name not in TIME_RANGE_COLLECTIONS:
+            return json_response(400, {"error": f"since/until/cursor are not supported on collection: {collection_name}"})
+        where = compile_where(where_filter, since_ms, until_ms)
+        
+        # Limit and offset
         try:
-            # Parse query parameters
-            params = parse_qs(query_string)
-            collection_name = params.get("collection", ["events"])[0]
-            
-            if collection_name not in collections:
-                self._send_json(400, {"error": f"Invalid collection: {collection_name}"})
-                return
-            
-            collection = collections[collection_name]
-            
-            # Build where filter
-            where_filter = {}
-            for key in ["run_id", "event_type", "level", "worker_id", "task_id", "session_id"]:
-                if key in params:
-                    where_filter[key] = params[key][0]
-            
-            # Limit and offset
             limit = min(int(params.get("limit", ["100"])[0]), 1000)
             offset = int(params.get("offset", ["0"])[0])
-            
-            # Semantic query
-            if "q" in params and collection_name == "embeddings":
-                query_text = params["q"][0]
-                results = collection.query(
-                    query_texts=[query_text],
-                    where=where_filter if where_filter else None,
-                    n_results=limit
-                )
+        except ValueError:
+            return json_response(400, {"error": "limit and offset must be integers"})
+        if limit < 1 or offset < 0:
+            return json_response(400, {"error": "limit must be at least 1 and offset at least 0"})
+        
+        # Semantic query
+        semantic = "q" in params and collection_name == "embeddings"
+        # Keyset pages: ranged queries without an offset, and continuations
+        keyset = not semantic and ("cursor" in params or (ranged and "offset" not in params))
+        next_cursor = None
+        if keyset and "offset" in params:
+            return json_response(400, {"error": "cursor and offset cannot be combined"})
+        if semantic:
+            query_text = params["q"][0]
+            results = collection.query(
+                query_texts=[query_text],
+                where=where,
+                n_results=limit
+            )
+        elif keyset:
+            # Forward from the last (ts_ms, id) returned
+            indexed = collection_name == "events" and event_index and not event_index.stale
+            digest = filters_digest(collection_name, where_filter, until_ms)
+            after, window_ms = None, CURSOR_WINDOW_MS
+            if "cursor" in params:
+                try:
+                    after_ts, after_id, window_ms = decode_cursor(params["cursor"][0], digest)
+                except ValueError as e:
+                    return json_response(400, {"error": str(e)})
+                after = (after_ts, after_id)
+            if indexed:
+                keys = event_index.page(where_filter, limit + 1, since_ms, until_ms, after=after)
+                results = fetch_page(collection, [doc_id for _, doc_id in keys[:limit]])
+                position = (*keys[limit - 1], window_ms) if len(keys) > limit else None
             else:
-                # Metadata-only query
-                results = collection.get(
-                    where=where_filter if where_filter else None,
-                    limit=limit,
-                    offset=offset
-                )
-            
-            # Format response
-            events = []
-            for idx, doc_id in enumerate(results.get("ids", [])):
-                events.append({
-                    "id": doc_id,
-                    "document": json.loads(results["documents"][idx]) if results.get("documents") else {},
-                    "metadata": results["metadatas"][idx] if results.get("metadatas") else {},
-                    "distance": results["distances"][idx][0] if results.get("distances") and results["distances"] else None
-                })
-            
-            self._send_json(200, {
-                "collection": collection_name,
-                "count": len(events),
-                "events": events,
-                "filters": where_filter,
-                "limit": limit,
-                "offset": offset
-            })
-            
-        except Exception as e:
-            print(f"Query error: {e}")
-            self._send_json(500, {"error": "Query failed", "detail": str(e)})
-            self._record_metric("error_count")
+                results, position = keyset_page(collection, where_filter, limit, since_ms, until_ms,
+                                                after=after, window_ms=window_ms)
+            if position:
+                next_cursor = encode_cursor(*position, digest)
+        elif ranged and collection_name == "events" and event_index and not event_index.stale:
+            # Time-ordered page of the range, from the ordered index
+            keys = event_index.page(where_filter, limit, since_ms, until_ms, offset=offset)
+            results = fetch_page(collection, [doc_id for _, doc_id in keys])
+        elif ranged:
+            # Time-ordered page of the range
+            results = time_ordered_page(collection, where_filter, limit, offset, since_ms, until_ms)
+        else:
+            # Metadata-only query
+            results = collection.get(
+                where=where,
+                limit=limit,
+                offset=offset
+            )
+        if since_ms is not None:
+            where_filter["since"] = since_ms
+        if until_ms is not None:
+            where_filter["until"] = until_ms
+        
+        # Stream the response; JSON documents are spliced in as stored
+        rows = result_rows(results, nested=semantic)
+        raw_documents = collection_name in JSON_DOCUMENT_COLLECTIONS
+        headers = [('Access-Control-Allow-Origin', '*')]
+        if next_cursor:
+            headers.append(('X-Next-Cursor', next_cursor))
+        if negotiate_media_type(accept, QUERY_MEDIA_TYPES) == NDJSON_TYPE:
+            return Response(200, headers=[('Content-type', NDJSON_TYPE), ('X-Result-Count', str(len(rows)))] + headers,
+                            chunks=stream_ndjson(rows, raw_documents))
+        return Response(200, headers=[('Content-type', JSON_TYPE)] + headers, chunks=stream_json(
+            {"collection": collection_name, "count": len(rows)}, "events", rows,
+            {"filters": where_filter, "limit": limit, "offset": offset, "next_cursor": next_cursor}, raw_documents))
+        
+    except Exception as e:
+        print(f"Query error: {e}")
+        record_metric("error_count")
+        return json_response(500, {"error": "Query failed", "detail": str(e)})
+
+
+def handle_stats(query_string: str) -> Response:
+    """Aggregates for one run_id or session_id, kept up to date on ingest (see bridge_stats)."""
+    params = parse_qs(query_string)
+    scopes = [scope for scope in ("run_id", "session_id") if scope in params]
+    if len(scopes) != 1:
+        return json_response(400, {"error": "Pass exactly one of run_id or session_id"})
+    scope = scopes[0]
+    key = params[scope][0]
+    aggregate = run_stats.get(scope, key)
+    if aggregate is None:
+        return json_response(404, {"error": f"No events for {scope}: {key}"})
+    return json_response(200, {scope: key, **aggregate})
+
+
+def handle_aggregate(query_string: str) -> Response:
+    """
+    Grouped count and min/max ts over metadata, with /query's filters.
+
+    Events are counted in the ordered index (GROUP BY over its columns);
+    otherwise metadata pages are folded one at a time. Documents are never read.
+    """
+    record_metric("query_count")
+    
+    try:
+        params = parse_qs(query_string)
+        collection_name = params.get("collection", ["events"])[0]
+        if collection_name not in TIME_RANGE_COLLECTIONS:
+            return json_response(400, {"error": f"Aggregation is not supported on collection: {collection_name}"})
+        collection = collections[collection_name]
+        
+        group_by = [field for value in params.get("group_by", []) for field in value.split(",") if field]
+        if unknown := [field for field in group_by if field not in FILTER_FIELDS]:
+            return json_response(400, {"error": f"Cannot group by: {', '.join(unknown)}",
+                                       "group_by": list(FILTER_FIELDS)})
+        if len(set(group_by)) != len(group_by):
+            return json_response(400, {"error": "Duplicate group_by field"})
+        try:
+            where_filter, since_ms, until_ms = parse_filters(params)
+        except ValueError as e:
+            return json_response(400, {"error": str(e)})
+        try:
+            limit = min(int(params.get("limit", ["1000"])[0]), AGGREGATE_MAX_GROUPS)
+        except ValueError:
+            return json_response(400, {"error": "limit must be an integer"})
+        if limit < 1:
+            return json_response(400, {"error": "limit must be at least 1"})
+        
+        if collection_name == "events" and event_index and not event_index.stale:
+            source = "index"
+            rows = event_index.aggregate(group_by, where_filter, limit + 1, since_ms, until_ms)
+        else:
+            source = "scan"
+            where = compile_where(where_filter, since_ms, until_ms)
+            def pages():
+                offset = 0
+                while True:
+                    page = collection.get(where=where, limit=AGGREGATE_SCAN_PAGE, offset=offset, include=["metadatas"])
+                    metadatas = page.get("metadatas") or []
+                    if not metadatas:
+                        return
+                    yield metadatas
+                    offset += len(metadatas)
+            rows = aggregate_metadata(pages(), group_by, limit + 1)
+        
+        width = len(group_by)
+        groups = [{
+            "key": dict(zip(group_by, row[:width])),
+            "count": row[width],
+            "min_ts": millis_rfc3339(row[width + 1]),
+            "max_ts": millis_rfc3339(row[width + 2]),
+            "min_ts_ms": row[width + 1],
+            "max_ts_ms": row[width + 2]
+        } for row in rows[:limit]]
+        if since_ms is not None:
+            where_filter["since"] = since_ms
+        if until_ms is not None:
+            where_filter["until"] = until_ms
+        return json_response(200, {
+            "collection": collection_name,
+            "group_by": group_by,
+            "filters": where_filter,
+            "groups": groups,
+            "total": sum(group["count"] for group in groups),
+            "truncated": len(rows) > limit,
+            "source": source
+        })
+        
+    except Exception as e:
+        print(f"Aggregate error: {e}")
+        record_metric("error_count")
+        return json_response(500, {"error": "Aggregate failed", "detail": str(e)})
+
+
+class ChromaBridgeHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP request handler for the threaded engine; see dispatch() for routing."""
+    
+    def _send(self, response: Response):
+        """Write a Response to the client (HTTP/1.0, so a streamed body ends at close)."""
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if response.chunks is None:
+            self.wfile.write(response.body)
+            return
+        for chunk in response.chunks:
+            self.wfile.write(chunk)
+    
+    def _dispatch(self, method: str):
+        start_time = time.time()
+        self._send(dispatch(method, self.path, self.headers, self.rfile.read, start_time))
+    
+    def do_OPTIONS(self):
+        """Handle CORS preflight."""
+        self._dispatch("OPTIONS")
+    
+    def do_GET(self):
+        """Route GET requests."""
+        self._dispatch("GET")
+    
+    def do_POST(self):
+        """Route POST requests."""
+        self._dispatch("POST")
+    
+    def do_PUT(self):
+        """Route PUT requests (blob uploads)."""
+        self._dispatch("PUT")
     
     def log_message(self, format, *args):
         """Suppress default logging; use structured logging instead."""
         if os.getenv("DEBUG_LOGGING") == "true":
-            print(f"[{self.client_address[0]}] {format % args}")
+            # Unix socket peers have no address
+            print(f"[{self.client_address[0] if self.client_address else 'unix'}] {format % args}")
 
 
 class ThreadedHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
@@ -423,6 +1304,31 @@ class ThreadedHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
     allow_reuse_address = True
 
 
+class ThreadedUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Multi-threaded Unix socket server for co-located hooks."""
+
+
+def prepare_unix_socket(path: str):
+    """
+    Clear the way for binding `path`: create its directory and remove a
+    socket left behind by a previous run. Refuses if a server still answers.
+    """
+    import socket
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)  # Stale
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"{path} is already served by another process")
+
+
 if __name__ == "__main__":
     print(f"Starting Chroma Bridge Server v2.0")
     print(f"Mode: {'Chroma Cloud' if USE_CHROMA_CLOUD else 'Local Persistent'}")
@@ -434,18 +1340,88 @@ if __name__ == "__main__":
     print(f"Port: {PORT}")
     print(f"Auth: {'Enabled' if API_KEY else 'Disabled (set ZO_API_KEY to enable)'}")
     print(f"Collections: {list(collections.keys())}")
+    print(f"Storage mode: {STORAGE_MODE}")
     print(f"Max payload: {MAX_PAYLOAD_SIZE // 1024 // 1024}MB")
+    print(f"JSON codec: {JSON_BACKEND}")
+    print(f"Blob store: {BLOB_DIR}")
+    print(f"Dedup window: {DEDUP_WINDOW_SECONDS:.0f}s ({warm_dedup_index()} recent hashes loaded)")
+    print(f"Event index: {sync_event_index()}")
+    print(f"Run stats: {sync_run_stats()}")
+    run_stats.start()
+    if write_behind:
+        replayed = write_behind.start()
+        for event in replayed:
+            if key := dedup_key(event):
+                dedup_index.check_and_add(key)
+        print(f"Write-behind: on (WAL {WRITE_BEHIND_WAL}, {len(replayed)} events replayed)")
     print()
     
-    with ThreadedHTTPServer(("", PORT), ChromaBridgeHandler) as httpd:
+    # Treat SIGTERM like Ctrl-C so service managers get the same graceful drain
+    def _raise_interrupt(signum, frame):
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    
+    if BRIDGE_UNIX_SOCKET:
+        prepare_unix_socket(BRIDGE_UNIX_SOCKET)
+    
+    def print_ready():
         print(f"[OK] Chroma Bridge Server running on http://localhost:{PORT}")
         print(f"  Endpoints:")
         print(f"    POST /ingest - Ingest events")
+        print(f"    POST /ingest/batch - Ingest a JSON array or NDJSON batch")
         print(f"    GET  /query?collection=events&run_id=... - Query events")
+        print(f"    GET  /stats?run_id=... - Per-run or per-session aggregates")
+        print(f"    GET  /aggregate?group_by=tool_name&level=error - Grouped counts over metadata")
         print(f"    GET  /health - Health check")
         print(f"    GET  /metrics - Prometheus metrics")
+        if BRIDGE_UNIX_SOCKET:
+            print(f"  Also listening on unix://{BRIDGE_UNIX_SOCKET}")
         print()
+    
+    if BRIDGE_ENGINE == "asyncio":
+        print(f"Engine: asyncio ({BRIDGE_WORKERS} workers, queue depth {BRIDGE_QUEUE_DEPTH})")
+        async_server = AsyncBridgeServer(
+            dispatch,
+            workers=BRIDGE_WORKERS,
+            queue_depth=BRIDGE_QUEUE_DEPTH,
+            max_body=MAX_PAYLOAD_SIZE,
+            keepalive_timeout=BRIDGE_KEEPALIVE_SECONDS
+        )
         try:
-            httpd.serve_forever()
+            async_server.run("", PORT, on_ready=print_ready,
+                             unix_path=BRIDGE_UNIX_SOCKET or None, unix_mode=BRIDGE_UNIX_SOCKET_MODE)
         except KeyboardInterrupt:
             print("\n\nShutting down gracefully...")
+    elif BRIDGE_ENGINE == "threaded":
+        print(f"Engine: threaded")
+        unix_httpd = None
+        if BRIDGE_UNIX_SOCKET:
+            import threading
+            unix_httpd = ThreadedUnixHTTPServer(BRIDGE_UNIX_SOCKET, ChromaBridgeHandler)
+            os.chmod(BRIDGE_UNIX_SOCKET, BRIDGE_UNIX_SOCKET_MODE)
+            threading.Thread(target=unix_httpd.serve_forever, name="bridge-unix", daemon=True).start()
+        with ThreadedHTTPServer(("", PORT), ChromaBridgeHandler) as httpd:
+            print_ready()
+            try:
+                httpd.serve_forever()
+            except KeyboardInterrupt:
+                print("\n\nShutting down gracefully...")
+        if unix_httpd:
+            unix_httpd.shutdown()
+            unix_httpd.server_close()
+    else:
+        raise ValueError(f"BRIDGE_ENGINE must be 'threaded' or 'asyncio', got {BRIDGE_ENGINE!r}")
+    
+    if BRIDGE_UNIX_SOCKET:
+        try:
+            os.unlink(BRIDGE_UNIX_SOCKET)
+        except OSError:
+            pass
+    
+    if write_behind:
+        print(f"Draining write-behind queue ({write_behind.depth()} events)...")
+        remaining = write_behind.close()
+        if remaining:
+            print(f"  {remaining} events left in the WAL; they are replayed on next start")
+    run_stats.close()
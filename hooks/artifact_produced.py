@@ -5,7 +5,14 @@ Logs file/output artifacts created during agent execution.
 """
 import sys
 import os
-import json
+
+if __name__ == "__main__":
+    # Hand stdin to the resident hook daemon when one is listening; returns
+    # here (before the heavier imports below) only if it is not running.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from hook_daemon import forward_or_continue
+    forward_or_continue("artifact_produced")
+
 import hashlib
 
 try:
@@ -14,6 +21,11 @@ try:
         get_run_id_from_env_or_generate,
         utc_now_iso
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from event_utils import (
@@ -21,11 +33,12 @@ except ImportError:
         get_run_id_from_env_or_generate,
         utc_now_iso
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 
-try:
-    import urllib.request
-except ImportError:
-    urllib = None
 
 from pathlib import Path
 
@@ -42,40 +55,20 @@ def compute_file_hash(filepath: str) -> str:
         return "sha256:unknown"
 
 
-def send_http_event(endpoint: str, event: dict):
-    """POST event to HTTP endpoint."""
-    if not endpoint or not urllib:
-        return
-
-    data = json.dumps(event).encode("utf-8")
-    headers = {"Content-Type": "application/json"}
-    if api_key := os.getenv("ZO_API_KEY"):
-        headers["X-API-Key"] = api_key
-    
-    try:
-        req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-        with urllib.request.urlopen(req, timeout=3.0) as _:
-            pass
-    except Exception as e:
-        print(f"[artifact_produced] HTTP error: {e}", file=sys.stderr)
-
-
 def append_local_log(log_dir: Path, event: dict):
-    """Append event to daily JSONL log."""
+    """Append event to the current local log segment."""
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
-        day = utc_now_iso()[:10].replace('-', '')
-        log_file = log_dir / f"events-{day}.jsonl"
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        EventLog(log_dir, "events").append(event)
     except Exception as e:
         print(f"[artifact_produced] file log error: {e}", file=sys.stderr)
 
 
 def main():
     """Main hook entry point."""
+    timer = HookTimer("artifact_produced", script=__name__ == "__main__")
     try:
-        input_data = json.load(sys.stdin)
+        with timer.phase("stdin"):
+            input_data = json_load(sys.stdin)
     except Exception as e:
         print(f"[artifact_produced] invalid JSON on stdin: {e}", file=sys.stderr)
         sys.exit(1)
@@ -107,33 +100,38 @@ def main():
     }
     
     # Build event
-    event = build_event_envelope(
-        event_type="artifact",
-        session_id=session_id,
-        run_id=run_id,
-        level="info",
-        hook_event_name="PostToolUse",
-        msg=f"Artifact produced: {Path(artifact_path).name}",
-        data={
-            "artifact_metadata": artifact_ref,
-            "producing_tool": input_data.get("tool_name"),
-            "task_id": input_data.get("task_id")
-        },
-        worker_id=input_data.get("worker_id"),
-        task_id=input_data.get("task_id"),
-        artifact_refs=[artifact_ref],
-        cwd=input_data.get("cwd"),
-        redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict")
-    )
+    with timer.phase("envelope"):
+        event = build_event_envelope(
+            event_type="artifact",
+            session_id=session_id,
+            run_id=run_id,
+            level="info",
+            hook_event_name="PostToolUse",
+            msg=f"Artifact produced: {Path(artifact_path).name}",
+            data={
+                "artifact_metadata": artifact_ref,
+                "producing_tool": input_data.get("tool_name"),
+                "task_id": input_data.get("task_id")
+            },
+            worker_id=input_data.get("worker_id"),
+            task_id=input_data.get("task_id"),
+            artifact_refs=[artifact_ref],
+            cwd=input_data.get("cwd"),
+            redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict"),
+            timings=timer.detail
+        )
 
     # Log locally
     log_root = os.getenv("ZO_EVENT_LOG_DIR", os.path.expanduser("~/.zo/claude-events"))
-    append_local_log(Path(log_root), event)
+    with timer.phase("local_log"):
+        append_local_log(Path(log_root), event)
 
-    # Send to bridge
-    if endpoint := os.getenv("ZO_EVENT_ENDPOINT"):
-        send_http_event(endpoint, event)
+    # Send to bridge, or queue it in the outbox
+    with timer.phase("send"):
+        if (endpoint := os.getenv("ZO_EVENT_ENDPOINT")) and not enqueue_event(event):
+            send_event(endpoint, event)
 
+    timer.finish("PostToolUse")
     sys.exit(0)
 
 
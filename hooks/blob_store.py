@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Content-addressed side store for large event payload fields.
+
+build_event_envelope() moves fields over the size budget here (keyed by
+sha256 of their bytes) and leaves a reference in the envelope:
+
+    {"$blob": "sha256:<hex>", "size_bytes": 18234, "encoding": "text"|"json",
+     "preview": "<first 200 characters>"}
+
+Blobs are uploaded to the bridge (PUT /blobs/<hex>) before the event that
+references them, and can be fetched back with GET /blobs/<hex>.
+"""
+import os
+import sys
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_BLOB_DIR = os.path.expanduser("~/.zo/blobs")
+BLOB_REF_KEY = "$blob"
+PREVIEW_CHARS = 200
+
+
+def get_blob_dir() -> Path:
+    """Return blob store directory from environment or default."""
+    return Path(os.path.expanduser(os.getenv("ZO_BLOB_DIR") or DEFAULT_BLOB_DIR))
+
+
+class BlobStore:
+    """Immutable blobs stored as <root>/<hex[:2]>/<hex>."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else get_blob_dir()
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, data: bytes) -> str:
+        """Store data (no-op if already present) and return its sha256 hex digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{digest}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            return self.path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+
+def make_blob_ref(digest: str, size_bytes: int, encoding: str, preview: str) -> Dict[str, Any]:
+    return {
+        BLOB_REF_KEY: f"sha256:{digest}",
+        "size_bytes": size_bytes,
+        "encoding": encoding,
+        "preview": preview[:PREVIEW_CHARS]
+    }
+
+
+def iter_blob_digests(obj: Any) -> Iterator[str]:
+    """Yield the sha256 hex digest of every blob reference in a structure."""
+    if isinstance(obj, dict):
+        ref = obj.get(BLOB_REF_KEY)
+        if isinstance(ref, str) and ref.startswith("sha256:"):
+            yield ref[len("sha256:"):]
+            return
+        for value in obj.values():
+            yield from iter_blob_digests(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            yield from iter_blob_digests(item)
+
+
+def blob_endpoint_for(endpoint: str) -> str:
+    """Map an ingest URL (…/ingest, …/events, …/ingest/batch) to its …/blobs base."""
+    base = endpoint.rstrip("/")
+    for suffix in ("/batch", "/ingest", "/events"):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    return f"{base}/blobs"
+
+
+def upload_event_blobs(endpoint: str, event: Dict[str, Any], store: Optional[BlobStore] = None,
+                       api_key: Optional[str] = None, deadline=None) -> bool:
+    """
+    PUT every blob the event references to the bridge (idempotent).
+
+    Args:
+        deadline: transport.Deadline shared with the event's POST
+            (default: a fresh ZO_SEND_DEADLINE budget)
+
+    Returns:
+        True if all referenced blobs are on the bridge; False if any upload
+        failed or a blob is missing locally (the event is still worth sending).
+    """
+    digests = list(iter_blob_digests(event))
+    if not digests:
+        return True
+
+    from transport import Deadline, TransportError, send_body
+
+    store = store or BlobStore()
+    deadline = deadline or Deadline()
+    base = blob_endpoint_for(endpoint)
+    headers = {}
+    if api_key is None:
+        api_key = os.getenv("ZO_API_KEY")
+    if api_key:
+        headers["X-API-Key"] = api_key
+
+    ok = True
+    for digest in dict.fromkeys(digests):
+        data = store.get(digest)
+        if data is None:
+            print(f"[blob_store] blob {digest[:12]} missing locally", file=sys.stderr)
+            ok = False
+            continue
+        try:
+            send_body("PUT", f"{base}/{digest}", data, "application/octet-stream", headers, deadline)
+        except TransportError as e:
+            print(f"[blob_store] upload of {digest[:12]} failed: {e}", file=sys.stderr)
+            ok = False
+    return ok
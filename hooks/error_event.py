@@ -6,64 +6,56 @@ Captures tool failures and hook errors for debugging.
 import sys
 import os
 import json
+
+if __name__ == "__main__":
+    # Hand stdin to the resident hook daemon when one is listening; returns
+    # here (before the heavier imports below) only if it is not running.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from hook_daemon import forward_or_continue
+    forward_or_continue("error_event")
+
 import traceback
 
 try:
     from event_utils import (
         build_event_envelope,
-        get_run_id_from_env_or_generate,
-        utc_now_iso
+        get_run_id_from_env_or_generate
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from event_utils import (
         build_event_envelope,
-        get_run_id_from_env_or_generate,
-        utc_now_iso
+        get_run_id_from_env_or_generate
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 
-try:
-    import urllib.request
-except ImportError:
-    urllib = None
 
 from pathlib import Path
 
 
-def send_http_event(endpoint: str, event: dict):
-    """POST event to HTTP endpoint."""
-    if not endpoint or not urllib:
-        return
-
-    data = json.dumps(event).encode("utf-8")
-    headers = {"Content-Type": "application/json"}
-    if api_key := os.getenv("ZO_API_KEY"):
-        headers["X-API-Key"] = api_key
-    
-    try:
-        req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-        with urllib.request.urlopen(req, timeout=3.0) as _:
-            pass
-    except Exception as e:
-        print(f"[error_event] HTTP error: {e}", file=sys.stderr)
-
-
 def append_local_log(log_dir: Path, event: dict):
-    """Append event to daily JSONL log."""
+    """Append event to the current local log segment."""
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
-        day = utc_now_iso()[:10].replace('-', '')
-        log_file = log_dir / f"events-{day}.jsonl"
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        EventLog(log_dir, "events").append(event)
     except Exception as e:
         print(f"[error_event] file log error: {e}", file=sys.stderr)
 
 
 def main():
     """Main hook entry point."""
+    timer = HookTimer("error_event", script=__name__ == "__main__")
     try:
-        input_data = json.load(sys.stdin)
+        with timer.phase("stdin"):
+            input_data = json_load(sys.stdin)
     except Exception as e:
         print(f"[error_event] invalid JSON on stdin: {e}", file=sys.stderr)
         sys.exit(1)
@@ -80,39 +72,43 @@ def main():
     error_detail = {
         "type": error_type,
         "message": error_message[:500],  # Truncate
-        "stack_trace": stack_trace[:2000] if stack_trace else None,
+        "stack_trace": stack_trace or None,
         "tool_name": input_data.get("tool_name"),
         "tool_use_id": input_data.get("tool_use_id")
     }
     
     # Build event
-    event = build_event_envelope(
-        event_type="error",
-        session_id=session_id,
-        run_id=run_id,
-        level="error",
-        hook_event_name=input_data.get("hook_event_name", "PostToolUse"),
-        msg=f"Error: {error_message[:200]}",
-        data={
-            "error_context": input_data.get("context", {}),
-            "recovery_attempted": input_data.get("recovery_attempted", False)
-        },
-        tool_name=input_data.get("tool_name"),
-        tool_use_id=input_data.get("tool_use_id"),
-        worker_id=input_data.get("worker_id"),
-        task_id=input_data.get("task_id"),
-        error_detail=error_detail,
-        cwd=input_data.get("cwd"),
-        redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict")
-    )
+    with timer.phase("envelope"):
+        event = build_event_envelope(
+            event_type="error",
+            session_id=session_id,
+            run_id=run_id,
+            level="error",
+            hook_event_name=input_data.get("hook_event_name", "PostToolUse"),
+            msg=f"Error: {error_message[:200]}",
+            data={
+                "error_context": input_data.get("context", {}),
+                "recovery_attempted": input_data.get("recovery_attempted", False)
+            },
+            tool_name=input_data.get("tool_name"),
+            tool_use_id=input_data.get("tool_use_id"),
+            worker_id=input_data.get("worker_id"),
+            task_id=input_data.get("task_id"),
+            error_detail=error_detail,
+            cwd=input_data.get("cwd"),
+            redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict"),
+            timings=timer.detail
+        )
 
     # Log locally
     log_root = os.getenv("ZO_EVENT_LOG_DIR", os.path.expanduser("~/.zo/claude-events"))
-    append_local_log(Path(log_root), event)
+    with timer.phase("local_log"):
+        append_local_log(Path(log_root), event)
 
-    # Send to bridge
-    if endpoint := os.getenv("ZO_EVENT_ENDPOINT"):
-        send_http_event(endpoint, event)
+    # Send to bridge, or queue it in the outbox
+    with timer.phase("send"):
+        if (endpoint := os.getenv("ZO_EVENT_ENDPOINT")) and not enqueue_event(event):
+            send_event(endpoint, event)
 
     # Output context injection
     output = {
@@ -125,6 +121,7 @@ def main():
     }
     print(json.dumps(output))
 
+    timer.finish(input_data.get("hook_event_name", "PostToolUse"))
     sys.exit(0)
 
 
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Segmented local event log shared by the hooks.
+
+Events are appended to day segments in the log directory:
+
+    events-20241017.jsonl      first segment of the day (same name as before)
+    events-20241017.1.jsonl    next one once the first reached ZO_LOG_SEGMENT_BYTES
+    events-20241016.jsonl.gz   closed segment, compressed in the background
+
+Each append is one O_APPEND write of a complete line, so concurrent hook
+processes never interleave records however long they are. Segments are
+closed when the day ends or when they fill up; a detached compressor
+(started by the hook that opens a new segment) gzips them, or uses zstd
+when ZO_LOG_COMPRESSION=zstd and the `zstandard` package is installed.
+Readers open plain and compressed segments alike.
+
+Usage:
+    python hooks/event_log.py list [--dir DIR] [--prefix events]
+    python hooks/event_log.py cat [--dir DIR] [--prefix events] [--day YYYYMMDD]
+    python hooks/event_log.py compress [--dir DIR] [--prefix events] [--grace 60]
+"""
+import io
+import os
+import re
+import sys
+import gzip
+import time
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from event_utils import encode_event
+    from fast_json import loads
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from event_utils import encode_event
+    from fast_json import loads
+
+DEFAULT_LOG_DIR = os.path.expanduser("~/.zo/claude-events")
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+COMPRESS_GRACE_SECONDS = 60.0  # Closed segments untouched this long are compressed
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+SEGMENT_RE = re.compile(
+    r'^(?P<prefix>[A-Za-z0-9_]+)-(?P<day>\d{8})(?:\.(?P<seq>\d+))?\.jsonl(?P<compression>\.gz|\.zst)?$')
+
+
+class Segment(NamedTuple):
+    path: Path
+    prefix: str
+    day: str
+    seq: int
+    compression: Optional[str]  # None, ".gz" or ".zst"
+
+
+def segment_name(prefix: str, day: str, seq: int) -> str:
+    return f"{prefix}-{day}.jsonl" if seq == 0 else f"{prefix}-{day}.{seq}.jsonl"
+
+
+def parse_segment(path: Path) -> Optional[Segment]:
+    """Segment metadata from a file name, or None for other files."""
+    match = SEGMENT_RE.match(path.name)
+    if not match:
+        return None
+    return Segment(path, match["prefix"], match["day"], int(match["seq"] or 0), match["compression"])
+
+
+def list_segments(root: Path, prefix: Optional[str] = None) -> List[Segment]:
+    """All segments in a log directory, oldest first."""
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return []
+    segments = []
+    for entry in entries:
+        segment = parse_segment(Path(entry.path))
+        if segment and (prefix is None or segment.prefix == prefix):
+            segments.append(segment)
+    return sorted(segments, key=lambda s: (s.prefix, s.day, s.seq))
+
+
+def open_segment(path: Path) -> IO[bytes]:
+    """Open a segment for binary reading, decompressing transparently."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} is zstd-compressed; pip install zstandard to read it")
+        # Buffered for readline() and line iteration, which the raw reader lacks
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+def iter_lines(path: Path) -> Iterator[bytes]:
+    """Complete lines of one segment (a torn trailing write is skipped)."""
+    with open_segment(path) as f:
+        for line in f:
+            if line.endswith(b"\n"):
+                yield line
+
+
+def iter_events(root: Path, prefix: Optional[str] = None, day: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Decoded events of every segment, oldest first; undecodable lines are skipped."""
+    for segment in list_segments(root, prefix):
+        if day and segment.day != day:
+            continue
+        for line in iter_lines(segment.path):
+            try:
+                yield loads(line)
+            except ValueError:
+                continue
+
+
+def get_compression() -> Optional[str]:
+    """Compressed suffix for closed segments from ZO_LOG_COMPRESSION (gzip|zstd|none)."""
+    mode = os.getenv("ZO_LOG_COMPRESSION", "gzip").lower()
+    if mode in ("none", "off", ""):
+        return None
+    if mode == "zstd" and zstandard is not None:
+        return ".zst"
+    return ".gz"
+
+
+class EventLog:
+    """
+    Appender for one log directory and file prefix ("events", "mcp").
+
+    Args:
+        root: Log directory
+        prefix: Segment file prefix
+        segment_bytes: Rotate to a new segment once one reaches this size
+            (default ZO_LOG_SEGMENT_BYTES, 64MB)
+    """
+
+    def __init__(self, root: Path, prefix: str = "events", segment_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes or int(os.getenv("ZO_LOG_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES))
+
+    def _active_path(self, day: str) -> Path:
+        """First segment of the day that is not full (or not yet created)."""
+        seq = 0
+        while True:
+            path = self.root / segment_name(self.prefix, day, seq)
+            try:
+                if os.stat(path).st_size < self.segment_bytes:
+                    return path
+            except FileNotFoundError:
+                if not any(os.path.exists(f"{path}{suffix}") for suffix in COMPRESSED_SUFFIXES):
+                    return path
+            seq += 1
+
+    def append(self, event: Dict[str, Any]) -> Path:
+        """
+        Append one event as a single write.
+
+        Returns:
+            Path of the segment written to
+        """
+        line = encode_event(event) + b"\n"
+        path = self._active_path(time.strftime("%Y%m%d", time.gmtime()))
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        try:
+            fd = os.open(path, flags, 0o600)
+        except FileNotFoundError:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, flags, 0o600)
+        try:
+            view = memoryview(line)
+            while view:  # Regular files take the whole write; loop only guards short writes
+                view = view[os.write(fd, view):]
+            opened_segment = os.fstat(fd).st_size == len(line)
+        finally:
+            os.close(fd)
+
+        # A new segment means an older one just closed: compress it off the hot path
+        if opened_segment and get_compression() and self.closed_segments(grace=0):
+            self.compress_in_background()
+        return path
+
+    def closed_segments(self, grace: float = COMPRESS_GRACE_SECONDS) -> List[Segment]:
+        """Uncompressed segments that will not be appended to again."""
+        segments = [s for s in list_segments(self.root, self.prefix) if not s.compression]
+        if not segments:
+            return []
+        today = time.strftime("%Y%m%d", time.gmtime())
+        newest_today = max((s.seq for s in segments if s.day == today), default=None)
+        now = time.time()
+        closed = []
+        for segment in segments:
+            if segment.day == today and segment.seq == newest_today:
+                continue
+            try:
+                if now - os.stat(segment.path).st_mtime < grace:
+                    continue
+            except FileNotFoundError:
+                continue
+            closed.append(segment)
+        return closed
+
+    def compress_closed(self, grace: float = COMPRESS_GRACE_SECONDS, wait: bool = False) -> int:
+        """
+        Compress closed segments in place (segment -> segment.gz / .zst).
+
+        Args:
+            grace: Skip segments modified within this many seconds
+            wait: Keep going until no closed segment is left, sleeping
+                while recently closed ones are inside the grace period
+
+        Returns:
+            Number of segments compressed
+        """
+        suffix = get_compression()
+        if not suffix:
+            return 0
+
+        compressed = 0
+        while True:
+            for segment in self.closed_segments(grace):
+                compressed += self._compress(segment, suffix)
+            if not wait or not self.closed_segments(grace=0):
+                return compressed
+            time.sleep(min(grace, 5.0) or 0.1)
+
+    def _compress(self, segment: Segment, suffix: str) -> int:
+        target = segment.path.with_name(segment.path.name + suffix)
+        tmp = target.with_name(target.name + ".tmp")
+        try:
+            with open(segment.path, "rb") as src, open(tmp, "wb") as dst:
+                if suffix == ".zst":
+                    with zstandard.ZstdCompressor(level=3).stream_writer(dst, closefd=False) as writer:
+                        shutil.copyfileobj(src, writer, 1024 * 1024)
+                else:
+                    with gzip.GzipFile(filename="", mode="wb", fileobj=dst, compresslevel=6, mtime=0) as writer:
+                        shutil.copyfileobj(src, writer, 1024 * 1024)
+                dst.flush()
+                os.fsync(dst.fileno())
+            shutil.copystat(segment.path, tmp)
+            os.replace(tmp, target)
+            segment.path.unlink()
+            return 1
+        except OSError as e:
+            print(f"[event_log] could not compress {segment.path.name}: {e}", file=sys.stderr)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return 0
+
+    def compress_in_background(self):
+        """Start a detached compressor process; never raises."""
+        kwargs: Dict[str, Any] = {"start_new_session": True} if os.name == "posix" else {
+            "creationflags": getattr(subprocess, "DETACHED_PROCESS", 0)}
+        try:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "compress", "--dir", str(self.root),
+                 "--prefix", self.prefix, "--wait"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                close_fds=True, **kwargs
+            )
+        except OSError as e:
+            print(f"[event_log] could not start compressor: {e}", file=sys.stderr)
+
+
+def acquire_compress_lock(root: Path, prefix: str):
+    """
+    Take an exclusive lock so only one compressor works on a log.
+
+    Returns:
+        Open lock file handle (keep it alive), or None if another compressor holds it.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    handle = open(root / f".{prefix}-compress.lock", "a")
+    try:
+        import fcntl
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        pass  # No advisory locks on this platform; run unguarded
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local hook event log segments")
+    parser.add_argument("--dir", default=os.getenv("ZO_EVENT_LOG_DIR", DEFAULT_LOG_DIR), help="Log directory")
+    parser.add_argument("--prefix", default="events", help="Segment prefix (events, mcp)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List segments with sizes")
+    cat = sub.add_parser("cat", help="Print every event line, decompressing as needed")
+    cat.add_argument("--day", help="Only this UTC day (YYYYMMDD)")
+    compress = sub.add_parser("compress", help="Compress closed segments")
+    compress.add_argument("--grace", type=float, default=COMPRESS_GRACE_SECONDS,
+                          help="Skip segments modified within this many seconds")
+    compress.add_argument("--wait", action="store_true", help="Wait out the grace period first")
+    # Allow the global options after the subcommand too
+    for subparser in sub.choices.values():
+        subparser.add_argument("--dir", default=argparse.SUPPRESS)
+        subparser.add_argument("--prefix", default=argparse.SUPPRESS)
+    args = parser.parse_args()
+    root = Path(os.path.expanduser(args.dir))
+
+    if args.command == "list":
+        for segment in list_segments(root, args.prefix):
+            print(f"{segment.path.stat().st_size:12d}  {segment.path.name}")
+    elif args.command == "cat":
+        out = sys.stdout.buffer
+        for segment in list_segments(root, args.prefix):
+            if not args.day or segment.day == args.day:
+                for line in iter_lines(segment.path):
+                    out.write(line)
+    else:
+        lock = acquire_compress_lock(root, args.prefix)
+        if lock is None:
+            if not args.wait:
+                print("[event_log] another compressor is already running", file=sys.stderr)
+            return
+        compressed = EventLog(root, args.prefix).compress_closed(args.grace, wait=args.wait)
+        if not args.wait:
+            print(f"[event_log] compressed {compressed} segment(s)")
+
+
+if __name__ == "__main__":
+    main()
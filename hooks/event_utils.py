@@ -8,8 +8,11 @@ import re
 import uuid
 import hashlib
 import json
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from blob_store import BLOB_REF_KEY, BlobStore, make_blob_ref
 
 
 SCHEMA_VERSION = "1.0"
@@ -23,6 +26,11 @@ EVENT_TYPES = {
 LEVELS = {"debug", "info", "warn", "error"}
 AGENT_ROLES = {"conductor", "worker", "system"}
 
+# Payload budgeting (see budget_payload)
+DEFAULT_PAYLOAD_BUDGET_BYTES = 32768
+DEFAULT_BLOB_THRESHOLD_BYTES = 4096
+DEFAULT_BLOB_MAX_BYTES = 1048576
+
 
 def generate_event_id() -> str:
     """Generate unique event ID (UUID v4)."""
@@ -39,23 +47,102 @@ def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
 
 
-def hash_content(data: Dict[str, Any], fields: Optional[List[str]] = None) -> str:
+HASH_FIELDS = ["session_id", "ts", "event_type", "data"]
+
+# Digest algorithms for the dedup hash, named by the envelope's "hash_alg"
+# field (envelopes without it are sha256). All hash the same canonical form.
+HASH_ALGS = {
+    "sha256": hashlib.sha256,
+    "blake2b-256": lambda data: hashlib.blake2b(data, digest_size=32)
+}
+DEFAULT_HASH_ALG = "sha256"
+
+
+def get_hash_alg() -> str:
+    """Return the digest algorithm from ZO_HASH_ALG, or the default."""
+    alg = os.getenv("ZO_HASH_ALG", DEFAULT_HASH_ALG).lower()
+    return alg if alg in HASH_ALGS else DEFAULT_HASH_ALG
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def hash_content(data: Dict[str, Any], fields: Optional[List[str]] = None, alg: str = "sha256") -> str:
     """
-    Generate SHA256 hash of event content for deduplication.
+    Generate hash of event content for deduplication.
     
     Args:
         data: Event data dictionary
         fields: Optional list of fields to include in hash (default: session_id, ts, event_type, data)
+        alg: Digest algorithm (a HASH_ALGS key)
     
     Returns:
-        Hex-encoded SHA256 hash
+        Hex-encoded digest
     """
     if fields is None:
-        fields = ["session_id", "ts", "event_type", "data"]
+        fields = HASH_FIELDS
     
     hash_input = {k: data.get(k) for k in fields if k in data}
-    canonical = json.dumps(hash_input, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    canonical = _canonical_json(hash_input)
+    return HASH_ALGS[alg](canonical.encode("utf-8")).hexdigest()
+
+
+class EventEnvelope(dict):
+    """
+    Envelope dict that remembers its serialized form.
+
+    The canonical JSON of `data` is produced once by seal_envelope() and
+    reused for the hash, the local log line and the HTTP body (see
+    encode_event()). Treat envelopes as read-only once sealed.
+    """
+    __slots__ = ("_data", "_data_json", "_encoded")
+
+
+def seal_envelope(envelope: Dict[str, Any], alg: Optional[str] = None) -> EventEnvelope:
+    """
+    Add "hash" and "hash_alg" to an envelope.
+
+    Equivalent to hash_content(envelope, alg=alg), but the hash input is
+    assembled around a single canonical serialization of `data` that
+    encode_event() later splices into the event line.
+
+    Returns:
+        The envelope as an EventEnvelope (same keys, plus the hash fields)
+    """
+    alg = alg or get_hash_alg()
+    sealed = envelope if isinstance(envelope, EventEnvelope) else EventEnvelope(envelope)
+    data = sealed.get("data")
+    data_json = _canonical_json(data) if "data" in sealed else None
+
+    # Same bytes json.dumps(sort_keys=True) would give for the hash fields
+    parts = []
+    for key in sorted(HASH_FIELDS):
+        if key in sealed:
+            value_json = data_json if key == "data" else _canonical_json(sealed[key])
+            parts.append(f"{_canonical_json(key)}: {value_json}")
+    canonical = "{" + ", ".join(parts) + "}"
+
+    sealed["hash"] = HASH_ALGS[alg](canonical.encode("utf-8")).hexdigest()
+    sealed["hash_alg"] = alg
+    sealed._data, sealed._data_json, sealed._encoded = data, data_json, None
+    return sealed
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """
+    Serialize an envelope to one UTF-8 JSON line (without the newline).
+
+    Sealed envelopes reuse the canonical `data` JSON from hashing and cache
+    the result, so the log append and the POST share one serialization.
+    """
+    if not isinstance(event, EventEnvelope) or getattr(event, "_data_json", None) is None \
+            or event.get("data") is not event._data:
+        return json.dumps(event, ensure_ascii=False).encode("utf-8")
+    if event._encoded is None:
+        rest = json.dumps({k: v for k, v in event.items() if k != "data"}, ensure_ascii=False)
+        event._encoded = f'{rest[:-1]}, "data": {event._data_json}}}'.encode("utf-8")
+    return event._encoded
 
 
 def sanitize_hostname() -> str:
@@ -72,13 +159,146 @@ def sanitize_hostname() -> str:
         return "host_unknown"
 
 
-def redact_payload(data: Dict[str, Any], mode: str = "strict") -> Dict[str, Any]:
+def _anchored_subn(pattern: re.Pattern, replacement: str, text: str,
+                   anchor: re.Pattern, in_run) -> Tuple[str, int]:
+    """
+    pattern.subn() for patterns whose every match starts inside the run of
+    `in_run` characters directly before an `anchor` hit (e.g. an email's
+    local part before its '@').
+
+    Scanning a large string for a pattern that begins with a character
+    class tries the pattern at every position; here the C-level anchor
+    search skips ahead and the pattern is only tried at the few possible
+    start positions, in order, so the leftmost-first result is the same.
+    """
+    parts = []
+    last = pos = count = 0
+    hit = anchor.search(text, pos)
+    while hit:
+        at = hit.start()
+        start = at
+        while start > pos and in_run(text[start - 1]):
+            start -= 1
+        match = None
+        for candidate in range(start, at):
+            match = pattern.match(text, candidate)
+            if match:
+                break
+        if match:
+            parts.append(text[last:match.start()])
+            parts.append(replacement)
+            last = pos = match.end()
+            count += 1
+            hit = anchor.search(text, pos)
+        else:
+            hit = anchor.search(text, at + 1)
+    if not count:
+        return text, 0
+    parts.append(text[last:])
+    return "".join(parts), count
+
+
+_EMAIL_LOCAL_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-")
+_API_KEY_PREFIXES = tuple(f"{p}{sep}" for p in ("sk", "pk", "ck", "ghp", "gho", "glpat") for sep in "-_")
+_IP_HINT = re.compile(r'\d\.\d')
+_AT_SIGN = re.compile("@")
+_DIGIT_DOT = re.compile(r'\.(?<=\d\.)')  # a '.' right after a digit: where an IP's first dot can be
+
+# Redaction rules, applied in order: (name, pattern, replacement, prefilter,
+# custom subn or None). The prefilter is a cheap necessary condition, so
+# strings failing it skip the regex entirely. Patterns are the original rules rewritten to start
+# with a literal where possible ("\bX" == "X(?<!\wX)" when X starts with a
+# word character), which lets the regex engine jump straight to candidates.
+REDACTION_RULES = [
+    ("email", re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'), '[EMAIL]',
+     lambda text: "@" in text,
+     lambda rx, repl, text: _anchored_subn(rx, repl, text, _AT_SIGN, _EMAIL_LOCAL_CHARS.__contains__)),
+    ("api_key", re.compile(r'(?:sk(?<!\wsk)|pk(?<!\wpk)|ck(?<!\wck)|ghp(?<!\wghp)|gho(?<!\wgho)|glpat(?<!\wglpat))'
+                           r'[-_][A-Za-z0-9]{20,}\b'), '[REDACTED_KEY]',
+     lambda text: any(prefix in text for prefix in _API_KEY_PREFIXES),
+     None),
+    ("bearer_token", re.compile(r'Bearer(?<!\wBearer)\s+[A-Za-z0-9\-._~+/]+={0,2}\b'), 'Bearer [REDACTED_TOKEN]',
+     lambda text: "Bearer" in text,
+     None),
+    ("jwt", re.compile(r'eyJ(?<!\weyJ)[A-Za-z0-9_-]+\.eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\b'), '[REDACTED_JWT]',
+     lambda text: "eyJ" in text,
+     None),
+    ("ip_address", re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b'), '[IP]',
+     lambda text: _IP_HINT.search(text) is not None,
+     lambda rx, repl, text: _anchored_subn(rx, repl, text, _DIGIT_DOT, str.isdecimal)),
+]
+
+
+def redact_string(text: str, rules_applied: Optional[List[str]] = None) -> str:
+    """
+    Apply the redaction rules to one string.
+
+    Equivalent to applying each rule in turn to the previous rule's output
+    (a one-pass substitution with all rules combined would not be: e.g.
+    "Bearer alice@example.com" must become "Bearer [EMAIL]"). Strings that
+    fail every prefilter return without a regex scan, and each candidate
+    rule costs one subn() instead of a search() plus a sub().
+
+    Args:
+        text: String to redact
+        rules_applied: If given, names of rules that fired are appended
+            (once each)
+
+    Returns:
+        Redacted string
+    """
+    candidates = [rule for rule in REDACTION_RULES if rule[3](text)]
+    if not candidates:
+        return text
+
+    for rule_name, pattern, replacement, prefilter, subn in candidates:
+        # Earlier substitutions may have removed what the prefilter saw
+        if len(candidates) > 1 and not prefilter(text):
+            continue
+        if subn:
+            text, count = subn(pattern, replacement, text)
+        else:
+            text, count = pattern.subn(replacement, text)
+        if count and rules_applied is not None and rule_name not in rules_applied:
+            rules_applied.append(rule_name)
+    return text
+
+
+def redact_value(obj: Any, rules_applied: Optional[List[str]] = None) -> Any:
+    """
+    Redact every string in a nested structure; blob references are left
+    as they are (their contents were redacted before they were stored).
+
+    Args:
+        obj: String, dict, list or scalar
+        rules_applied: If given, names of rules that fired are appended
+            (once each)
+
+    Returns:
+        Redacted copy of obj
+    """
+    if isinstance(obj, str):
+        return redact_string(obj, rules_applied)
+    elif isinstance(obj, dict):
+        if BLOB_REF_KEY in obj:
+            return obj
+        return {k: redact_value(v, rules_applied) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [redact_value(item, rules_applied) for item in obj]
+    else:
+        return obj
+
+
+def redact_payload(data: Dict[str, Any], mode: str = "strict",
+                   rules_applied: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Apply redaction rules to event payload.
     
     Args:
         data: Event data to redact (modified in-place)
         mode: Redaction mode - "strict" | "lenient" | "disabled"
+        rules_applied: Rules that already fired on this payload (e.g. on
+            fields budget_payload() offloaded), reported with the rest
     
     Returns:
         Redacted data dict with redaction metadata
@@ -86,44 +306,10 @@ def redact_payload(data: Dict[str, Any], mode: str = "strict") -> Dict[str, Any]
     if mode == "disabled":
         return data
     
-    rules_applied = []
-    
-    # Redaction patterns
-    patterns = {
-        "email": (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]'),
-        "api_key": (r'\b(sk|pk|ck|ghp|gho|glpat)[-_][A-Za-z0-9]{20,}\b', '[REDACTED_KEY]'),
-        "bearer_token": (r'\bBearer\s+[A-Za-z0-9\-._~+/]+={0,2}\b', 'Bearer [REDACTED_TOKEN]'),
-        "jwt": (r'\beyJ[A-Za-z0-9_-]+\.eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\b', '[REDACTED_JWT]'),
-        "ip_address": (r'\b(?:\d{1,3}\.){3}\d{1,3}\b', '[IP]'),
-    }
-    
-    def redact_string(text: str) -> str:
-        """Apply redaction patterns to string."""
-        if not isinstance(text, str):
-            return text
-        
-        modified = text
-        for rule_name, (pattern, replacement) in patterns.items():
-            if re.search(pattern, modified):
-                modified = re.sub(pattern, replacement, modified)
-                if rule_name not in rules_applied:
-                    rules_applied.append(rule_name)
-        
-        return modified
-    
-    def redact_recursive(obj: Any) -> Any:
-        """Recursively redact strings in nested structures."""
-        if isinstance(obj, dict):
-            return {k: redact_recursive(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [redact_recursive(item) for item in obj]
-        elif isinstance(obj, str):
-            return redact_string(obj)
-        else:
-            return obj
+    rules_applied = [] if rules_applied is None else rules_applied
     
     # Apply recursive redaction
-    redacted_data = redact_recursive(data.copy())
+    redacted_data = redact_value(data.copy(), rules_applied)
     
     # Add redaction metadata
     if rules_applied:
@@ -161,6 +347,122 @@ def redact_filepath(path: str) -> str:
     return path
 
 
+def _env_bytes(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _offload(value: Any, store: BlobStore, redact: Optional[Callable[[Any], Any]] = None,
+             max_bytes: int = 0) -> Dict[str, Any]:
+    """
+    Move one value into the blob store and return its reference.
+
+    A string is cut to `max_bytes` before it is redacted, so redaction never
+    works on more than that; the reference then records the original size.
+    """
+    truncated_from = None
+    if isinstance(value, str):
+        encoding = "text"
+        # Byte length is at most 4x the character count
+        if max_bytes and len(value) * 4 > max_bytes and len(value.encode("utf-8")) > max_bytes:
+            truncated_from = len(value.encode("utf-8"))
+            value = value[:max_bytes].encode("utf-8")[:max_bytes].decode("utf-8", "ignore")
+        text = redact(value) if redact else value
+    else:
+        encoding = "json"
+        text = json.dumps(redact(value) if redact else value, ensure_ascii=False)
+    raw = text.encode("utf-8")
+    try:
+        ref = make_blob_ref(store.put(raw), len(raw), encoding, text)
+    except OSError:
+        # Blob store unwritable: keep the envelope bounded anyway
+        ref = {"$truncated": True, "size_bytes": len(raw), "encoding": encoding, "preview": text[:200]}
+    if truncated_from is not None:
+        ref["truncated_from_bytes"] = truncated_from
+    return ref
+
+
+def budget_payload(
+    payload: Dict[str, Any],
+    budget: Optional[int] = None,
+    threshold: Optional[int] = None,
+    store: Optional[BlobStore] = None,
+    redact: Optional[Callable[[Any], Any]] = None,
+    max_blob: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Bound the serialized size of a payload by offloading large fields.
+
+    Strings longer than `threshold` bytes (at any depth) are replaced by blob
+    references; if the payload is still over `budget` bytes, its largest
+    top-level fields are offloaded whole (as JSON) until it fits. The
+    "redaction" metadata is never offloaded. Runs before redaction, so
+    each offloaded value is passed through `redact` on its own just before
+    it is stored, and strings over `max_blob` bytes are cut first.
+
+    Args:
+        payload: Payload (not modified)
+        budget: Byte budget (default ZO_PAYLOAD_BUDGET_BYTES; 0 disables)
+        threshold: Per-string limit (default ZO_BLOB_THRESHOLD_BYTES)
+        store: Blob store (default ZO_BLOB_DIR)
+        redact: Applied to each value before it is written to the store
+        max_blob: Per-string cap on blobs (default ZO_BLOB_MAX_BYTES;
+            0 disables)
+
+    Returns:
+        Payload with large fields replaced by {"$blob": "sha256:..."} refs
+    """
+    if budget is None:
+        budget = _env_bytes("ZO_PAYLOAD_BUDGET_BYTES", DEFAULT_PAYLOAD_BUDGET_BYTES)
+    if not budget:
+        return payload
+    if threshold is None:
+        threshold = _env_bytes("ZO_BLOB_THRESHOLD_BYTES", DEFAULT_BLOB_THRESHOLD_BYTES) or budget
+    if max_blob is None:
+        max_blob = _env_bytes("ZO_BLOB_MAX_BYTES", DEFAULT_BLOB_MAX_BYTES)
+    store = store or BlobStore()
+
+    def offload_strings(obj: Any) -> Any:
+        if isinstance(obj, str):
+            # Byte length is at most 4x the character count
+            if len(obj) * 4 > threshold and len(obj.encode("utf-8")) > threshold:
+                return _offload(obj, store, redact, max_blob)
+            return obj
+        elif isinstance(obj, dict):
+            return {k: offload_strings(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [offload_strings(item) for item in obj]
+        return obj
+
+    budgeted = {k: v if k == "redaction" else offload_strings(v) for k, v in payload.items()}
+
+    sizes = {k: len(json.dumps(v, ensure_ascii=False).encode("utf-8")) for k, v in budgeted.items()}
+    total = len(json.dumps(budgeted, ensure_ascii=False).encode("utf-8"))
+    while total > budget:
+        candidates = [k for k, v in budgeted.items()
+                      if k != "redaction" and not (isinstance(v, dict) and BLOB_REF_KEY in v)]
+        if not candidates:
+            break
+        largest = max(candidates, key=sizes.get)
+        ref = _offload(budgeted[largest], store, redact, max_blob)
+        ref_size = len(json.dumps(ref, ensure_ascii=False).encode("utf-8"))
+        if ref_size >= sizes[largest]:
+            break  # Everything left is smaller than a reference
+        budgeted[largest] = ref
+        total -= sizes[largest] - ref_size
+        sizes[largest] = ref_size
+    return budgeted
+
+
+def _as_text(value: Any) -> Any:
+    """Preview text for blob references, the value itself otherwise."""
+    if isinstance(value, dict) and (BLOB_REF_KEY in value or "$truncated" in value):
+        return value.get("preview", "")
+    return value
+
+
 def extract_indexable_text(event: Dict[str, Any], max_chars: int = 2000) -> str:
     """
     Extract plain text suitable for embedding/semantic search.
@@ -192,11 +494,11 @@ def extract_indexable_text(event: Dict[str, Any], max_chars: int = 2000) -> str:
     
     # Decision/error details
     if event_type == 'decision' and (data := event.get('data')):
-        if reasoning := data.get('reasoning'):
+        if reasoning := _as_text(data.get('reasoning')):
             parts.append(f"Reasoning: {reasoning}")
     
     if event_type == 'error' and (error_detail := event.get('error_detail')):
-        parts.append(f"Error: {error_detail.get('message', '')}")
+        parts.append(f"Error: {_as_text(error_detail.get('message', ''))}")
     
     # Artifact references
     if artifact_refs := event.get('artifact_refs'):
@@ -226,7 +528,8 @@ def build_event_envelope(
     parent_event_id: Optional[str] = None,
     error_detail: Optional[Dict[str, Any]] = None,
     cwd: Optional[str] = None,
-    redaction_mode: str = "strict"
+    redaction_mode: str = "strict",
+    timings: Optional[Dict[str, float]] = None
 ) -> Dict[str, Any]:
     """
     Build canonical event envelope conforming to schema v1.0.
@@ -238,7 +541,8 @@ def build_event_envelope(
         level: Severity level (debug|info|warn|error)
         hook_event_name: Original hook name
         msg: Human-readable summary
-        data: Structured payload (will be redacted)
+        data: Structured payload (will be redacted, then size-budgeted:
+            large fields move to the blob store, see budget_payload)
         agent_role: conductor|worker|system
         worker_id: Worker instance ID
         task_id: Task identifier
@@ -246,9 +550,12 @@ def build_event_envelope(
         tool_use_id: Tool execution ID
         artifact_refs: List of artifact references
         parent_event_id: Causal link
-        error_detail: Error metadata
+        error_detail: Error metadata (size-budgeted like data)
         cwd: Working directory
         redaction_mode: strict|lenient|disabled
+        timings: If given, seconds spent in redaction, hashing and
+            indexable-text extraction are added under "redact", "hash" and
+            "indexable_text" (see hook_timing.py)
     
     Returns:
         Complete event envelope
@@ -309,18 +616,30 @@ def build_event_envelope(
     if parent_event_id:
         envelope["parent_event_id"] = parent_event_id
     if error_detail:
-        envelope["error_detail"] = error_detail
+        envelope["error_detail"] = budget_payload(error_detail)
     
-    # Apply redaction to data payload
+    # Offload oversized fields (redacting each one as it is stored), then
+    # redact what stays inline (timed as "redact")
+    started = time.perf_counter()
     if data:
-        envelope["data"] = redact_payload(data, mode=redaction_mode)
+        rules_applied: List[str] = []
+        redact = None if redaction_mode == "disabled" else (lambda value: redact_value(value, rules_applied))
+        envelope["data"] = redact_payload(budget_payload(data, redact=redact), mode=redaction_mode,
+                                          rules_applied=rules_applied)
+    redacted = time.perf_counter()
     
-    # Generate content hash
-    envelope["hash"] = hash_content(envelope)
+    # Generate content hash (also caches the canonical data JSON for encode_event)
+    envelope = seal_envelope(envelope)
+    hashed = time.perf_counter()
     
     # Extract indexable text
     envelope["indexable_text"] = extract_indexable_text(envelope)
     
+    if timings is not None:
+        timings["redact"] = redacted - started
+        timings["hash"] = hashed - redacted
+        timings["indexable_text"] = time.perf_counter() - hashed
+    
     return envelope
 
 
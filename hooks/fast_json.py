@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+JSON decode/encode for hook hot paths, using orjson when it is installed
+and the stdlib json module otherwise.
+
+Results do not depend on which backend runs:
+- loads() returns what json.loads() would. Input orjson rejects (NaN,
+  lone surrogates, ...) or would alter (integers beyond 64 bits, which it
+  turns into floats) is parsed again by json.loads(), errors included.
+- dumps() writes compact JSON, the same as json.dumps(value,
+  ensure_ascii=False, separators=(",", ":")) for plain JSON values.
+
+Anything that is hashed or matched byte-wise (the canonical hash form,
+blob contents, local log lines) keeps using json.dumps directly.
+
+Importing orjson costs a one-shot hook process about as much as it saves
+on a ~250KB document, so it is imported lazily: on the first document of
+at least LAZY_IMPORT_MIN_BYTES, or up front by long-lived processes (hook
+daemon, outbox drainer, zo-logs) through preload().
+"""
+import json
+from typing import Any, IO, Union
+
+LAZY_IMPORT_MIN_BYTES = 256 * 1024
+
+# orjson parses integers outside [-2**63, 2**64) as floats
+_INT_LIMIT = float(2 ** 63)
+
+_orjson = None
+_orjson_missing = False
+
+
+def preload() -> bool:
+    """Import orjson now if installed; returns whether the fast path is on."""
+    global _orjson, _orjson_missing
+    if _orjson is None and not _orjson_missing:
+        try:
+            import orjson
+        except ImportError:
+            _orjson_missing = True
+        else:
+            _orjson = orjson
+    return _orjson is not None
+
+
+def backend() -> str:
+    """Name of the codec in use right now ("orjson" or "json")."""
+    return "orjson" if _orjson is not None else "json"
+
+
+def _has_lossy_float(value: Any) -> bool:
+    """True if a parsed value holds a float that may have been a large integer."""
+    stack = [value]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        item = pop()
+        kind = type(item)
+        if kind is dict:
+            push(item.values())
+        elif kind is list:
+            push(item)
+        elif kind is float and not -_INT_LIMIT < item < _INT_LIMIT:
+            return True
+    return False
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parse a JSON document (bytes or str)."""
+    if _orjson is not None or (len(data) >= LAZY_IMPORT_MIN_BYTES and preload()):
+        try:
+            value = _orjson.loads(data)
+        except _orjson.JSONDecodeError:
+            pass
+        else:
+            if not _has_lossy_float(value):
+                return value
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+    return json.loads(data)
+
+
+def load(fp: IO) -> Any:
+    """Parse a JSON document from a file object (e.g. sys.stdin)."""
+    return loads(fp.read())
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Compact UTF-8 JSON."""
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(value, option=_orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # Integers beyond 64 bits, unsupported types, deep nesting
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON as str."""
+    return dumps_bytes(value).decode("utf-8")
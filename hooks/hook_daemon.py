@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Resident hook daemon for Claude Code hooks.
+Keeps the hook modules (and event_utils/urllib) imported in one long-lived
+process and serves hook invocations over a Unix domain socket. Each request
+runs in a child forked from the warm daemon, so hooks run concurrently and
+each gets its own environment, cwd and std streams. Each hook script
+forwards its raw stdin here and falls back to the in-process path when no
+daemon is listening or the daemon does not answer in time.
+
+Usage:
+    python hooks/hook_daemon.py [--socket PATH]
+"""
+import io
+import os
+import sys
+import json
+import time
+import socket
+from typing import Any, Dict
+
+DEFAULT_SOCKET = os.path.expanduser("~/.zo/hook-daemon.sock")
+
+# Hook modules the daemon is allowed to run
+HOOK_MODULES = (
+    "zo_report_event", "mcp_telemetry", "session_start",
+    "worker_spawn", "artifact_produced", "error_event"
+)
+
+# Seconds one hook invocation may run in the daemon before it is killed and
+# the client runs the hook itself
+HOOK_TIMEOUT = float(os.getenv("ZO_HOOK_DAEMON_TIMEOUT", "10"))
+
+# Extra seconds the client waits for the reply of a hook killed at its timeout
+REPLY_GRACE_SECONDS = 1.0
+
+
+def get_socket_path() -> str:
+    """Return daemon socket path from environment or default."""
+    return os.path.expanduser(os.getenv("ZO_HOOK_DAEMON_SOCKET") or DEFAULT_SOCKET)
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    """Read until the peer closes its write side."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def forward_or_continue(hook_name: str) -> None:
+    """
+    Thin-client entry point called at the top of each hook script.
+
+    Forwards stdin, environment and cwd to the daemon and exits with the
+    daemon's result. Returns (with stdin rewound) when no daemon is reachable
+    or it gave no reply, so the caller continues on the in-process path. The
+    daemon kills a hook still running at its timeout before the client gives
+    up, so the two never run at once; a hook killed after it sent its event
+    records it twice.
+    """
+    path = get_socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return
+
+    raw = sys.stdin.read()
+    request = {
+        "hook": hook_name,
+        "stdin": raw,
+        "env": dict(os.environ),
+        "cwd": os.getcwd(),
+        "sent_at": time.time(),
+        "timeout": HOOK_TIMEOUT
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        # Stale socket or daemon gone: run in-process
+        sock.close()
+        sys.stdin = io.StringIO(raw)
+        return
+
+    try:
+        sock.settimeout(HOOK_TIMEOUT + REPLY_GRACE_SECONDS)
+        sock.sendall(json.dumps(request).encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        reply = json.loads(_recv_all(sock))
+    except Exception as e:
+        print(f"[hook_daemon] no reply from daemon ({e}); running {hook_name} in-process", file=sys.stderr)
+        sys.stdin = io.StringIO(raw)
+        return
+    finally:
+        sock.close()
+
+    if out := reply.get("stdout"):
+        sys.stdout.write(out)
+    if err := reply.get("stderr"):
+        sys.stderr.write(err)
+    sys.exit(reply.get("exit_code", 0))
+
+
+def run_hook(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one hook invocation as if it were a fresh hook process.
+
+    The hook gets the request's environment and cwd and captured std
+    streams, which are process-wide, so this must run in a process of its
+    own: serve() forks one per request.
+    """
+    import importlib
+    import traceback
+    from outbox import close_outbox
+
+    hook_name = request.get("hook", "")
+    if hook_name not in HOOK_MODULES:
+        return {"exit_code": 1, "stdout": "", "stderr": f"[hook_daemon] unknown hook: {hook_name}\n"}
+
+    module = importlib.import_module(hook_name)
+
+    if "env" in request:
+        os.environ.clear()
+        os.environ.update(request["env"])
+    try:
+        os.chdir(request.get("cwd") or os.getcwd())
+    except OSError:
+        pass
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+
+    sys.stdin = io.StringIO(request.get("stdin", ""))
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        module.main()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        # The forked child ends in os._exit(), which skips atexit: make the
+        # events this hook queued durable before the client is answered
+        try:
+            close_outbox()
+        except OSError as e:
+            print(f"[hook_daemon] outbox close failed: {e}", file=stderr)
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def serve(path: str):
+    """Serve hook requests on a Unix domain socket until interrupted."""
+    import signal
+    import socketserver
+
+    class HookRequestHandler(socketserver.BaseRequestHandler):
+        # Runs in the child forked for this request
+        def handle(self):
+            try:
+                request = loads(_recv_all(self.request))
+            except Exception as e:
+                reply = {"exit_code": 1, "stdout": "", "stderr": f"[hook_daemon] bad request: {e}\n"}
+            else:
+                timeout = float(request.get("timeout") or HOOK_TIMEOUT)
+                remaining = float(request.get("sent_at") or time.time()) + timeout - time.time()
+                if remaining <= 0:
+                    return  # Waited too long for a free slot; the client runs the hook itself
+                # SIGALRM's default action ends this child, closing the socket
+                # without a reply
+                signal.signal(signal.SIGALRM, signal.SIG_DFL)
+                signal.setitimer(signal.ITIMER_REAL, remaining)
+                reply = run_hook(request)
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            self.request.sendall(dumps_bytes(reply))
+
+    class HookDaemon(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        pass
+
+    # Refuse to start twice; clear a stale socket left by a crash
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            print(f"[hook_daemon] already running on {path}", file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            os.unlink(path)
+        finally:
+            probe.close()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Preload hook modules so requests only pay for the work itself
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import importlib
+    for name in HOOK_MODULES:
+        importlib.import_module(name)
+    from fast_json import dumps_bytes, loads, preload
+    preload()
+
+    # Ship the outbox too when hooks queue events, from a child process so
+    # draining never competes with hook requests for this interpreter (the
+    # child exits at once if another drainer already holds the outbox lock)
+    from outbox import outbox_enabled
+    drainer = None
+    if outbox_enabled():
+        import subprocess
+        outbox_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outbox.py")
+        drainer = subprocess.Popen([sys.executable, outbox_script, "drain"], stdin=subprocess.DEVNULL)
+
+    def _raise_interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    with HookDaemon(path, HookRequestHandler) as server:
+        os.chmod(path, 0o600)
+        print(f"[hook_daemon] listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            if drainer is not None:
+                drainer.terminate()
+                try:
+                    drainer.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    drainer.kill()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident daemon for Claude Code hooks")
+    parser.add_argument("--socket", default=get_socket_path(), help="Unix socket path")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+        print("[hook_daemon] Unix domain sockets and fork() are required", file=sys.stderr)
+        sys.exit(1)
+
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Opt-in phase timing for hooks (ZO_HOOK_TIMING=1) and a report CLI.
+
+Each hook run appends one fixed-size record to a ring file
+(ZO_HOOK_TIMING_FILE, default ~/.zo/hook-timing.ring) holding the time
+spent in each phase: interpreter start -> main(), reading stdin, building
+the envelope (with its redaction / hash / indexable-text parts), the local
+JSONL append and the HTTP send (or outbox enqueue). Once the ring is full
+the oldest samples are overwritten, so the file never grows.
+
+Usage:
+    python hooks/hook_timing.py report [--since-hours 24] [--json]
+    python hooks/hook_timing.py clear
+"""
+import os
+import struct
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: records may interleave under heavy concurrency
+    fcntl = None
+
+DEFAULT_TIMING_FILE = "~/.zo/hook-timing.ring"
+DEFAULT_CAPACITY = 20000
+
+PHASES = ("startup", "stdin", "envelope", "redact", "hash", "indexable_text",
+          "local_log", "send", "total")
+MISSING = 0xFFFFFFFF  # phase not measured in this run
+
+# Header: magic, version, capacity, records written (monotonic)
+HEADER = struct.Struct("<4sHxxIQ")
+MAGIC = b"ZOHT"
+VERSION = 1
+# Record: wall-clock ts, hook, hook_event_name, one uint32 of microseconds per phase
+RECORD = struct.Struct("<d24s24s" + "I" * len(PHASES))
+
+
+def timing_enabled() -> bool:
+    return os.getenv("ZO_HOOK_TIMING", "").lower() in ("1", "true", "yes")
+
+
+def get_timing_file() -> str:
+    return os.path.expanduser(os.getenv("ZO_HOOK_TIMING_FILE", DEFAULT_TIMING_FILE))
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started (Linux only; 10ms resolution)."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class HookTimer:
+    """
+    Collects phase durations for one hook run.
+
+    Disabled timers (the default) do nothing: phase() returns a shared no-op
+    context manager and `detail` is None, so build_event_envelope() skips
+    its sub-phase timing too.
+
+    Args:
+        hook: Hook name recorded with the sample
+        script: True when the hook runs as its own process, so interpreter
+            startup is attributed to it (False inside the hook daemon)
+    """
+
+    def __init__(self, hook: str, script: bool = True):
+        self.hook = hook
+        self.enabled = timing_enabled()
+        self.detail: Optional[Dict[str, float]] = {} if self.enabled else None
+        self._started = time.perf_counter()
+        if self.enabled and script and (age := process_age()) is not None:
+            self.detail["startup"] = age
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._phase(name)
+
+    @contextmanager
+    def _phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.detail[name] = self.detail.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self, hook_event_name: Optional[str] = ""):
+        """Write the sample to the ring file; never raises."""
+        if not self.enabled:
+            return
+        self.detail["total"] = time.perf_counter() - self._started + self.detail.get("startup", 0.0)
+        try:
+            TimingRing(get_timing_file()).append(self.hook, hook_event_name or "", self.detail)
+        except Exception as e:
+            print(f"[hook_timing] could not record sample: {e}", file=sys.stderr)
+
+
+class TimingRing:
+    """Fixed-capacity ring of timing records in a single file."""
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        header = os.pread(fd, HEADER.size, 0) if hasattr(os, "pread") else self._read_at(fd, 0, HEADER.size)
+        if len(header) == HEADER.size:
+            magic, version, capacity, written = HEADER.unpack(header)
+            if magic == MAGIC and version == VERSION:
+                return fd, capacity, written
+        # New or unrecognised file: start an empty ring
+        os.ftruncate(fd, 0)
+        self._write_at(fd, 0, HEADER.pack(MAGIC, VERSION, self.capacity, 0))
+        return fd, self.capacity, 0
+
+    @staticmethod
+    def _read_at(fd: int, offset: int, size: int) -> bytes:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+    @staticmethod
+    def _write_at(fd: int, offset: int, data: bytes):
+        if hasattr(os, "pwrite"):
+            os.pwrite(fd, data, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            os.write(fd, data)
+
+    def append(self, hook: str, hook_event_name: str, phases: Dict[str, float]):
+        fd, capacity, written = self._open()
+        try:
+            values = []
+            for name in PHASES:
+                seconds = phases.get(name)
+                values.append(MISSING if seconds is None else min(int(seconds * 1e6), MISSING - 1))
+            record = RECORD.pack(time.time(), hook.encode("utf-8")[:24],
+                                 hook_event_name.encode("utf-8")[:24], *values)
+            self._write_at(fd, HEADER.size + (written % capacity) * RECORD.size, record)
+            self._write_at(fd, 0, HEADER.pack(MAGIC, VERSION, capacity, written + 1))
+        finally:
+            os.close(fd)  # also releases the lock
+
+    def read(self) -> List[Dict[str, object]]:
+        """All samples currently in the ring, oldest first."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return []
+            magic, version, capacity, written = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not a hook timing ring")
+            data = f.read(capacity * RECORD.size)
+
+        count = min(written, capacity)
+        first = written % capacity if written > capacity else 0
+        samples = []
+        for i in range(count):
+            slot = (first + i) % capacity
+            chunk = data[slot * RECORD.size:(slot + 1) * RECORD.size]
+            if len(chunk) < RECORD.size:
+                continue
+            ts, hook, event_name, *values = RECORD.unpack(chunk)
+            samples.append({
+                "ts": ts,
+                "hook": hook.rstrip(b"\0").decode("utf-8", "replace"),
+                "hook_event_name": event_name.rstrip(b"\0").decode("utf-8", "replace"),
+                "phases": {name: v / 1e6 for name, v in zip(PHASES, values) if v != MISSING}
+            })
+        return samples
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(samples: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """p50/p95/p99 (ms) per hook, hook_event_name and phase."""
+    groups: Dict[tuple, Dict[str, List[float]]] = {}
+    for sample in samples:
+        by_phase = groups.setdefault((sample["hook"], sample["hook_event_name"]), {})
+        for name, seconds in sample["phases"].items():
+            by_phase.setdefault(name, []).append(seconds)
+
+    rows = []
+    for (hook, event_name), by_phase in sorted(groups.items()):
+        for name in PHASES:
+            values = by_phase.get(name)
+            if not values:
+                continue
+            rows.append({
+                "hook": hook,
+                "hook_event_name": event_name,
+                "phase": name,
+                "n": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3)
+            })
+    return rows
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Hook phase timing report")
+    parser.add_argument("--file", default=get_timing_file(), help="Ring file to read")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="p50/p95/p99 per hook, hook event and phase")
+    report.add_argument("--since-hours", type=float, help="Only samples from the last N hours")
+    report.add_argument("--json", action="store_true", help="Emit rows as JSON")
+    sub.add_parser("clear", help="Delete all samples")
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        if os.path.exists(args.file):
+            os.remove(args.file)
+        return
+
+    samples = TimingRing(args.file).read()
+    if args.since_hours:
+        cutoff = time.time() - args.since_hours * 3600
+        samples = [s for s in samples if s["ts"] >= cutoff]
+    rows = summarize(samples)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"No samples in {args.file} (enable with ZO_HOOK_TIMING=1)")
+        return
+
+    print(f"{'hook':<18} {'hook event':<18} {'phase':<15} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    previous = None
+    for row in rows:
+        group = (row["hook"], row["hook_event_name"])
+        if previous and group != previous:
+            print()
+        previous = group
+        print(f"{row['hook']:<18} {row['hook_event_name'] or '-':<18} {row['phase']:<15} {row['n']:6d} "
+              f"{row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Sidecar indexes for the local event log segments (see event_log.py).
+
+Next to each segment sits "<segment>.jsonl.idx", a JSON map from run_id,
+session_id, event_type and tool_name values to the byte offsets of the
+matching lines, plus the segment's ts min/max. Indexes are brought up to
+date lazily, on query, so appends stay a single write: lines added since
+the last query are indexed incrementally, and an index whose segment was
+replaced or truncated is rebuilt from scratch. Offsets refer to the
+uncompressed bytes, so an index stays valid when its segment is compressed.
+
+Usage:
+    python hooks/log_index.py find [--run-id ID] [--session-id ID] [--event-type T]
+                                   [--tool-name N] [--since TS] [--until TS]
+    python hooks/log_index.py build [--rebuild]
+"""
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from event_log import DEFAULT_LOG_DIR, Segment, iter_lines, list_segments, open_segment
+    from fast_json import dumps, loads
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from event_log import DEFAULT_LOG_DIR, Segment, iter_lines, list_segments, open_segment
+    from fast_json import dumps, loads
+
+INDEX_VERSION = 1
+INDEX_FIELDS = ("run_id", "session_id", "event_type", "tool_name")
+INDEX_SUFFIX = ".idx"
+HEAD_BYTES = 4096  # Prefix fingerprinted to notice a replaced segment
+
+
+def index_path(segment: Segment) -> Path:
+    """Sidecar path; shared by a segment and its compressed form."""
+    name = segment.path.name
+    if segment.compression:
+        name = name[:-len(segment.compression)]
+    return segment.path.with_name(name + INDEX_SUFFIX)
+
+
+def _empty_index(name: str) -> Dict[str, Any]:
+    return {
+        "version": INDEX_VERSION,
+        "segment": name,
+        "indexed_bytes": 0,
+        "mtime_ns": 0,
+        "head": "",
+        "lines": 0,
+        "ts_min": None,
+        "ts_max": None,
+        "fields": {field: {} for field in INDEX_FIELDS}
+    }
+
+
+class SegmentIndex:
+    """Offsets of indexed field values in one segment."""
+
+    def __init__(self, segment: Segment):
+        self.segment = segment
+        self.path = index_path(segment)
+        self.data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        name = self.path.name[:-len(INDEX_SUFFIX)]
+        try:
+            data = loads(self.path.read_bytes())
+            if data.get("version") == INDEX_VERSION and data.get("segment") == name:
+                return data
+        except (OSError, ValueError):
+            pass
+        return _empty_index(name)
+
+    def _save(self):
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(dumps(self.data))
+        os.replace(tmp, self.path)
+
+    def refresh(self) -> bool:
+        """
+        Bring the index in sync with its segment.
+
+        Returns:
+            True if the index changed (and was saved)
+        """
+        st = os.stat(self.segment.path)
+        data = self.data
+        compressed = self.segment.compression is not None
+        if data["mtime_ns"] == st.st_mtime_ns and (compressed or data["indexed_bytes"] == st.st_size):
+            return False
+
+        with open_segment(self.segment.path) as f:
+            head = f.read(HEAD_BYTES)
+            fingerprint = hashlib.sha1(head[:min(HEAD_BYTES, data["indexed_bytes"])]).hexdigest()
+            if not data["indexed_bytes"] or fingerprint != data["head"] \
+                    or (not compressed and st.st_size < data["indexed_bytes"]):
+                data = self.data = _empty_index(data["segment"])
+                offset = 0
+                f.seek(0)
+            else:
+                offset = data["indexed_bytes"]
+                f.seek(offset)
+            self._scan(f, offset)
+        data["head"] = hashlib.sha1(head[:min(HEAD_BYTES, data["indexed_bytes"])]).hexdigest()
+        data["mtime_ns"] = st.st_mtime_ns
+        self._save()
+        return True
+
+    def _scan(self, f, offset: int):
+        """Index complete lines from the current position (at `offset`)."""
+        data = self.data
+        fields = data["fields"]
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Torn or in-progress write: pick it up next time
+            try:
+                event = loads(line)
+            except ValueError:
+                event = None
+            if isinstance(event, dict):
+                for field in INDEX_FIELDS:
+                    value = event.get(field)
+                    if isinstance(value, str) and value:
+                        fields[field].setdefault(value, []).append(offset)
+                ts = event.get("ts")
+                if isinstance(ts, str) and ts:
+                    if data["ts_min"] is None or ts < data["ts_min"]:
+                        data["ts_min"] = ts
+                    if data["ts_max"] is None or ts > data["ts_max"]:
+                        data["ts_max"] = ts
+            data["lines"] += 1
+            offset += len(line)
+        data["indexed_bytes"] = offset
+
+    def overlaps(self, since: Optional[str] = None, until: Optional[str] = None) -> bool:
+        """False if no event in the segment can fall inside [since, until)."""
+        ts_min, ts_max = self.data["ts_min"], self.data["ts_max"]
+        if ts_min is None:
+            return self.data["lines"] > 0  # Lines without ts: cannot rule out
+        if since and ts_max < since:
+            return False
+        if until and ts_min >= until:
+            return False
+        return True
+
+    def lookup(self, **filters: Optional[str]) -> Optional[List[int]]:
+        """
+        Offsets of lines matching every given field=value filter.
+
+        Returns:
+            Sorted offsets, or None when no indexed filter was given (the
+            caller has to scan the segment)
+        """
+        result = None
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in INDEX_FIELDS:
+                raise ValueError(f"{field} is not indexed")
+            offsets = set(self.data["fields"][field].get(value, ()))
+            result = offsets if result is None else result & offsets
+            if not result:
+                return []
+        return None if result is None else sorted(result)
+
+    def read_lines(self, offsets: List[int]) -> Iterator[bytes]:
+        """Lines starting at the given (sorted) offsets."""
+        if not offsets:
+            return
+        with open_segment(self.segment.path) as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield f.readline()
+
+
+def find_events(
+    root: Path,
+    prefix: Optional[str] = "events",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    **filters: Optional[str]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Events matching field filters (INDEX_FIELDS) and a ts range, oldest
+    segment first, refreshing each segment's index as needed.
+
+    Args:
+        root: Log directory
+        prefix: Segment prefix ("events", "mcp"), or None for all
+        since: Inclusive lower bound on ts (RFC3339)
+        until: Exclusive upper bound on ts (RFC3339)
+        **filters: run_id / session_id / event_type / tool_name values
+    """
+    for segment in list_segments(root, prefix):
+        index = SegmentIndex(segment)
+        try:
+            index.refresh()
+        except OSError:
+            continue  # Segment compressed or removed meanwhile
+        if not index.overlaps(since, until):
+            continue
+        offsets = index.lookup(**filters)
+        for line in index.read_lines(offsets) if offsets is not None else iter_lines(segment.path):
+            try:
+                event = loads(line)
+            except ValueError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            if any(v is not None and event.get(k) != v for k, v in filters.items()):
+                continue
+            ts = event.get("ts") or ""
+            if (since and ts < since) or (until and ts >= until):
+                continue
+            yield event
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local event log sidecar indexes")
+    parser.add_argument("--dir", default=os.getenv("ZO_EVENT_LOG_DIR", DEFAULT_LOG_DIR), help="Log directory")
+    parser.add_argument("--prefix", default="events", help="Segment prefix (events, mcp)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    find = sub.add_parser("find", help="Print matching events as NDJSON")
+    for field in INDEX_FIELDS:
+        find.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    find.add_argument("--since", help="Inclusive RFC3339 lower bound on ts")
+    find.add_argument("--until", help="Exclusive RFC3339 upper bound on ts")
+    build = sub.add_parser("build", help="Bring every index up to date")
+    build.add_argument("--rebuild", action="store_true", help="Discard existing indexes first")
+    args = parser.parse_args()
+    root = Path(os.path.expanduser(args.dir))
+
+    if args.command == "build":
+        updated = 0
+        for segment in list_segments(root, args.prefix):
+            if args.rebuild:
+                try:
+                    index_path(segment).unlink()
+                except FileNotFoundError:
+                    pass
+            updated += SegmentIndex(segment).refresh()
+        print(f"[log_index] {updated} index(es) updated")
+        return
+
+    filters = {field: getattr(args, field) for field in INDEX_FIELDS}
+    out = sys.stdout
+    for event in find_events(root, args.prefix, since=args.since, until=args.until, **filters):
+        out.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,41 +6,54 @@ Uses canonical schema v1.0 via event_utils module.
 """
 import sys
 import os
-import json
+
+if __name__ == "__main__":
+    # Hand stdin to the resident hook daemon when one is listening; returns
+    # here (before the heavier imports below) only if it is not running.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from hook_daemon import forward_or_continue
+    forward_or_continue("mcp_telemetry")
+
 from pathlib import Path
 
 # Import shared event utilities
 try:
     from event_utils import (
         build_event_envelope,
-        get_run_id_from_env_or_generate,
-        utc_now_iso
+        get_run_id_from_env_or_generate
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from event_utils import (
         build_event_envelope,
-        get_run_id_from_env_or_generate,
-        utc_now_iso
+        get_run_id_from_env_or_generate
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 
 
 def append_mcp_log(log_dir: Path, event: dict):
-    """Append MCP tool event to daily JSONL log."""
+    """Append MCP tool event to the current local log segment."""
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
-        day = utc_now_iso()[:10].replace('-', '')  # YYYYMMDD
-        log_file = log_dir / f"mcp-{day}.jsonl"
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        EventLog(log_dir, "mcp").append(event)
     except Exception as e:
         print(f"[mcp_telemetry] file log error: {e}", file=sys.stderr)
 
 
 def main():
     """Main hook entry point for MCP tool telemetry."""
+    timer = HookTimer("mcp_telemetry", script=__name__ == "__main__")
     try:
-        input_data = json.load(sys.stdin)
+        with timer.phase("stdin"):
+            input_data = json_load(sys.stdin)
     except Exception as e:
         print(f"[mcp_telemetry] invalid JSON on stdin: {e}", file=sys.stderr)
         sys.exit(1)
@@ -49,6 +62,7 @@ def main():
     
     # Early exit if not MCP tool
     if not tool_name.startswith("mcp_"):
+        timer.finish(input_data.get("hook_event_name", "PostToolUse"))
         sys.exit(0)
 
     # Extract context
@@ -59,7 +73,7 @@ def main():
     # Build data payload with tool parameters
     data_payload = {
         "tool_parameters": input_data.get("tool_parameters", {}),
-        "tool_result": str(input_data.get("tool_result", ""))[:500] if input_data.get("tool_result") else None,  # Truncate
+        "tool_result": str(input_data.get("tool_result")) if input_data.get("tool_result") else None,
         "permission_mode": input_data.get("permission_mode"),
         "cwd": input_data.get("cwd", "")
     }
@@ -68,40 +82,34 @@ def main():
     msg = f"MCP tool invocation: {tool_name}"
     
     # Build canonical event envelope
-    event = build_event_envelope(
-        event_type="tool_invocation",
-        session_id=session_id,
-        run_id=run_id,
-        level="info",
-        hook_event_name=hook_event,
-        msg=msg,
-        data=data_payload,
-        tool_name=tool_name,
-        tool_use_id=input_data.get("tool_use_id"),
-        cwd=input_data.get("cwd"),
-        redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict")
-    )
+    with timer.phase("envelope"):
+        event = build_event_envelope(
+            event_type="tool_invocation",
+            session_id=session_id,
+            run_id=run_id,
+            level="info",
+            hook_event_name=hook_event,
+            msg=msg,
+            data=data_payload,
+            tool_name=tool_name,
+            tool_use_id=input_data.get("tool_use_id"),
+            cwd=input_data.get("cwd"),
+            redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict"),
+            timings=timer.detail
+        )
 
     # Append to MCP-specific log
     log_root = os.getenv("MCP_TELEMETRY_LOG_DIR", os.path.expanduser("~/.zo/mcp-events"))
-    append_mcp_log(Path(log_root), event)
+    with timer.phase("local_log"):
+        append_mcp_log(Path(log_root), event)
 
-    # Send to bridge (hardcoded default)
-    try:
-        import urllib.request
-        import urllib.error
+    # Send to bridge (hardcoded default), or queue it in the outbox
+    with timer.phase("send"):
         endpoint = os.getenv("ZO_EVENT_ENDPOINT", "http://localhost:9000/ingest")
-        if endpoint:
-            data = json.dumps(event).encode("utf-8")
-            headers = {"Content-Type": "application/json"}
-            if api_key := os.getenv("ZO_API_KEY"):
-                headers["X-API-Key"] = api_key
-            req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-            with urllib.request.urlopen(req, timeout=2.0) as response:
-                pass  # Success
-    except Exception:
-        pass  # Fail silently, local log is primary
+        if endpoint and not enqueue_event(event):
+            send_event(endpoint, event)  # Local log is primary; failures only logged
 
+    timer.finish(hook_event)
     sys.exit(0)
 
 if __name__ == "__main__":
@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Durable local outbox for Claude Code hook events.
+Hooks append envelopes to time-bucketed NDJSON segment files and return
+immediately; a separate drainer ships queued events to the bridge's
+/ingest/batch endpoint with retry, in append order, with at-least-once
+semantics (the bridge drops redelivered events by hash).
+
+Enable in hooks with ZO_EVENT_DELIVERY=outbox, then run the drainer:
+    python hooks/outbox.py drain [--once]
+    python hooks/outbox.py status
+"""
+import os
+import sys
+import json
+import time
+import atexit
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from blob_store import BlobStore, blob_endpoint_for, iter_blob_digests
+    from event_utils import encode_event
+    from fast_json import loads, preload as preload_json
+    from transport import Deadline, HTTPStatusError, TransportError, send_body
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from blob_store import BlobStore, blob_endpoint_for, iter_blob_digests
+    from event_utils import encode_event
+    from fast_json import loads, preload as preload_json
+    from transport import Deadline, HTTPStatusError, TransportError, send_body
+
+DEFAULT_OUTBOX_DIR = os.path.expanduser("~/.zo/outbox")
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".ndjson"
+DEAD_LETTER_FILE = "dead-letter.ndjson"
+
+# Events that keep failing with retryable errors are dead-lettered after this
+MAX_EVENT_ATTEMPTS = 10
+
+
+def get_outbox_dir() -> Path:
+    """Return outbox directory from environment or default."""
+    return Path(os.path.expanduser(os.getenv("ZO_OUTBOX_DIR") or DEFAULT_OUTBOX_DIR))
+
+
+def outbox_enabled() -> bool:
+    """True when hooks should queue events instead of POSTing them."""
+    return os.getenv("ZO_EVENT_DELIVERY", "direct").lower() == "outbox"
+
+
+class Outbox:
+    """
+    Append-only writer for outbox segments.
+
+    Each append is a single O_APPEND write of one complete line, so
+    concurrent hook processes never interleave records. Segments are
+    bucketed by wall-clock time; the drainer only deletes a segment once its
+    bucket has closed and every line in it has been acknowledged.
+
+    fsync modes: "always" (every append), "batch" (at most every
+    fsync_interval seconds and on close), "never" (leave it to the OS).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        segment_seconds: Optional[int] = None,
+        fsync_mode: Optional[str] = None,
+        fsync_interval: Optional[float] = None
+    ):
+        self.root = Path(root)
+        self.segment_seconds = segment_seconds or int(os.getenv("ZO_OUTBOX_SEGMENT_SECONDS", "60"))
+        self.fsync_mode = (fsync_mode or os.getenv("ZO_OUTBOX_FSYNC", "batch")).lower()
+        self.fsync_interval = fsync_interval if fsync_interval is not None else float(
+            os.getenv("ZO_OUTBOX_FSYNC_INTERVAL", "0.2"))
+        self._fd: Optional[int] = None
+        self._fd_bucket: Optional[int] = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _segment_path(self, bucket: int) -> Path:
+        return self.root / f"{SEGMENT_PREFIX}{bucket:012d}{SEGMENT_SUFFIX}"
+
+    def _open_for(self, bucket: int) -> int:
+        if self._fd is not None and self._fd_bucket == bucket:
+            return self._fd
+        self.close()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(
+            self._segment_path(bucket),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0),
+            0o600
+        )
+        self._fd_bucket = bucket
+        return self._fd
+
+    def append(self, event: Dict[str, Any]):
+        """Append one event envelope to the current segment."""
+        line = encode_event(event) + b"\n"
+        now = time.time()
+        bucket = int(now // self.segment_seconds) * self.segment_seconds
+        fd = self._open_for(bucket)
+        os.write(fd, line)
+        self._dirty = True
+
+        if self.fsync_mode == "always":
+            self.flush()
+        elif self.fsync_mode == "batch" and time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.flush()
+
+    def flush(self):
+        """fsync pending appends (no-op in "never" mode)."""
+        if self._fd is not None and self._dirty and self.fsync_mode != "never":
+            os.fsync(self._fd)
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                self.flush()
+            finally:
+                os.close(self._fd)
+                self._fd = None
+                self._fd_bucket = None
+
+
+_outbox: Optional[Outbox] = None
+
+
+def enqueue_event(event: Dict[str, Any]) -> bool:
+    """
+    Queue event in the local outbox if outbox delivery is enabled.
+
+    Returns:
+        True if the event was queued (caller must not POST it), False if the
+        caller should deliver it directly.
+    """
+    global _outbox
+    if not outbox_enabled():
+        return False
+
+    try:
+        root = get_outbox_dir()
+        if _outbox is None or _outbox.root != root:
+            if _outbox is not None:
+                _outbox.close()
+            _outbox = Outbox(root)
+            atexit.register(close_outbox)
+        _outbox.append(event)
+        return True
+    except Exception as e:
+        print(f"[outbox] enqueue error: {e}", file=sys.stderr)
+        return False
+
+
+def close_outbox():
+    """fsync and close this process's outbox writer (run at exit)."""
+    if _outbox is not None:
+        _outbox.close()
+
+
+def batch_endpoint_for(endpoint: str) -> Optional[str]:
+    """Derive the bridge's /ingest/batch URL from a single-event ingest URL."""
+    from urllib.parse import urlsplit, urlunsplit
+
+    parts = urlsplit(endpoint)
+    path = parts.path.rstrip("/")
+    if parts.scheme == "unix" and path.endswith(".sock"):
+        path += "/ingest"  # A bare socket endpoint posts to /ingest
+    if not path.endswith(("/ingest", "/events")):
+        return None
+    if parts.scheme == "unix":
+        return f"unix://{path}/batch"  # urlunsplit drops the empty authority
+    return urlunsplit(parts._replace(path=path + "/batch"))
+
+
+class RetryableError(Exception):
+    """Delivery failed but may succeed later (bridge down, 5xx, auth)."""
+
+
+class PermanentError(Exception):
+    """Bridge rejected the event; retrying will not help."""
+
+
+class OutboxDrainer:
+    """
+    Ships queued events to the bridge in segment/line order.
+
+    Progress per segment is stored in a sidecar "<segment>.ack" file holding
+    the byte offset of the first unacknowledged line; it is only advanced
+    after the bridge accepted (or permanently rejected) the event, so a
+    crash causes redelivery, never loss.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        endpoint: str,
+        api_key: Optional[str] = None,
+        segment_seconds: Optional[int] = None,
+        seal_grace: float = 5.0,
+        timeout: float = 5.0,
+        batch_size: Optional[int] = None,
+        log_file=None
+    ):
+        self.root = Path(root)
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.segment_seconds = segment_seconds or int(os.getenv("ZO_OUTBOX_SEGMENT_SECONDS", "60"))
+        self.seal_grace = seal_grace
+        self.timeout = timeout
+        self.batch_size = batch_size or int(os.getenv("ZO_OUTBOX_BATCH_SIZE", "100"))
+        self.batch_endpoint = batch_endpoint_for(endpoint)
+        self.log_file = log_file
+        self._batch_supported: Optional[bool] = None
+        self._attempts: Dict[Tuple[str, int], int] = {}
+        self.blob_endpoint = blob_endpoint_for(endpoint)
+        self._blob_store = BlobStore()
+        self._uploaded_blobs: Set[str] = set()
+
+    def _log(self, message: str):
+        print(f"[outbox] {message}", file=self.log_file or sys.stderr)
+
+    # -- segment bookkeeping -------------------------------------------------
+
+    def segments(self) -> List[Path]:
+        if not self.root.exists():
+            return []
+        return sorted(
+            p for p in self.root.iterdir()
+            if p.name.startswith(SEGMENT_PREFIX) and p.name.endswith(SEGMENT_SUFFIX)
+        )
+
+    @staticmethod
+    def _ack_path(segment: Path) -> Path:
+        return segment.with_name(segment.name + ".ack")
+
+    def _read_ack(self, segment: Path) -> int:
+        try:
+            return int(self._ack_path(segment).read_text().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_ack(self, segment: Path, offset: int):
+        ack = self._ack_path(segment)
+        tmp = ack.with_name(ack.name + ".tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, ack)
+
+    def _is_sealed(self, segment: Path) -> bool:
+        """A segment is sealed once its time bucket is over (plus grace)."""
+        try:
+            bucket = int(segment.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        except ValueError:
+            return True
+        return time.time() > bucket + self.segment_seconds + self.seal_grace
+
+    def _dead_letter(self, line: bytes, reason: str):
+        record = {"reason": reason, "line": line.decode("utf-8", errors="replace")}
+        with (self.root / DEAD_LETTER_FILE).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log(f"dead-lettered event: {reason}")
+
+    # -- delivery ------------------------------------------------------------
+
+    def _request(self, url: str, body: bytes, content_type: str, method: str = "POST") -> bytes:
+        """Send body on a pooled connection; raise RetryableError / PermanentError on failure."""
+        headers = {"X-API-Key": self.api_key} if self.api_key else {}
+        try:
+            return send_body(method, url, body, content_type, headers, Deadline(self.timeout))
+        except HTTPStatusError as e:
+            if e.code == 409:  # Duplicate (idempotent)
+                return b""
+            if 400 <= e.code < 500 and e.code not in (401, 403, 408, 429):
+                raise PermanentError(f"HTTP {e.code}: {e.reason}")
+            raise RetryableError(f"HTTP {e.code}: {e.reason}")
+        except TransportError as e:
+            raise RetryableError(str(e))
+
+    def _post_batch(self, lines: List[bytes]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Ship lines through /ingest/batch.
+
+        Returns:
+            Per-line outcome ("ok" | "dead" | "retry", reason), in order.
+        """
+        body = b"\n".join(lines) + b"\n"
+        reply = loads(self._request(self.batch_endpoint, body, "application/x-ndjson") or b"{}")
+        results = reply.get("results") or []
+        if len(results) != len(lines):
+            raise RetryableError("batch reply does not match request")
+
+        outcomes = []
+        for result in results:
+            if result.get("status") in ("created", "accepted", "duplicate"):
+                outcomes.append(("ok", None))
+            elif result.get("code") == 400:
+                outcomes.append(("dead", result.get("error", "rejected by bridge")))
+            else:
+                outcomes.append(("retry", result.get("error")))
+        return outcomes
+
+    def _upload_blobs(self, lines: List[bytes]):
+        """
+        PUT the blobs referenced by these lines before the events themselves.
+
+        A blob missing locally or rejected by the bridge is logged and
+        skipped (the event is still delivered); RetryableError propagates so
+        the whole chunk waits.
+        """
+        for line in lines:
+            if b'"$blob"' not in line:
+                continue
+            for digest in iter_blob_digests(loads(line)):
+                if digest in self._uploaded_blobs:
+                    continue
+                data = self._blob_store.get(digest)
+                if data is None:
+                    self._log(f"blob {digest[:12]} missing locally; sending event without it")
+                    continue
+                try:
+                    self._request(f"{self.blob_endpoint}/{digest}", data, "application/octet-stream", method="PUT")
+                except PermanentError as e:
+                    self._log(f"blob {digest[:12]} rejected: {e}")
+                if len(self._uploaded_blobs) >= 10000:
+                    self._uploaded_blobs.clear()
+                self._uploaded_blobs.add(digest)
+
+    def _post_each(self, lines: List[bytes]) -> List[Tuple[str, Optional[str]]]:
+        """Ship lines one request per event, in order."""
+        outcomes: List[Tuple[str, Optional[str]]] = []
+        for line in lines:
+            try:
+                self._request(self.endpoint, line, "application/json")
+                outcomes.append(("ok", None))
+            except PermanentError as e:
+                outcomes.append(("dead", str(e)))
+            except RetryableError as e:
+                # Keep ordering: everything after a retryable failure waits too
+                outcomes.extend([("retry", str(e))] * (len(lines) - len(outcomes)))
+                break
+        return outcomes
+
+    def _deliver(self, lines: List[bytes]) -> List[Tuple[str, Optional[str]]]:
+        """Ship lines in order, preferring the batch endpoint."""
+        if self.batch_endpoint and self._batch_supported is not False:
+            try:
+                outcomes = self._post_batch(lines)
+                self._batch_supported = True
+            except PermanentError as e:
+                # Older bridge without /ingest/batch (404) or batch over the
+                # payload limit (413): fall back to one request per event
+                if self._batch_supported is None and "HTTP 404" in str(e):
+                    self._batch_supported = False
+            else:
+                # The bridge answered but failed some events (e.g. a 500 from
+                # a bulk write another event broke): resend those on their
+                # own so each is retried or dead-lettered for its own error
+                if retry := [i for i, (status, _) in enumerate(outcomes) if status == "retry"]:
+                    for i, outcome in zip(retry, self._post_each([lines[i] for i in retry])):
+                        outcomes[i] = outcome
+                return outcomes
+
+        return self._post_each(lines)
+
+    def _drain_segment(self, segment: Path) -> Tuple[int, bool]:
+        """
+        Ship unacknowledged lines of one segment.
+
+        Returns:
+            (events shipped, True if the segment was fully drained)
+        """
+        offset = self._read_ack(segment)
+        with segment.open("rb") as f:
+            f.seek(offset)
+            pending = f.read()
+
+        # Complete lines only: (start, end) offsets relative to `pending`
+        spans = []
+        start = 0
+        while (newline := pending.find(b"\n", start)) >= 0:
+            spans.append((start, newline))
+            start = newline + 1
+
+        shipped = 0
+        pos = 0
+        try:
+            for first in range(0, len(spans), self.batch_size):
+                chunk = []
+                for begin, end in spans[first:first + self.batch_size]:
+                    line = pending[begin:end]
+                    if not line.strip():
+                        continue
+                    try:
+                        loads(line)
+                    except ValueError:
+                        chunk.append((begin, end, line, ("dead", "invalid JSON")))
+                    else:
+                        chunk.append((begin, end, line, None))
+
+                sendable = [line for _, _, line, outcome in chunk if outcome is None]
+                try:
+                    self._upload_blobs(sendable)
+                    delivered = iter(self._deliver(sendable) if sendable else [])
+                except RetryableError as e:
+                    delivered = iter([("retry", str(e))] * len(sendable))
+
+                for begin, end, line, outcome in chunk:
+                    status, reason = outcome or next(delivered)
+                    if status == "retry":
+                        key = (segment.name, offset + begin)
+                        self._attempts[key] = self._attempts.get(key, 0) + 1
+                        if self._attempts[key] < MAX_EVENT_ATTEMPTS:
+                            raise RetryableError(reason or "delivery failed")
+                        self._dead_letter(line, f"gave up after {MAX_EVENT_ATTEMPTS} attempts")
+                    elif status == "dead":
+                        self._dead_letter(line, reason or "rejected by bridge")
+                    else:
+                        shipped += 1
+                    self._attempts.pop((segment.name, offset + begin), None)
+                    pos = end + 1
+
+                # Also step over blank lines at the end of the chunk
+                pos = spans[min(first + self.batch_size, len(spans)) - 1][1] + 1
+        finally:
+            if pos:
+                self._write_ack(segment, offset + pos)
+
+        tail = pending[pos:]
+        if not self._is_sealed(segment):
+            return shipped, False
+        if tail.strip():
+            # Torn write from a crashed hook: nothing more will be appended
+            self._dead_letter(tail, "truncated record")
+        for path in (segment, self._ack_path(segment)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return shipped, True
+
+    def drain_once(self) -> int:
+        """
+        Ship everything currently queued.
+
+        Returns:
+            Number of events shipped.
+
+        Raises:
+            RetryableError: bridge unavailable; remaining events stay queued.
+        """
+        shipped = 0
+        for segment in self.segments():
+            count, _ = self._drain_segment(segment)
+            shipped += count
+        return shipped
+
+    def run_forever(self, interval: float = 1.0, max_backoff: float = 60.0):
+        """Drain continuously, backing off exponentially while the bridge is down."""
+        backoff = interval
+        while True:
+            try:
+                self.drain_once()
+                backoff = interval
+            except RetryableError as e:
+                self._log(f"bridge unavailable: {e} (retry in {backoff:.0f}s)")
+                backoff = min(backoff * 2, max_backoff)
+            except Exception as e:
+                self._log(f"drain error: {e}")
+            time.sleep(backoff)
+
+    def status(self) -> Dict[str, Any]:
+        """Return queued segment count and approximate pending bytes."""
+        segments = self.segments()
+        pending = 0
+        for segment in segments:
+            try:
+                pending += max(0, segment.stat().st_size - self._read_ack(segment))
+            except OSError:
+                pass
+        dead = self.root / DEAD_LETTER_FILE
+        return {
+            "outbox_dir": str(self.root),
+            "segments": len(segments),
+            "pending_bytes": pending,
+            "dead_letter_bytes": dead.stat().st_size if dead.exists() else 0
+        }
+
+
+def acquire_drainer_lock(root: Path):
+    """
+    Take an exclusive lock so only one drainer ships a given outbox.
+
+    Returns:
+        Open lock file handle (keep it alive), or None if another drainer holds it.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    handle = open(root / "drainer.lock", "a")
+    try:
+        import fcntl
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        pass  # No advisory locks on this platform; run unguarded
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def build_drainer(log_file=None) -> OutboxDrainer:
+    """Build a drainer from ZO_* environment configuration."""
+    return OutboxDrainer(
+        get_outbox_dir(),
+        endpoint=os.getenv("ZO_EVENT_ENDPOINT", "http://localhost:9000/ingest"),
+        api_key=os.getenv("ZO_API_KEY"),
+        log_file=log_file
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Claude Code hook event outbox")
+    sub = parser.add_subparsers(dest="command", required=True)
+    drain = sub.add_parser("drain", help="Ship queued events to the bridge")
+    drain.add_argument("--once", action="store_true", help="Drain once and exit")
+    drain.add_argument("--interval", type=float, default=1.0, help="Poll interval in seconds")
+    sub.add_parser("status", help="Show queued events")
+    args = parser.parse_args()
+
+    drainer = build_drainer()
+
+    if args.command == "status":
+        print(json.dumps(drainer.status(), indent=2))
+        return
+
+    lock = acquire_drainer_lock(drainer.root)
+    if lock is None:
+        print("[outbox] another drainer is already running", file=sys.stderr)
+        sys.exit(1)
+    preload_json()
+
+    if args.once:
+        try:
+            shipped = drainer.drain_once()
+        except RetryableError as e:
+            print(f"[outbox] bridge unavailable: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[outbox] shipped {shipped} event(s)")
+        return
+
+    try:
+        drainer.run_forever(interval=args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
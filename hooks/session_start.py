@@ -7,68 +7,55 @@ import sys
 import os
 import json
 
+if __name__ == "__main__":
+    # Hand stdin to the resident hook daemon when one is listening; returns
+    # here (before the heavier imports below) only if it is not running.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from hook_daemon import forward_or_continue
+    forward_or_continue("session_start")
+
+
 # Import shared event utilities
 try:
     from event_utils import (
         build_event_envelope,
-        generate_run_id,
-        utc_now_iso
+        generate_run_id
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from event_utils import (
         build_event_envelope,
-        generate_run_id,
-        utc_now_iso
+        generate_run_id
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 
-try:
-    import urllib.request
-    import urllib.error
-except ImportError:
-    urllib = None
 
 from pathlib import Path
 
 
-def send_http_event(endpoint: str, event: dict, max_retries: int = 3):
-    """POST event to HTTP endpoint with retry."""
-    if not endpoint or not urllib:
-        return
-
-    data = json.dumps(event).encode("utf-8")
-    headers = {"Content-Type": "application/json"}
-    if api_key := os.getenv("ZO_API_KEY"):
-        headers["X-API-Key"] = api_key
-    
-    for attempt in range(max_retries):
-        try:
-            req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-            timeout = 2.0 * (2 ** attempt)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status in (200, 201, 202):
-                    return
-        except Exception as e:
-            if attempt == max_retries - 1:
-                print(f"[session_start] HTTP error: {e}", file=sys.stderr)
-
-
 def append_local_log(log_dir: Path, event: dict):
-    """Append event to daily JSONL log."""
+    """Append event to the current local log segment."""
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
-        day = utc_now_iso()[:10].replace('-', '')
-        log_file = log_dir / f"events-{day}.jsonl"
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        EventLog(log_dir, "events").append(event)
     except Exception as e:
         print(f"[session_start] file log error: {e}", file=sys.stderr)
 
 
 def main():
     """Main hook entry point."""
+    timer = HookTimer("session_start", script=__name__ == "__main__")
     try:
-        input_data = json.load(sys.stdin)
+        with timer.phase("stdin"):
+            input_data = json_load(sys.stdin)
     except Exception as e:
         print(f"[session_start] invalid JSON on stdin: {e}", file=sys.stderr)
         sys.exit(1)
@@ -80,31 +67,35 @@ def main():
     os.environ["CLAUDE_RUN_ID"] = run_id
     
     # Build event
-    event = build_event_envelope(
-        event_type="session_start",
-        session_id=session_id,
-        run_id=run_id,
-        level="info",
-        hook_event_name="SessionStart",
-        msg=f"Session started: {session_id}",
-        data={
-            "user": os.getenv("USER") or os.getenv("USERNAME"),
-            "claude_version": input_data.get("claude_version"),
-            "workspace": input_data.get("cwd")
-        },
-        agent_role="conductor",
-        cwd=input_data.get("cwd"),
-        redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict")
-    )
+    with timer.phase("envelope"):
+        event = build_event_envelope(
+            event_type="session_start",
+            session_id=session_id,
+            run_id=run_id,
+            level="info",
+            hook_event_name="SessionStart",
+            msg=f"Session started: {session_id}",
+            data={
+                "user": os.getenv("USER") or os.getenv("USERNAME"),
+                "claude_version": input_data.get("claude_version"),
+                "workspace": input_data.get("cwd")
+            },
+            agent_role="conductor",
+            cwd=input_data.get("cwd"),
+            redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict"),
+            timings=timer.detail
+        )
 
     # Log locally
     log_root = os.getenv("ZO_EVENT_LOG_DIR", os.path.expanduser("~/.zo/claude-events"))
-    append_local_log(Path(log_root), event)
+    with timer.phase("local_log"):
+        append_local_log(Path(log_root), event)
 
-    # Send to bridge (hardcoded endpoint)
+    # Send to bridge (hardcoded endpoint), or queue it in the outbox
     endpoint = os.getenv("ZO_EVENT_ENDPOINT", "http://localhost:9000/ingest")
-    if endpoint:
-        send_http_event(endpoint, event)
+    with timer.phase("send"):
+        if endpoint and not enqueue_event(event):
+            send_event(endpoint, event)
 
     # Output context injection
     output = {
@@ -118,6 +109,7 @@ def main():
     }
     print(json.dumps(output))
 
+    timer.finish("SessionStart")
     sys.exit(0)
 
 
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport from hooks (and the outbox drainer) to the bridge.
+
+- Deadline: one wall-clock budget per event (ZO_SEND_DEADLINE, default 3s)
+  covers blob uploads, the POST and every retry, instead of per-attempt
+  timeouts that add up.
+- Circuit breaker: after ZO_BREAKER_FAILURES consecutive failed sends
+  (default 3) to a bridge, every hook process skips HTTP for
+  ZO_BREAKER_COOLDOWN seconds (default 30); the event is already in the
+  local log. State is shared through a small JSON file
+  (ZO_BREAKER_FILE, default ~/.zo/bridge-breaker.json). After the
+  cool-off sends go through again: a success closes the circuit, a
+  failure re-opens it at once.
+- Keep-alive: connections are pooled per host, so a long-lived process
+  (hook daemon, drainer) reuses them across events, and one hook run uses
+  a single connection for its blob uploads and its POST.
+- Unix sockets: with a co-located bridge listening on BRIDGE_UNIX_SOCKET,
+  ZO_EVENT_ENDPOINT=unix:///run/zo/bridge.sock speaks the same HTTP over
+  the socket, skipping TCP loopback. The HTTP path follows the first
+  "*.sock" component (unix:///run/zo/bridge.sock/ingest/batch) and
+  defaults to /ingest. If the socket is missing or nothing listens on it
+  and ZO_UNIX_FALLBACK_URL names the bridge's TCP base URL
+  (http://localhost:9000), the request is sent there instead.
+- Wire format (opt-in): ZO_WIRE_ENCODING=gzip|zstd compresses bodies over
+  ZO_WIRE_MIN_BYTES (default 1024) and asks for compressed responses;
+  ZO_WIRE_FORMAT=msgpack|cbor sends events in a binary encoding. Both need
+  a bridge that negotiates them (and the msgpack / cbor2 / zstandard
+  package); a bridge that rejects an encoded body gets it again as plain
+  JSON, and one that refuses the encoding itself gets plain JSON for
+  ZO_WIRE_DOWNGRADE_SECONDS (default 600).
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import http.client
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from blob_store import upload_event_blobs
+    from event_utils import encode_event
+    from fast_json import loads
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from blob_store import upload_event_blobs
+    from event_utils import encode_event
+    from fast_json import loads
+
+DEFAULT_DEADLINE_SECONDS = 3.0
+DEFAULT_BREAKER_FAILURES = 3
+DEFAULT_BREAKER_COOLDOWN = 30.0
+DEFAULT_BREAKER_FILE = os.path.expanduser("~/.zo/bridge-breaker.json")
+MAX_IDLE_PER_HOST = 4
+RETRY_BACKOFF_SECONDS = 0.1  # Doubles per attempt, capped by the deadline
+UNIX_SCHEME = "unix"
+UNIX_DEFAULT_PATH = "/ingest"
+DEFAULT_WIRE_MIN_BYTES = 1024
+DEFAULT_WIRE_DOWNGRADE_SECONDS = 600.0
+WIRE_CONTENT_TYPES = {"msgpack": "application/msgpack", "cbor": "application/cbor"}
+JSON_CONTENT_TYPES = ("application/json", "application/x-ndjson")
+
+
+class TransportError(Exception):
+    """Request failed: connection error, timeout or spent deadline."""
+
+
+class HTTPStatusError(TransportError):
+    """Bridge answered with a status outside 2xx."""
+
+    def __init__(self, code: int, reason: str, body: bytes = b""):
+        super().__init__(f"HTTP {code}: {reason}")
+        self.code = code
+        self.reason = reason
+        self.body = body
+
+
+class Deadline:
+    """Wall-clock budget shared by every step of one send."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        if seconds is None:
+            seconds = float(os.getenv("ZO_SEND_DEADLINE", DEFAULT_DEADLINE_SECONDS))
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker shared across processes through a JSON file
+    of {bridge: {"failures": n, "open_until": epoch}}.
+    """
+
+    def __init__(self, path: Optional[Path] = None, failures: Optional[int] = None,
+                 cooldown: Optional[float] = None):
+        self.path = Path(os.path.expanduser(path or os.getenv("ZO_BREAKER_FILE") or DEFAULT_BREAKER_FILE))
+        self.failures = failures or int(os.getenv("ZO_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES))
+        self.cooldown = cooldown if cooldown is not None else float(
+            os.getenv("ZO_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN))
+
+    def _read(self) -> Dict[str, Dict[str, float]]:
+        try:
+            state = json.loads(self.path.read_bytes())
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _update(self, key: str, failed: bool):
+        """Read-modify-write under an exclusive lock."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock:
+                try:
+                    import fcntl
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                except ImportError:
+                    pass  # No advisory locks on this platform; last writer wins
+                state = self._read()
+                entry = state.get(key) or {"failures": 0, "open_until": 0}
+                if failed:
+                    entry["failures"] = entry.get("failures", 0) + 1
+                    if entry["failures"] >= self.failures:
+                        entry["open_until"] = time.time() + self.cooldown
+                else:
+                    entry = {"failures": 0, "open_until": 0}
+                state[key] = entry
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(state))
+                os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[transport] could not update breaker state: {e}", file=sys.stderr)
+
+    def allow(self, key: str) -> bool:
+        """False while the circuit for `key` is open."""
+        entry = self._read().get(key)
+        return not entry or entry.get("open_until", 0) <= time.time()
+
+    def record_success(self, key: str):
+        if (self._read().get(key) or {}).get("failures"):
+            self._update(key, failed=False)
+
+    def record_failure(self, key: str):
+        self._update(key, failed=True)
+
+
+def split_unix_url(url: str) -> Tuple[str, str]:
+    """(socket path, HTTP path) of a unix:// endpoint."""
+    path = urlsplit(url).path
+    parts = path.split("/")
+    for i, part in enumerate(parts):
+        if part.endswith(".sock"):
+            rest = "/".join(parts[i + 1:])
+            return "/".join(parts[:i + 1]), f"/{rest}" if rest else UNIX_DEFAULT_PATH
+    return path, UNIX_DEFAULT_PATH
+
+
+def breaker_key(url: str) -> str:
+    """Breaker state is per bridge (scheme + host or socket), not per path."""
+    parts = urlsplit(url)
+    if parts.scheme == UNIX_SCHEME:
+        return f"{UNIX_SCHEME}://{split_unix_url(url)[0]}"
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+# -- connection pool ---------------------------------------------------------
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+_pool: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+_pool_lock = threading.Lock()
+
+
+def _checkout(scheme: str, address: str, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+    """Idle pooled connection (reused=True) or a new one."""
+    with _pool_lock:
+        idle = _pool.get((scheme, address))
+        conn = idle.pop() if idle else None
+    if conn is not None:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+    if scheme == "https":
+        return http.client.HTTPSConnection(address, timeout=timeout), False
+    if scheme == "http":
+        return http.client.HTTPConnection(address, timeout=timeout), False
+    if scheme == UNIX_SCHEME:
+        return UnixHTTPConnection(address, timeout=timeout), False
+    raise TransportError(f"unsupported endpoint scheme: {scheme}")
+
+
+def _checkin(scheme: str, address: str, conn: http.client.HTTPConnection):
+    with _pool_lock:
+        idle = _pool.setdefault((scheme, address), [])
+        if len(idle) < MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def request(method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None,
+            deadline: Optional[Deadline] = None) -> bytes:
+    """
+    One HTTP request on a pooled connection, bounded by the deadline
+    (each socket operation gets the remaining budget).
+
+    Returns:
+        Response body for 2xx statuses
+
+    Raises:
+        HTTPStatusError: non-2xx status
+        TransportError: connection failure, timeout or spent deadline
+    """
+    deadline = deadline or Deadline()
+    parts = urlsplit(url)
+    if parts.scheme == UNIX_SCHEME:
+        address, target = split_unix_url(url)  # Pooled by socket path
+    else:
+        address, target = parts.netloc, parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+
+    # A pooled connection the server already closed fails on first use;
+    # retry such a request once on a fresh connection
+    for _ in range(2):
+        if deadline.expired:
+            raise TransportError("deadline exceeded")
+        conn, reused = _checkout(parts.scheme, address, deadline.remaining())
+        try:
+            conn.request(method, target, body=body, headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+            conn.close()
+            if reused:
+                continue
+            raise TransportError(str(e)) from e
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            fallback = os.getenv("ZO_UNIX_FALLBACK_URL", "")
+            if (parts.scheme == UNIX_SCHEME and isinstance(e, (FileNotFoundError, ConnectionRefusedError))
+                    and urlsplit(fallback).scheme in ("http", "https")):
+                # No bridge on the socket (not started with BRIDGE_UNIX_SOCKET): use TCP
+                return request(method, fallback.rstrip("/") + target, body, headers, deadline)
+            raise TransportError(str(e) or type(e).__name__) from e
+
+        if response.will_close:
+            conn.close()
+        else:
+            _checkin(parts.scheme, address, conn)
+        if 200 <= response.status < 300:
+            return _decompress(data, response.getheader("Content-Encoding"))
+        raise HTTPStatusError(response.status, response.reason, data)
+    raise TransportError("connection closed by bridge")
+
+
+def close_connections():
+    """Drop every pooled connection."""
+    with _pool_lock:
+        idle = [conn for conns in _pool.values() for conn in conns]
+        _pool.clear()
+    for conn in idle:
+        conn.close()
+
+
+# -- wire format -------------------------------------------------------------
+
+_plain_bridges: Dict[str, float] = {}  # Bridge -> monotonic time its plain-JSON downgrade ends
+
+
+def wire_settings() -> Tuple[Optional[str], Optional[str]]:
+    """
+    (binary format, compression) from ZO_WIRE_FORMAT / ZO_WIRE_ENCODING,
+    dropping either when its package is not installed.
+    """
+    wire_format = os.getenv("ZO_WIRE_FORMAT", "json").lower()
+    encoding = os.getenv("ZO_WIRE_ENCODING", "identity").lower()
+    if wire_format not in WIRE_CONTENT_TYPES or not _module(wire_format if wire_format == "msgpack" else "cbor2"):
+        wire_format = None
+    if encoding not in ("gzip", "zstd") or (encoding == "zstd" and not _module("zstandard")):
+        encoding = None
+    return wire_format, encoding
+
+
+def _module(name: str):
+    """Optional codec package, imported on first use; None if missing."""
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+def _decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "gzip":
+        import gzip
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        return _module("zstandard").ZstdDecompressor().decompress(data, max_output_size=64 * 1024 * 1024)
+    return data
+
+
+def encode_body(body: bytes, content_type: str, value: Any = None) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Apply the configured wire format to a request body.
+
+    Args:
+        body: JSON / NDJSON (or opaque, e.g. blob) bytes
+        content_type: Type of `body`
+        value: Decoded event(s) for binary formats; decoded from `body`
+            when omitted
+
+    Returns:
+        (body, headers) with Content-Type and, if used, Content-Encoding
+    """
+    headers = {"Content-Type": content_type}
+    wire_format, encoding = wire_settings()
+    if wire_format and content_type in JSON_CONTENT_TYPES:
+        if value is None:
+            value = loads(body) if content_type == "application/json" else [
+                loads(line) for line in body.splitlines() if line.strip()]
+        if wire_format == "msgpack":
+            body = _module("msgpack").packb(value, use_bin_type=True)
+        else:
+            body = _module("cbor2").dumps(value)
+        headers["Content-Type"] = WIRE_CONTENT_TYPES[wire_format]
+    if encoding:
+        headers["Accept-Encoding"] = encoding
+        min_bytes = int(os.getenv("ZO_WIRE_MIN_BYTES", DEFAULT_WIRE_MIN_BYTES))
+        if len(body) >= min_bytes:
+            if encoding == "zstd":
+                body = _module("zstandard").ZstdCompressor(level=3).compress(body)
+            else:
+                import gzip
+                body = gzip.compress(body, compresslevel=6, mtime=0)
+            headers["Content-Encoding"] = encoding
+    return body, headers
+
+
+def refuses_encoding(error: HTTPStatusError, wire_headers: Dict[str, str]) -> bool:
+    """
+    True if the bridge said it cannot read the encoded body: a 415, or a
+    400 whose reply names the content encoding or format that was sent.
+    """
+    if error.code == 415:
+        return True
+    if error.code != 400:
+        return False
+    reply = error.body.decode("utf-8", errors="replace").lower()
+    sent = [wire_headers.get("Content-Encoding", ""), wire_headers["Content-Type"].split("/")[-1],
+            "content-encoding", "content-type"]
+    return any(name and name.lower() in reply for name in sent)
+
+
+def send_body(method: str, url: str, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None,
+              deadline: Optional[Deadline] = None, value: Any = None) -> bytes:
+    """
+    request() with the configured wire format (see encode_body()).
+
+    An encoded body answered 400, 415 or 500 (older bridges fail to parse
+    it one of these ways) is retried once as plain JSON. Only a refusal
+    that is about the encoding (see refuses_encoding()) keeps later bodies
+    for that bridge plain, and only for ZO_WIRE_DOWNGRADE_SECONDS (default
+    600), so an upgraded bridge or a one-off error does not disable the
+    wire format for good.
+    """
+    key = breaker_key(url)
+    plain_headers = dict(headers or {}, **{"Content-Type": content_type})
+    if _plain_bridges.get(key, 0) > time.monotonic():
+        return request(method, url, body, plain_headers, deadline)
+    encoded, wire_headers = encode_body(body, content_type, value)
+    if "Content-Encoding" not in wire_headers and wire_headers["Content-Type"] == content_type:
+        return request(method, url, body, dict(plain_headers, **wire_headers), deadline)
+    try:
+        return request(method, url, encoded, dict(plain_headers, **wire_headers), deadline)
+    except HTTPStatusError as e:
+        if e.code not in (400, 415, 500):
+            raise
+        reply = request(method, url, body, plain_headers, deadline)
+        if refuses_encoding(e, wire_headers):
+            seconds = float(os.getenv("ZO_WIRE_DOWNGRADE_SECONDS", DEFAULT_WIRE_DOWNGRADE_SECONDS))
+            _plain_bridges[key] = time.monotonic() + seconds
+            print(f"[transport] {key} refused {wire_headers['Content-Type']} "
+                  f"{wire_headers.get('Content-Encoding', '')}; sending plain JSON for {seconds:g}s", file=sys.stderr)
+        return reply
+
+
+# -- event delivery ----------------------------------------------------------
+
+def send_event(endpoint: str, event: Dict[str, Any], deadline: Optional[Deadline] = None,
+               api_key: Optional[str] = None, breaker: Optional[CircuitBreaker] = None) -> bool:
+    """
+    Upload the event's blobs and POST it, retrying until the deadline.
+
+    A 409 (duplicate) counts as delivered. Other 4xx answers are not
+    retried and do not trip the breaker: the bridge is up, it just refused
+    this event.
+
+    Returns:
+        True if the bridge has the event; False if it was skipped (open
+        circuit) or could not be delivered in time
+    """
+    if not endpoint:
+        return False
+    deadline = deadline or Deadline()
+    breaker = breaker or CircuitBreaker()
+    key = breaker_key(endpoint)
+    if not breaker.allow(key):
+        return False
+
+    headers = {}
+    if api_key is None:
+        api_key = os.getenv("ZO_API_KEY")
+    if api_key:
+        headers["X-API-Key"] = api_key
+
+    # Payload fields offloaded to the blob store go first, so the bridge
+    # can serve every reference the event carries
+    upload_event_blobs(endpoint, event, api_key=api_key, deadline=deadline)
+    data = encode_event(event)
+
+    attempt = 0
+    while True:
+        try:
+            send_body("POST", endpoint, data, "application/json", headers, deadline, value=event)
+            breaker.record_success(key)
+            return True
+        except HTTPStatusError as e:
+            if e.code == 409:
+                breaker.record_success(key)
+                return True
+            print(f"[transport] {e} (attempt {attempt + 1})", file=sys.stderr)
+            if 400 <= e.code < 500 and e.code not in (408, 429):
+                return False
+        except TransportError as e:
+            print(f"[transport] {e} (attempt {attempt + 1})", file=sys.stderr)
+
+        pause = RETRY_BACKOFF_SECONDS * (2 ** attempt)
+        if deadline.remaining() <= pause:
+            breaker.record_failure(key)
+            return False
+        time.sleep(pause)
+        attempt += 1
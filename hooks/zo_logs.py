@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+zo-logs: query the local hook event logs (see event_log.py).
+
+Filters by time range, run/session/worker, event_type, level, tool_name
+and a substring of indexable_text, and streams matches as NDJSON (the
+original log lines) or a table, oldest first.
+
+Segments are searched in parallel, one pool task per segment. A segment
+with a sidecar index (log_index.py) answers run/session/event_type/
+tool_name filters from its offsets; otherwise the segment is mmap'd and
+searched for the most selective filter as a literal with bytes.find, so
+only candidate lines are JSON-decoded. Segments outside the time range
+are skipped by file name (day) and by the index's ts min/max.
+
+Usage:
+    zo-logs --since 24h --event-type error
+    zo-logs --run-id 6b0c... --format table
+    zo-logs --since 2024-10-01 --until 2024-11-01 --tool-name Bash --text pytest
+"""
+import os
+import re
+import sys
+import json
+import mmap
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from event_log import DEFAULT_LOG_DIR, Segment, list_segments, open_segment, parse_segment
+    from log_index import INDEX_FIELDS, SegmentIndex, index_path
+    from fast_json import loads, preload as preload_json
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from event_log import DEFAULT_LOG_DIR, Segment, list_segments, open_segment, parse_segment
+    from log_index import INDEX_FIELDS, SegmentIndex, index_path
+    from fast_json import loads, preload as preload_json
+
+FIELD_FILTERS = ("run_id", "session_id", "worker_id", "event_type", "level", "tool_name")
+RELATIVE_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhdw])$')
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+TS_KEY = b'"ts": "'
+FOLD_CHUNK = 1 << 20  # Bytes lower-cased at a time for case-insensitive search
+
+
+def parse_time(value: str, now: Optional[datetime] = None) -> str:
+    """
+    Normalize a time bound to the envelope ts format for string comparison.
+
+    Accepts RFC3339 / ISO dates ("2024-10-17", "2024-10-17T09:00:00Z") and
+    relative ages ("90m", "24h", "7d", "2w" ago).
+    """
+    now = now or datetime.now(timezone.utc)
+    if match := RELATIVE_RE.match(value.strip()):
+        moment = now - timedelta(seconds=float(match[1]) * UNIT_SECONDS[match[2]])
+    else:
+        moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _needle(field: str, value: str) -> bytes:
+    """Bytes a log line contains when `field` equals `value` (json.dumps default separators)."""
+    return f'"{field}": {json.dumps(value, ensure_ascii=False)}'.encode("utf-8")
+
+
+class Query:
+    """Filters for one search; picklable so pool workers receive it."""
+
+    def __init__(self, since: Optional[str] = None, until: Optional[str] = None,
+                 text: Optional[str] = None, ignore_case: bool = False, **fields: Optional[str]):
+        self.since = since
+        self.until = until
+        self.text = text
+        self.ignore_case = ignore_case
+        self.fields = {k: v for k, v in fields.items() if v is not None}
+
+        # Literal that every matching line contains, most selective first
+        self.needles: List[bytes] = []
+        for field in ("run_id", "session_id", "worker_id", "tool_name"):
+            if field in self.fields:
+                self.needles.append(_needle(field, self.fields[field]))
+        if text and not ignore_case:
+            self.needles.append(json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8"))
+        for field in ("event_type", "level"):
+            if field in self.fields:
+                self.needles.append(_needle(field, self.fields[field]))
+        # Case-insensitive text is located in lower-cased chunks (ASCII folding keeps offsets)
+        self.folded_needle = None
+        if text and ignore_case and text.isascii():
+            self.folded_needle = json.dumps(text)[1:-1].lower().encode("ascii")
+
+    def day_range(self) -> Tuple[Optional[str], Optional[str]]:
+        """YYYYMMDD bounds for segment file names."""
+        return (self.since[:10].replace("-", "") if self.since else None,
+                self.until[:10].replace("-", "") if self.until else None)
+
+    def ts_ok(self, ts: str) -> bool:
+        return not ((self.since and ts < self.since) or (self.until and ts >= self.until))
+
+    def line_ts_ok(self, line: bytes) -> bool:
+        """Time check on the raw line, before decoding it."""
+        if not (self.since or self.until):
+            return True
+        start = line.find(TS_KEY)
+        if start < 0:
+            return True  # Let the decoded check decide
+        start += len(TS_KEY)
+        end = line.find(b'"', start)
+        return self.ts_ok(line[start:end].decode("ascii", "replace"))
+
+    def matches(self, event: Any) -> bool:
+        if not isinstance(event, dict):
+            return False
+        for field, value in self.fields.items():
+            if event.get(field) != value:
+                return False
+        if (self.since or self.until) and not self.ts_ok(event.get("ts") or ""):
+            return False
+        if self.text:
+            haystack = event.get("indexable_text") or ""
+            if self.ignore_case:
+                return self.text.lower() in haystack.lower()
+            return self.text in haystack
+        return True
+
+
+def _check_line(query: Query, line: bytes) -> bool:
+    if not query.line_ts_ok(line):
+        return False
+    try:
+        return query.matches(loads(line))
+    except ValueError:
+        return False
+
+
+class _FoldedFinder:
+    """
+    find() for an ASCII needle in a buffer lower-cased FOLD_CHUNK bytes at
+    a time, so a case-insensitive search never copies the whole mmap.
+    """
+
+    def __init__(self, buf, needle: bytes):
+        self.buf = buf
+        self.overlap = len(needle) - 1  # A match may straddle two chunks
+        self.base = -FOLD_CHUNK  # No chunk folded yet
+
+    def find(self, needle: bytes, start: int = 0) -> int:
+        size = len(self.buf)
+        while start < size:
+            if not self.base <= start < self.base + FOLD_CHUNK:
+                self.base = start
+                self.folded = self.buf[start:start + FOLD_CHUNK + self.overlap].lower()
+            pos = self.folded.find(needle, start - self.base)
+            if pos >= 0:
+                return self.base + pos
+            start = self.base + FOLD_CHUNK
+        return -1
+
+
+def _scan_buffer(query: Query, buf) -> List[bytes]:
+    """Matching lines of a buffer (bytes or mmap), located with find()."""
+    results = []
+    size = len(buf)
+    if query.needles or query.folded_needle:
+        if query.needles:
+            needle, others = query.needles[0], query.needles[1:]
+            locate = buf.find
+        else:
+            needle, others = query.folded_needle, ()
+            locate = _FoldedFinder(buf, needle).find
+        pos = locate(needle)
+        while pos >= 0:
+            start = buf.rfind(b"\n", 0, pos) + 1
+            end = buf.find(b"\n", pos)
+            if end < 0:
+                break  # Torn trailing write
+            line = buf[start:end + 1]
+            if all(n in line for n in others) and _check_line(query, line):
+                results.append(line)
+            pos = locate(needle, end + 1)
+        return results
+
+    start = 0
+    while start < size:
+        end = buf.find(b"\n", start)
+        if end < 0:
+            break
+        line = buf[start:end + 1]
+        if _check_line(query, line):
+            results.append(line)
+        start = end + 1
+    return results
+
+
+def search_segment(args: Tuple[str, Query]) -> List[bytes]:
+    """Matching lines of one segment (runs in a pool worker)."""
+    path, query = args
+    preload_json()
+    segment = parse_segment(Path(path))
+    if segment is None:
+        return []
+
+    indexed = {k: v for k, v in query.fields.items() if k in INDEX_FIELDS}
+    if indexed or query.since or query.until:
+        if index_path(segment).exists():
+            index = SegmentIndex(segment)
+            try:
+                index.refresh()
+            except OSError:
+                return []
+            if not index.overlaps(query.since, query.until):
+                return []
+            offsets = index.lookup(**indexed)
+            if offsets is not None:
+                return [line for line in index.read_lines(offsets) if _check_line(query, line)]
+
+    try:
+        if segment.compression:
+            with open_segment(segment.path) as f:
+                return _scan_buffer(query, f.read())
+        with open(segment.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _scan_buffer(query, buf)
+    except (OSError, RuntimeError) as e:
+        print(f"[zo-logs] skipping {segment.path.name}: {e}", file=sys.stderr)
+        return []
+
+
+def select_segments(root: Path, prefix: Optional[str], query: Query) -> List[Segment]:
+    since_day, until_day = query.day_range()
+    return [s for s in list_segments(root, prefix)
+            if not (since_day and s.day < since_day) and not (until_day and s.day > until_day)]
+
+
+def search(root: Path, query: Query, prefix: Optional[str] = "events", workers: Optional[int] = None) -> Iterator[bytes]:
+    """Matching log lines, oldest segment first, searched `workers` segments at a time."""
+    segments = select_segments(root, prefix, query)
+    tasks = [(str(s.path), query) for s in segments]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            yield from search_segment(task)
+        return
+
+    from multiprocessing import Pool
+    with Pool(workers) as pool:
+        for lines in pool.imap(search_segment, tasks):
+            yield from lines
+
+
+def format_row(event: Dict[str, Any]) -> str:
+    text = (event.get("indexable_text") or event.get("msg") or "").replace("\n", " ")
+    return (f"{event.get('ts', ''):<25} {event.get('event_type', ''):<16} {event.get('level', ''):<6} "
+            f"{(event.get('session_id') or '')[:12]:<12} {(event.get('tool_name') or '')[:20]:<20} {text[:80]}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="zo-logs", description="Query the local hook event logs")
+    parser.add_argument("--dir", default=os.getenv("ZO_EVENT_LOG_DIR", DEFAULT_LOG_DIR), help="Log directory")
+    parser.add_argument("--prefix", default="events", help="Segment prefix: events, mcp, or all")
+    parser.add_argument("--since", help="Start (RFC3339, YYYY-MM-DD, or age such as 24h / 7d)")
+    parser.add_argument("--until", help="End, exclusive (same formats)")
+    for field in FIELD_FILTERS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    parser.add_argument("--text", help="Substring of indexable_text")
+    parser.add_argument("-i", "--ignore-case", action="store_true", help="Case-insensitive --text")
+    parser.add_argument("--format", choices=("ndjson", "table"), default="ndjson")
+    parser.add_argument("--limit", type=int, help="Stop after N matches")
+    parser.add_argument("--workers", type=int, help="Parallel segment scans (default: CPU count)")
+    args = parser.parse_args()
+
+    query = Query(
+        since=parse_time(args.since) if args.since else None,
+        until=parse_time(args.until) if args.until else None,
+        text=args.text,
+        ignore_case=args.ignore_case,
+        **{field: getattr(args, field) for field in FIELD_FILTERS}
+    )
+    root = Path(os.path.expanduser(args.dir))
+    prefix = None if args.prefix == "all" else args.prefix
+
+    preload_json()
+    out = sys.stdout.buffer
+    if args.format == "table":
+        out.write(f"{'ts':<25} {'event_type':<16} {'level':<6} {'session':<12} {'tool':<20} text\n".encode())
+    count = 0
+    try:
+        for line in search(root, query, prefix, args.workers):
+            if args.format == "table":
+                out.write((format_row(loads(line)) + "\n").encode("utf-8"))
+            else:
+                out.write(line)
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+        out.flush()
+    except BrokenPipeError:
+        # Output piped into head & co.; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+if __name__ == "__main__":
+    main()
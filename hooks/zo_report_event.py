@@ -7,6 +7,14 @@ Uses canonical schema v1.0 via event_utils module.
 import sys
 import os
 import json
+
+if __name__ == "__main__":
+    # Hand stdin to the resident hook daemon when one is listening; returns
+    # here (before the heavier imports below) only if it is not running.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from hook_daemon import forward_or_continue
+    forward_or_continue("zo_report_event")
+
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -14,88 +22,46 @@ from typing import Any, Dict, Optional
 try:
     from event_utils import (
         build_event_envelope,
-        get_run_id_from_env_or_generate,
-        utc_now_iso
+        get_run_id_from_env_or_generate
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 except ImportError:
     # Fallback if event_utils not in path
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from event_utils import (
         build_event_envelope,
-        get_run_id_from_env_or_generate,
-        utc_now_iso
+        get_run_id_from_env_or_generate
     )
+    from event_log import EventLog
+    from outbox import enqueue_event
+    from transport import send_event
+    from hook_timing import HookTimer
+    from fast_json import load as json_load
 
-try:
-    import urllib.request
-    import urllib.error
-except ImportError:
-    urllib = None  # Very unlikely, but be defensive
 
 
 def safe_get(d: Dict[str, Any], key: str, default=None):
     return d.get(key, default)
 
 
-def send_http_event(endpoint: str, event: Dict[str, Any], max_retries: int = 3):
-    """
-    POST event to HTTP endpoint with exponential backoff retry.
-    
-    Args:
-        endpoint: HTTP(S) URL
-        event: Event envelope to send
-        max_retries: Maximum retry attempts
-    """
-    if not endpoint or not urllib:
-        return
-
-    data = json.dumps(event).encode("utf-8")
-    
-    # Add API key if configured
-    headers = {"Content-Type": "application/json"}
-    if api_key := os.getenv("ZO_API_KEY"):
-        headers["X-API-Key"] = api_key
-    
-    for attempt in range(max_retries):
-        try:
-            req = urllib.request.Request(
-                endpoint,
-                data=data,
-                headers=headers,
-                method="POST",
-            )
-            timeout = 2.0 * (2 ** attempt)  # Exponential backoff: 2s, 4s, 8s
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status in (200, 201, 202):
-                    return  # Success
-        except urllib.error.HTTPError as e:
-            if e.code == 409:  # Duplicate (idempotent)
-                return
-            print(f"[zo_report_event] HTTP {e.code}: {e.reason} (attempt {attempt+1}/{max_retries})", file=sys.stderr)
-        except Exception as e:
-            print(f"[zo_report_event] HTTP error: {e} (attempt {attempt+1}/{max_retries})", file=sys.stderr)
-        
-        if attempt < max_retries - 1:
-            import time
-            time.sleep(0.5 * (2 ** attempt))  # Sleep before retry: 0.5s, 1s, 2s
-
-
 def append_local_log(log_dir: Path, event: Dict[str, Any]):
-    """Append event to daily JSONL log file."""
+    """Append event to the current local log segment."""
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
-        day = utc_now_iso()[:10].replace('-', '')  # YYYYMMDD
-        log_file = log_dir / f"events-{day}.jsonl"
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        EventLog(log_dir, "events").append(event)
     except Exception as e:
         print(f"[zo_report_event] file log error: {e}", file=sys.stderr)
 
 
 def main():
     """Main hook entry point."""
+    timer = HookTimer("zo_report_event", script=__name__ == "__main__")
     try:
-        input_data = json.load(sys.stdin)
+        with timer.phase("stdin"):
+            input_data = json_load(sys.stdin)
     except Exception as e:
         print(f"[zo_report_event] invalid JSON on stdin: {e}", file=sys.stderr)
         sys.exit(1)
@@ -130,7 +96,7 @@ def main():
         "permission_mode": input_data.get("permission_mode"),
         "notification_type": input_data.get("notification_type"),
         "stop_hook_active": input_data.get("stop_hook_active"),
-        "prompt": input_data.get("prompt", "")[:1000] if input_data.get("prompt") else None  # Truncate
+        "prompt": input_data.get("prompt") or None
     }
     
     # Build message summary
@@ -139,28 +105,33 @@ def main():
         msg = f"{hook_event}: {tool_name}"
     
     # Build canonical event envelope using event_utils
-    event = build_event_envelope(
-        event_type=event_type,
-        session_id=session_id,
-        run_id=run_id,
-        level=level,
-        hook_event_name=hook_event,
-        msg=msg,
-        data=data_payload,
-        tool_name=input_data.get("tool_name"),
-        tool_use_id=input_data.get("tool_use_id"),
-        cwd=cwd,
-        redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict")
-    )
+    with timer.phase("envelope"):
+        event = build_event_envelope(
+            event_type=event_type,
+            session_id=session_id,
+            run_id=run_id,
+            level=level,
+            hook_event_name=hook_event,
+            msg=msg,
+            data=data_payload,
+            tool_name=input_data.get("tool_name"),
+            tool_use_id=input_data.get("tool_use_id"),
+            cwd=cwd,
+            redaction_mode=os.getenv("ZO_REDACTION_MODE", "strict"),
+            timings=timer.detail
+        )
 
     # 1) Local JSONL log
     log_root = os.getenv("ZO_EVENT_LOG_DIR", os.path.expanduser("~/.zo/claude-events"))
-    append_local_log(Path(log_root), event)
+    with timer.phase("local_log"):
+        append_local_log(Path(log_root), event)
 
-    # 2) HTTP endpoint (Chroma bridge - hardcoded default)
+    # 2) HTTP endpoint (Chroma bridge - hardcoded default); queued in the
+    #    outbox instead when ZO_EVENT_DELIVERY=outbox
     endpoint = os.getenv("ZO_EVENT_ENDPOINT", "http://localhost:9000/ingest")
-    if endpoint:
-        send_http_event(endpoint, event)
+    with timer.phase("send"):
+        if endpoint and not enqueue_event(event):
+            send_event(endpoint, event)
 
     # 3) Optional structured output back to Claude Code
     output = None
@@ -203,6 +174,7 @@ def main():
     if output is not None:
         print(json.dumps(output))
 
+    timer.finish(hook_event)
     sys.exit(0)
 
 
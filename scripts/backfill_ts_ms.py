@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Backfill the numeric `ts_ms` metadata field on events stored before it
+was written at ingest.
+
+/query's since/until filters and time ordering work on ts_ms, so events
+without it are invisible to ranged queries. This pages through the
+events and embeddings collections and adds ts_ms (epoch milliseconds of
+the RFC3339 `ts`) wherever it is missing. Only metadata is rewritten;
+documents and embeddings are left alone. Safe to re-run or interrupt:
+rows that already have ts_ms are skipped.
+
+Usage:
+    python scripts/backfill_ts_ms.py [--page-size 500] [--dry-run]
+
+Uses the same environment as chroma_bridge_server_v2.py (CHROMA_DB_PATH,
+USE_CHROMA_CLOUD, CHROMA_TENANT, ...). The bridge may keep running.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bridge_query import TS_FIELD, ts_millis  # noqa: E402
+from migrate_storage_mode import collection_names, connect  # noqa: E402
+
+COLLECTIONS = ("events", "embeddings")
+
+
+def backfill(collection, page_size: int, dry_run: bool):
+    """Add ts_ms page by page; returns (scanned, updated, unparseable)."""
+    scanned = updated = unparseable = 0
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+        ids = page.get("ids") or []
+        if not ids:
+            break
+        update_ids, update_metas = [], []
+        for doc_id, meta in zip(ids, page.get("metadatas") or [{}] * len(ids)):
+            meta = meta or {}
+            if TS_FIELD in meta:
+                continue
+            ts_ms = ts_millis(meta.get("ts"))
+            if ts_ms is None:
+                unparseable += 1
+                continue
+            update_ids.append(doc_id)
+            update_metas.append({**meta, TS_FIELD: ts_ms})
+        if update_ids and not dry_run:
+            collection.update(ids=update_ids, metadatas=update_metas)
+        scanned += len(ids)
+        updated += len(update_ids)
+        offset += len(ids)
+        print(f"  {collection.name}: {scanned} scanned, {updated} updated", end="\r", flush=True)
+    print()
+    return scanned, updated, unparseable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill ts_ms metadata for since/until queries")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only count rows that need ts_ms")
+    args = parser.parse_args()
+
+    client = connect()
+    names = collection_names(client)
+    for name in COLLECTIONS:
+        if name not in names:
+            print(f"[{name}] not present, skipping")
+            continue
+        started = time.time()
+        try:
+            scanned, updated, unparseable = backfill(client.get_collection(name), args.page_size, args.dry_run)
+        except Exception as e:
+            print(f"[{name}] backfill failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        verb = "need" if args.dry_run else "updated"
+        print(f"[{name}] {scanned} rows, {updated} {verb} ts_ms, {unparseable} without a parseable ts "
+              f"({time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -80,8 +80,11 @@ copy_hook() {
 
 HOOKS=(zo_report_event mcp_telemetry session_start worker_spawn artifact_produced error_event)
 
-# Shared utility module
-copy_hook "event_utils"
+# Shared utility modules
+SUPPORT_MODULES=(blob_store event_log event_utils fast_json hook_daemon hook_timing log_index outbox transport zo_logs)
+for module in "${SUPPORT_MODULES[@]}"; do
+  copy_hook "$module"
+done
 
 for hook in "${HOOKS[@]}"; do
   copy_hook "$hook"
@@ -102,7 +105,7 @@ ENV_FILE="$INSTALL_DIR/.env"
 # Wrapper scripts make it easy to reference hooks from Claude's hook config.
 create_wrapper() {
   local name=$1
-  local target="$INSTALL_DIR/bin/${name}"
+  local target="$INSTALL_DIR/bin/${2:-$name}"
   cat <<EOF > "$target"
 #!/usr/bin/env bash
 set -euo pipefail
@@ -115,7 +118,7 @@ if [[ -f "\$ENV_FILE" ]]; then
   set +a
 fi
 PY_BIN="\${PYTHON_BIN:-python3}"
-exec "\$PY_BIN" "\$ROOT_DIR/hooks/${name}.py"
+exec "\$PY_BIN" "\$ROOT_DIR/hooks/${name}.py" "\$@"
 EOF
   chmod +x "$target"
 }
@@ -123,6 +126,7 @@ EOF
 for hook in "${HOOKS[@]}"; do
   create_wrapper "$hook"
 done
+create_wrapper zo_logs zo-logs
 
 cat <<EOF
 ✓ Hooks installed into: $INSTALL_DIR
@@ -140,6 +144,10 @@ Next steps:
        MCP telemetry                → $INSTALL_DIR/bin/mcp_telemetry
   3. Export CLAUDE_RUN_ID in orchestrator processes if you want workers to
      share the same run identifier.
+  4. Optional: keep a resident hook daemon running to skip per-hook Python
+     start-up cost (hooks fall back to in-process when it is not running):
+       ${PYTHON_BIN} $INSTALL_DIR/hooks/hook_daemon.py
+  5. Search the local event log with $INSTALL_DIR/bin/zo-logs --help.
 
 Re-run this script any time you need to update the hooks on a VM.
 EOF
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Check the bridge's ordered events index (bridge_index.py) against Chroma,
+and rebuild it from the events collection with --repair.
+
+Reports events missing from the index, index rows whose event no longer
+exists, and rows whose ts_ms or filter columns differ from the stored
+metadata. Exits 1 if the index is inconsistent and was not repaired.
+
+Usage:
+    python scripts/check_event_index.py [--page-size 1000] [--repair]
+
+Uses the same environment as chroma_bridge_server_v2.py (CHROMA_DB_PATH,
+BRIDGE_EVENT_INDEX, USE_CHROMA_CLOUD, ...). Checking is safe while the
+bridge runs; stop it before --repair, or events ingested during the
+rebuild can be left out (the bridge also rebuilds a stale index when it
+starts).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bridge_index import EventIndex, index_row, scan_collection  # noqa: E402
+from migrate_storage_mode import collection_names, connect  # noqa: E402
+
+SAMPLE = 5  # Differences printed per kind
+
+
+def compare(index: EventIndex, collection, page_size: int):
+    """(missing, extra, mismatched) event ids."""
+    indexed = {row[0]: row for row in index.rows()}
+    missing, mismatched = [], []
+    for ids, metadatas in scan_collection(collection, page_size):
+        for event_id, meta in zip(ids, metadatas):
+            row = indexed.pop(event_id, None)
+            if row is None:
+                missing.append(event_id)
+            elif row != index_row(event_id, meta or {}):
+                mismatched.append(event_id)
+    return missing, list(indexed), mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild the bridge's ordered events index")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repair", action="store_true", help="Rebuild the index from the events collection")
+    args = parser.parse_args()
+
+    path = os.getenv("BRIDGE_EVENT_INDEX", "./bridge_index/events.db")
+    if not path:
+        print("BRIDGE_EVENT_INDEX is empty; the index is disabled")
+        return
+    client = connect()
+    if "events" not in collection_names(client):
+        print("[events] not present, nothing to check")
+        return
+    collection = client.get_collection("events")
+    index = EventIndex(path)
+
+    started = time.time()
+    missing, extra, mismatched = compare(index, collection, args.page_size)
+    print(f"[{path}] {index.count()} rows, {collection.count()} events{' (marked stale)' if index.stale else ''} "
+          f"({time.time() - started:.1f}s)")
+    for label, event_ids in (("missing", missing), ("extra", extra), ("mismatched", mismatched)):
+        sample = ", ".join(event_ids[:SAMPLE]) + (", ..." if len(event_ids) > SAMPLE else "")
+        print(f"  {label}: {len(event_ids)}" + (f" ({sample})" if event_ids else ""))
+    consistent = not (missing or extra or mismatched)
+
+    if args.repair and (not consistent or index.stale):
+        started = time.time()
+        indexed = index.rebuild(scan_collection(collection, args.page_size))
+        print(f"[{path}] rebuilt {indexed} rows ({time.time() - started:.1f}s)")
+    elif not consistent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Migrate bridge collections between storage modes.
+
+"lean" rewrites events/artifacts/agent_state with a fixed placeholder
+vector so the bridge can run with CHROMA_STORAGE_MODE=lean; "full"
+re-embeds them with Chroma's default embedding function. The semantic
+`embeddings` collection is never touched.
+
+Each collection is copied into "<name>__migrating", the original is
+dropped and the copy renamed. Re-running after an interruption resumes
+from whichever step was reached.
+
+Usage:
+    python scripts/migrate_storage_mode.py --mode lean [--dry-run]
+
+Uses the same environment as chroma_bridge_server_v2.py (CHROMA_DB_PATH,
+USE_CHROMA_CLOUD, CHROMA_TENANT, ...). Stop the bridge first.
+"""
+import argparse
+import os
+import sys
+import time
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+import chromadb
+
+COLLECTIONS = ("events", "artifacts", "agent_state")
+TMP_SUFFIX = "__migrating"
+
+
+def connect():
+    """Create a Chroma client with the bridge's configuration."""
+    if os.getenv("USE_CHROMA_CLOUD", "false").lower() == "true":
+        return chromadb.CloudClient(
+            tenant=os.getenv("CHROMA_TENANT", ""),
+            database=os.getenv("CHROMA_DATABASE", ""),
+            api_key=os.getenv("CHROMA_API_KEY", "")
+        )
+    return chromadb.PersistentClient(path=os.getenv("CHROMA_DB_PATH", "./chroma_db"))
+
+
+def collection_names(client) -> set:
+    names = set()
+    for entry in client.list_collections():
+        names.add(entry if isinstance(entry, str) else entry.name)
+    return names
+
+
+def copy_collection(source, target, mode: str, dim: int, page_size: int) -> int:
+    """Copy documents + metadata page by page, setting embeddings for `mode`."""
+    copied = 0
+    offset = 0
+    while True:
+        page = source.get(limit=page_size, offset=offset, include=["documents", "metadatas"])
+        ids = page.get("ids") or []
+        if not ids:
+            break
+        embeddings = [[1.0] * dim for _ in ids] if mode == "lean" else None
+        target.upsert(
+            ids=ids,
+            documents=page.get("documents"),
+            metadatas=page.get("metadatas"),
+            embeddings=embeddings
+        )
+        copied += len(ids)
+        offset += len(ids)
+        print(f"  {source.name}: {copied} rows copied", end="\r", flush=True)
+    print()
+    return copied
+
+
+def migrate(client, name: str, mode: str, dim: int, page_size: int, dry_run: bool):
+    names = collection_names(client)
+    tmp_name = name + TMP_SUFFIX
+
+    if name not in names and tmp_name in names:
+        # Interrupted after dropping the original: finish the rename
+        print(f"[{name}] resuming: renaming {tmp_name} -> {name}")
+        if not dry_run:
+            client.get_collection(tmp_name).modify(name=name)
+        return
+
+    if name not in names:
+        print(f"[{name}] not present, skipping")
+        return
+
+    source = client.get_collection(name)
+    total = source.count()
+    print(f"[{name}] {total} rows -> {mode} storage")
+    if dry_run:
+        return
+
+    if tmp_name in names:
+        client.delete_collection(tmp_name)  # partial copy from an earlier run
+    target = client.create_collection(name=tmp_name, metadata=source.metadata or None)
+
+    started = time.time()
+    copied = copy_collection(source, target, mode, dim, page_size)
+    if copied != total:
+        raise RuntimeError(f"[{name}] copied {copied} rows but source has {total}; original kept")
+
+    client.delete_collection(name)
+    target.modify(name=name)
+    print(f"[{name}] done in {time.time() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate bridge collections between storage modes")
+    parser.add_argument("--mode", choices=("lean", "full"), required=True)
+    parser.add_argument("--dim", type=int, default=int(os.getenv("CHROMA_LEAN_EMBEDDING_DIM", "1")),
+                        help="Placeholder vector size for lean mode")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be migrated")
+    args = parser.parse_args()
+
+    client = connect()
+    for name in COLLECTIONS:
+        try:
+            migrate(client, name, args.mode, args.dim, args.page_size, args.dry_run)
+        except Exception as e:
+            print(f"[{name}] migration failed: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if not args.dry_run:
+        print(f"Migration complete. Start the bridge with CHROMA_STORAGE_MODE={args.mode}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the asyncio serving engine (bridge_async_server.py)
+with a stand-in dispatch(): persistent connections and their idle
+timeout, oversized or stalled request heads, and the 503 answered once
+the worker pool's queue is full.
+"""
+import socket
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bridge_async_server import AsyncBridgeServer  # noqa: E402
+
+KEEPALIVE = 0.5
+release = threading.Event()  # Lets requests to /slow finish
+dispatched = []
+
+
+def dispatch(method, target, headers, read_body, start_time):
+    dispatched.append(target)
+    if target == "/slow":
+        release.wait(10)
+    body = f"{method} {target}".encode()
+    return types.SimpleNamespace(status=200, headers=[("Content-type", "text/plain")], body=body, chunks=None)
+
+
+def start_server():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    server = AsyncBridgeServer(dispatch, workers=1, queue_depth=2, keepalive_timeout=KEEPALIVE)
+    ready = threading.Event()
+    threading.Thread(target=server.run, args=("127.0.0.1", port, ready.set), daemon=True).start()
+    assert ready.wait(5), "server did not start"
+    return server, port
+
+
+SERVER, PORT = None, None
+
+
+def setup_function(function=None):
+    """Start the shared server once (also run by pytest before each test)."""
+    global SERVER, PORT
+    if SERVER is None:
+        SERVER, PORT = start_server()
+    release.clear()
+    dispatched.clear()
+
+
+def connect():
+    conn = socket.create_connection(("127.0.0.1", PORT), timeout=5)
+    return conn, conn.makefile("rb")
+
+
+def read_response(reader):
+    """(status, headers, body) of one Content-Length framed response; None at EOF."""
+    line = reader.readline()
+    if not line:
+        return None
+    status = int(line.split()[1])
+    headers = {}
+    while (line := reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, reader.read(int(headers.get("content-length", 0)))
+
+
+def test_keep_alive_reuses_connection_until_idle():
+    conn, reader = connect()
+    for path in ("/one", "/two"):
+        conn.sendall(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+        status, headers, body = read_response(reader)
+        assert status == 200 and body == f"GET {path}".encode(), (status, body)
+        assert headers["connection"] == "keep-alive", headers
+    started = time.monotonic()
+    assert read_response(reader) is None, "idle connection was not closed"
+    assert time.monotonic() - started < KEEPALIVE + 1
+    conn.close()
+
+    conn, reader = connect()
+    conn.sendall(b"GET /close HTTP/1.1\r\nConnection: close\r\n\r\n")
+    status, headers, _ = read_response(reader)
+    assert status == 200 and headers["connection"] == "close" and read_response(reader) is None
+    conn.close()
+
+
+def test_oversized_head_answered():
+    cases = [(b"GET /" + b"a" * 100_000 + b" HTTP/1.1\r\n\r\n", 414),
+             (b"GET / HTTP/1.1\r\nX-Big: " + b"b" * 100_000 + b"\r\n\r\n", 431),
+             (b"GET / HTTP/1.1\r\nX-Big: " + b"b" * 9000 + b"\r\n\r\n", 431),
+             (b"GET / HTTP/1.1\r\n" + b"".join(b"X-%d: 1\r\n" % i for i in range(150)) + b"\r\n", 431)]
+    for request, expected in cases:
+        conn, reader = connect()
+        try:
+            conn.sendall(request)
+        except ConnectionError:
+            pass  # Closed after the reply, before the whole request was sent
+        response = read_response(reader)
+        assert response and response[0] == expected, (request[:40], response)
+        assert read_response(reader) is None, "connection left open after a bad request"
+        conn.close()
+    assert not dispatched, dispatched
+
+
+def test_stalled_headers_timed_out():
+    conn, reader = connect()
+    conn.sendall(b"GET /stalled HTTP/1.1\r\nHost: x\r\n")  # The blank line never comes
+    started = time.monotonic()
+    response = read_response(reader)
+    assert response and response[0] == 408, response
+    assert time.monotonic() - started < KEEPALIVE + 1
+    assert read_response(reader) is None and not dispatched
+    conn.close()
+
+
+def test_full_queue_answered_busy():
+    slow = []
+    for _ in range(2):  # One running on the single worker, one queued behind it
+        conn, reader = connect()
+        conn.sendall(b"GET /slow HTTP/1.1\r\n\r\n")
+        slow.append((conn, reader))
+    deadline = time.monotonic() + 5
+    while SERVER.pending < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert SERVER.pending == 2, SERVER.pending
+
+    conn, reader = connect()
+    rejected = SERVER.rejected
+    conn.sendall(b"GET /fast HTTP/1.1\r\n\r\n")
+    status, headers, _ = read_response(reader)
+    assert status == 503 and headers["retry-after"] == "1", (status, headers)
+    assert SERVER.rejected == rejected + 1 and "/fast" not in dispatched
+
+    release.set()
+    for slow_conn, slow_reader in slow:
+        assert read_response(slow_reader)[0] == 200
+        slow_conn.close()
+    conn.sendall(b"GET /fast HTTP/1.1\r\n\r\n")  # The busy reply kept the connection open
+    assert read_response(reader)[0] == 200
+    conn.close()
+
+
+def main():
+    tests = [test_keep_alive_reuses_connection_until_idle, test_oversized_head_answered,
+             test_stalled_headers_timed_out, test_full_queue_answered_busy]
+    failed = 0
+    for test in tests:
+        setup_function(test)
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for chroma_bridge_server_v2.py against an in-memory
+collection (FakeCollection stands in for chromadb, so no database or
+server is needed): ingest validation and per-event results, the dedup
+window, write-behind group commits, /stats counting and its rebuild,
+/query pages and /aggregate groups from the events index and from Chroma,
+and streamed /query bodies against the buffered response they replaced.
+"""
+import atexit
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+from urllib.parse import urlencode
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+
+class FakeCollection:
+    """The part of a Chroma collection the bridge uses, kept in a dict."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}  # id -> (document, metadata), in insertion order
+        self.fail_ids = set()  # Writes including one of these ids raise
+        self.reads = []  # Rows returned by each get() that included metadatas or documents
+        self.lookups = 0  # get() calls by id alone (existence checks)
+
+    def _check(self, ids, metadatas):
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"Expected IDs to be unique, found duplicates in {ids}")
+        if self.fail_ids.intersection(ids):
+            raise RuntimeError(f"write rejected for {sorted(self.fail_ids.intersection(ids))}")
+        for metadata in metadatas or []:
+            for key, value in metadata.items():
+                if not isinstance(value, (str, int, float, bool)):
+                    raise ValueError(f"Expected metadata value to be a str, int, float or bool, got {value!r} for {key}")
+
+    def add(self, ids, documents=None, metadatas=None, embeddings=None):
+        self._check(ids, metadatas)
+        for i, doc_id in enumerate(ids):
+            if doc_id not in self.rows:
+                self.rows[doc_id] = (documents[i] if documents else None, metadatas[i] if metadatas else {})
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        self._check(ids, metadatas)
+        for i, doc_id in enumerate(ids):
+            self.rows[doc_id] = (documents[i] if documents else None, metadatas[i] if metadatas else {})
+
+    def count(self):
+        return len(self.rows)
+
+    def _match(self, metadata, where):
+        if not where:
+            return True
+        if "$and" in where:
+            return all(self._match(metadata, clause) for clause in where["$and"])
+        (key, condition), = where.items()
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            return value == condition
+        (op, operand), = condition.items()
+        if value is None:
+            return False
+        return {"$gte": value >= operand, "$lte": value <= operand,
+                "$gt": value > operand, "$lt": value < operand}[op]
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        if ids is not None:
+            items = [(doc_id, self.rows[doc_id]) for doc_id in ids if doc_id in self.rows]
+        else:
+            items = list(self.rows.items())
+        items = [(doc_id, row) for doc_id, row in items if self._match(row[1], where)][offset or 0:]
+        if limit is not None:
+            items = items[:limit]
+        result = {"ids": [doc_id for doc_id, _ in items]}
+        if "documents" in include or "metadatas" in include:
+            self.reads.append(len(items))
+        elif ids is not None:
+            self.lookups += 1
+        if "documents" in include:
+            result["documents"] = [row[0] for _, row in items]
+        if "metadatas" in include:
+            result["metadatas"] = [row[1] for _, row in items]
+        if "embeddings" in include:
+            result["embeddings"] = None
+        return result
+
+
+class FakeClient:
+    def __init__(self, *args, **kwargs):
+        self.collections = {}
+
+    def get_or_create_collection(self, name, metadata=None):
+        return self.collections.setdefault(name, FakeCollection(name))
+
+
+TMP = tempfile.mkdtemp(prefix="bridge-test-")
+atexit.register(shutil.rmtree, TMP, ignore_errors=True)
+os.environ.update({
+    "CHROMA_DB_PATH": os.path.join(TMP, "chroma"),
+    "BRIDGE_BLOB_DIR": os.path.join(TMP, "blobs"),
+    "BRIDGE_EVENT_INDEX": os.path.join(TMP, "index", "events.db"),
+    "BRIDGE_STATS_SNAPSHOT": os.path.join(TMP, "stats", "stats.json"),
+    "WRITE_BEHIND_WAL": os.path.join(TMP, "wal", "ingest.wal"),
+    "BRIDGE_WRITE_BEHIND": "false",
+    "CHROMA_STORAGE_MODE": "full",
+})
+sys.modules["chromadb"] = types.SimpleNamespace(PersistentClient=FakeClient, CloudClient=FakeClient)
+
+import chroma_bridge_server_v2 as bridge  # noqa: E402
+import bridge_query  # noqa: E402
+from bridge_dedup import DedupIndex  # noqa: E402
+from bridge_index import EventIndex  # noqa: E402
+from bridge_stats import RunStats  # noqa: E402
+
+
+def reset(dedup_window=300.0):
+    """Empty every collection, the dedup window, the events index and /stats."""
+    for collection in bridge.collections.values():
+        collection.rows.clear()
+        collection.fail_ids.clear()
+        collection.reads.clear()
+        collection.lookups = 0
+    bridge.dedup_index = DedupIndex(window_seconds=dedup_window, max_entries=100000)
+    bridge.event_index.rebuild([])
+    bridge.run_stats.rebuild([])
+
+
+def envelope(i, **fields):
+    return {
+        "schema_version": "1.0", "event_id": f"evt-{i:05d}", "ts": f"2026-10-17T09:{i // 60 % 60:02d}:{i % 60:02d}.000Z",
+        "run_id": "run-1", "session_id": "session-1", "event_type": "tool_invocation", "level": "info",
+        "tool_name": "Bash", "worker_id": "worker-1", "hash": f"hash-{i}", **fields
+    }
+
+
+def test_metadata_rejected_before_accept():
+    reset()
+    bad = [envelope(1, tool_name=None), envelope(2, run_id={"nested": 1}), envelope(3, event_id=7),
+           envelope(4, event_type="artifact", artifact_refs=["not-an-object"])]
+    results = bridge.ingest_events(bad + [envelope(5)])
+    assert [r["status"] for r in results] == ["error"] * 4 + ["created"], results
+    assert all(r["code"] == 400 for r in results[:4]), results
+    assert "tool_name" in results[0]["error"], results[0]
+    assert list(bridge.collections["events"].rows) == ["evt-00005"]
+
+
+def test_batch_results_are_per_event():
+    reset()
+    bridge.collections["events"].fail_ids.add("evt-00003")
+    results = bridge.ingest_events([envelope(i) for i in range(8)])
+    assert [r["status"] for r in results] == ["created"] * 3 + ["error"] + ["created"] * 4, results
+    assert results[3]["code"] == 500, results[3]
+    assert "evt-00003" not in bridge.collections["events"].rows and bridge.collections["events"].count() == 7
+    assert bridge.event_index.count() == 7, "index rows of the failed event were kept"
+    # The failed event's hash was released, so a retry is stored rather than dropped as a duplicate
+    bridge.collections["events"].fail_ids.clear()
+    assert bridge.ingest_events([envelope(3)])[0]["status"] == "created"
+
+
+def test_dedup_window_expiry_and_bound():
+    index = DedupIndex(window_seconds=10, max_entries=3)
+    assert index.check_and_add("a", now=100)
+    assert not index.check_and_add("a", now=109.9)
+    assert index.check_and_add("a", now=110), "hash still a duplicate after its window"
+    for now, key in ((111, "b"), (112, "c"), (113, "d")):
+        assert index.check_and_add(key, now=now)
+    assert len(index) == 3, "max_entries did not bound the index"
+    assert index.check_and_add("a", now=113.5), "the oldest hash was not evicted first"
+    assert not index.check_and_add("d", now=113.5)
+
+    index = DedupIndex(window_seconds=10)
+    assert index.check_and_add("x", now=200)
+    index.discard("x")  # Its write failed
+    assert index.check_and_add("x", now=205)
+    assert not index.check_and_add("x", now=211), "the expiry of a released reservation dropped the new one"
+
+    now = time.time()
+    index.add("old", now - 20)
+    index.add("recent", now - 5)
+    assert index.check_and_add("old") and not index.check_and_add("recent")
+
+    racing = DedupIndex()
+    accepted = []
+    threads = [threading.Thread(target=lambda: accepted.append(racing.check_and_add("same"))) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert accepted.count(True) == 1, accepted
+
+
+def test_dedup_window_warmed_after_restart():
+    reset()
+    now_ms = int(time.time() * 1000)
+    events = [envelope(i, ts=bridge.millis_rfc3339(now_ms - (4 - i) * 1000)) for i in range(4)]
+    old = envelope(9, ts=bridge.millis_rfc3339(now_ms - 3_600_000))
+    assert [r["status"] for r in bridge.ingest_events(events + [old])] == ["created"] * 5
+    assert bridge.ingest_events([dict(events[0], event_id="retry-0")])[0]["status"] == "duplicate"
+
+    bridge.dedup_index = DedupIndex(window_seconds=300.0)  # A restarted bridge
+    assert bridge.warm_dedup_index() == 4, "events outside the window were loaded"
+    results = bridge.ingest_events([dict(event, event_id=f"retry-{i}") for i, event in enumerate(events)])
+    assert [r["status"] for r in results] == ["duplicate"] * 4, results
+    assert bridge.ingest_events([dict(old, event_id="retry-9")])[0]["status"] == "created"
+
+
+def test_redelivery_after_dedup_window_counted_once():
+    reset(dedup_window=0.05)
+    assert [r["status"] for r in bridge.ingest_events([envelope(1), envelope(2)])] == ["created", "created"]
+    time.sleep(0.1)  # The hashes age out of the dedup window
+    assert bridge.ingest_events([envelope(1, msg="late retry")])[0]["status"] == "created"
+    bridge.commit_write_behind([envelope(2)])  # A replayed write-behind record
+    stats = bridge.run_stats.get("run_id", "run-1")
+    assert stats["events"] == 2 and bridge.run_stats.events == 2, stats
+    assert bridge.collections["events"].count() == 2 and bridge.event_index.count() == 2
+
+
+def test_concurrent_writes_of_one_event_counted_once():
+    reset()
+    assert bridge.ingest_events([envelope(1)])[0]["status"] == "created"
+    assert bridge.collections["events"].lookups == 0, "an ingest read Chroma to find stored events"
+
+    # Both writes get past admission (two bridges, or a retry racing its original)
+    start = threading.Barrier(8)
+
+    def write():
+        start.wait(5)
+        bridge.write_events([envelope(2)])
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert bridge.run_stats.events == 2 and bridge.event_index.count() == 2, bridge.run_stats.events
+    assert bridge.collections["events"].lookups == 0
+
+    # Without the events index a replay is still checked against Chroma
+    index, bridge.event_index = bridge.event_index, None
+    try:
+        bridge.commit_write_behind([envelope(1), envelope(3)])
+    finally:
+        bridge.event_index = index
+    assert bridge.run_stats.events == 3 and bridge.collections["events"].lookups == 1
+
+
+def stats_of(keys):
+    """/stats replies for (scope, key) pairs."""
+    return {(scope, key): body(bridge.handle_stats(urlencode({scope: key}))) for scope, key in keys}
+
+
+def test_stats_snapshot_and_rebuild_match_ingest():
+    reset()
+    live_stats = bridge.run_stats
+    try:
+        seed()
+        bridge.ingest_events([envelope(100 + i, event_type="artifact", run_id="run-1", worker_id=f"worker-{i}",
+                                       artifact_refs=[{"path": f"a{i}", "size_bytes": 10 * (i + 1)}, {"path": "b"}])
+                              for i in range(3)])
+        keys = [("run_id", f"run-{i}") for i in range(3)] + [("session_id", "session-1")]
+        live = stats_of(keys)
+        run_1 = live[("run_id", "run-1")]
+        assert run_1["events"] == 23 and run_1["artifact_bytes"] == 60 and run_1["workers"] == 3, run_1
+        assert run_1["event_types"] == {"tool_invocation": 20, "artifact": 3}, run_1
+        assert live[("session_id", "session-1")]["events"] == 63
+        assert bridge.handle_stats("").status == 400 and bridge.handle_stats("run_id=missing").status == 404
+
+        live_stats.flush()
+        restarted = RunStats(live_stats.path)
+        assert restarted.load() and restarted.events == 63
+        assert [restarted.get(*key) for key in keys] == [live_stats.get(*key) for key in keys]
+
+        # Stored after the last snapshot: on restart the counts differ and /stats is rebuilt from Chroma
+        bridge.ingest_events([envelope(200, run_id="run-2", level="error")])
+        live = stats_of(keys)
+        bridge.run_stats = RunStats(live_stats.path)
+        assert "rebuilt from 64 events" in bridge.sync_run_stats()
+        assert stats_of(keys) == live
+        bridge.run_stats.flush()
+        bridge.run_stats = RunStats(live_stats.path)
+        assert bridge.sync_run_stats().endswith("(64 events)"), "a current snapshot was rebuilt"
+        assert stats_of(keys) == live
+    finally:
+        bridge.run_stats = live_stats
+
+
+def test_write_behind_commit_last_envelope_wins():
+    reset()
+    first, second = envelope(1, msg="first"), envelope(1, msg="second", hash="hash-again")
+    bridge.commit_write_behind([first, envelope(2), second])
+    rows = bridge.collections["events"].rows
+    assert list(rows) == ["evt-00001", "evt-00002"], list(rows)
+    assert bridge.json_loads(rows["evt-00001"][0])["msg"] == "second"
+
+
+def body(response):
+    """Decoded JSON of a handler Response (streamed or not)."""
+    data = b"".join(response.chunks) if response.chunks is not None else response.body
+    return json.loads(data)
+
+
+def query(params, indexed=True):
+    """/query through the ordered index, or through Chroma metadata with indexed=False."""
+    index = bridge.event_index
+    bridge.event_index = index if indexed else None
+    try:
+        response = bridge.handle_query(urlencode(params))
+    finally:
+        bridge.event_index = index
+    return response.status, body(response)
+
+
+def seed(count=60, runs=3, order_seed=5):
+    """Ingest events with shuffled ts (several per millisecond) across a few runs."""
+    events = [envelope(i, run_id=f"run-{i % runs}", ts=f"2026-10-17T09:00:{i // 4 % 60:02d}.{i // 240:03d}Z",
+                       level="error" if i % 5 == 0 else "info", tool_name=["Bash", "Read", "Edit"][i % 3])
+              for i in range(count)]
+    random.Random(order_seed).shuffle(events)
+    for first in range(0, count, 16):
+        bridge.ingest_events(events[first:first + 16])
+    return events
+
+
+def seed_minutes(count, start_ms=1_790_000_000_000):
+    """Ingest events one minute apart, newest first."""
+    events = [envelope(i, ts=bridge.millis_rfc3339(start_ms + i * 60_000)) for i in range(count)]
+    for first in range(0, count, 50):
+        bridge.ingest_events(events[::-1][first:first + 50])
+    bridge.collections["events"].reads.clear()
+    return [event["event_id"] for event in events]
+
+
+def test_keyset_walk_starts_at_first_event():
+    reset()
+    ids = seed_minutes(200)
+    reads = bridge.collections["events"].reads
+    for params in ({"since": "0"}, {"until": "2100-01-01T00:00:00Z"}):
+        walked, cursor = [], None
+        while True:
+            status, page = query({**params, "limit": 10, **({"cursor": cursor} if cursor else {})}, indexed=False)
+            assert status == 200, page
+            walked += [row["id"] for row in page["events"]]
+            if not (cursor := page["next_cursor"]):
+                break
+        assert walked == ids, (params, walked[:5])
+        assert max(reads) <= 40, f"one probe read {max(reads)} rows for 10-row pages"
+        assert sum(reads) <= 3 * len(ids), f"walk read {sum(reads)} metadata rows for {len(ids)} events"
+        reads.clear()
+
+
+def test_offset_page_reads_offset_plus_limit():
+    reset()
+    ids = seed_minutes(400)
+    reads = bridge.collections["events"].reads
+    for offset in (0, 15, 395, 400):
+        status, page = query({"since": "0", "offset": offset, "limit": 10}, indexed=False)
+        assert status == 200, page
+        assert [row["id"] for row in page["events"]] == ids[offset:offset + 10], offset
+        assert sum(reads) <= 3 * (offset + 10) + 20, f"offset {offset} read {sum(reads)} metadata rows"
+        reads.clear()
+
+
+def test_limit_validated():
+    reset()
+    seed_minutes(5)
+    for params in ({"limit": "0"}, {"limit": "-3", "since": "0"}, {"limit": "ten"}, {"offset": "-1"}):
+        status, page = query(params)
+        assert status == 400, (params, status, page)
+    for limit in ("0", "x"):
+        assert bridge.handle_aggregate(urlencode({"limit": limit})).status == 400, limit
+
+
+def test_index_lock_not_held_during_chroma_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EventIndex(os.path.join(tmp, "events.db"))
+        index.rebuild([])
+        in_chroma, release = threading.Event(), threading.Event()
+
+        def slow_write():
+            with index.write(["slow"], [{"ts_ms": 1}]):
+                in_chroma.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=slow_write)
+        thread.start()
+        assert in_chroma.wait(5)
+        with index.write(["fast"], [{"ts_ms": 2}]):
+            pass  # Would block until release if the lock were held across the slow body
+        assert {row[0] for row in index.rows()} == {"fast"}, "rows visible before their Chroma write finished"
+        release.set()
+        thread.join()
+        try:
+            with index.write(["failed"], [{"ts_ms": 3}]):
+                raise RuntimeError("chroma write failed")
+        except RuntimeError:
+            pass
+        assert {row[0] for row in index.rows()} == {"slow", "fast"}
+        index.close()
+
+
+def test_index_pages_match_collection_scan():
+    reset()
+    seed()
+    for filters in ({"since": "0"}, {"since": "0", "run_id": "run-1"}, {"since": "0", "level": "error"}):
+        for limit in (1, 7, 100):
+            walks = []
+            for indexed in (True, False):
+                ids, cursor = [], None
+                while True:
+                    status, page = query({**filters, "limit": limit, **({"cursor": cursor} if cursor else {})}, indexed)
+                    assert status == 200, page
+                    ids += [row["id"] for row in page["events"]]
+                    if not (cursor := page["next_cursor"]):
+                        break
+                walks.append(ids)
+            assert walks[0] == walks[1], (filters, limit, walks)
+            assert len(walks[0]) == len(set(walks[0])), "a row was repeated"
+        offsets = [[row["id"] for row in query({**filters, "limit": 9, "offset": 9}, indexed)[1]["events"]]
+                   for indexed in (True, False)]
+        assert offsets[0] == offsets[1], (filters, offsets)
+
+
+def buffered_query(collection_name, where, limit, offset):
+    """The /query body as it was built before streaming: every document parsed, the whole reply dumped once."""
+    results = bridge.collections[collection_name].get(where=where or None, limit=limit, offset=offset)
+    events = [{"id": doc_id, "document": json.loads(results["documents"][idx]) if results["documents"][idx] else {},
+               "metadata": results["metadatas"][idx] or {}, "distance": None}
+              for idx, doc_id in enumerate(results["ids"])]
+    return {"collection": collection_name, "count": len(events), "events": events, "filters": where,
+            "limit": limit, "offset": offset}
+
+
+def test_streamed_query_matches_buffered_response():
+    reset()
+    seed(count=40)
+    bridge.ingest_events([envelope(900, msg="caf\u00e9 \u2603 \"quoted\" \\ \n", tool_name="Edit",
+                                   data={"nested": [1, 2.5, None, {"deep": True}]}),
+                          envelope(901, event_type="progress", worker_id="worker-2", msg="progress"),
+                          envelope(902, event_type="artifact", artifact_refs=[{"hash": "sha256:aa", "path": "x"}])])
+    chunk = bridge_query.STREAM_CHUNK_BYTES
+    bridge_query.STREAM_CHUNK_BYTES = 512  # Rows straddle chunks
+    try:
+        cases = [("events", {}, 100, 0), ("events", {"run_id": "run-1"}, 7, 3), ("events", {"level": "error"}, 5, 0),
+                 ("events", {"run_id": "missing"}, 10, 0), ("agent_state", {}, 10, 0), ("artifacts", {}, 10, 0)]
+        for collection_name, where, limit, offset in cases:
+            expected = buffered_query(collection_name, where, limit, offset)
+            params = urlencode({"collection": collection_name, "limit": limit, "offset": offset, **where})
+            response = bridge.handle_query(params)
+            assert response.status == 200 and response.chunks is not None, response.status
+            chunks = list(response.chunks)
+            data = b"".join(chunks)
+            assert len(chunks) > 1 or len(data) < 2048, "a large page was sent as one buffer"
+            streamed = json.loads(data)
+            assert streamed.pop("next_cursor") is None
+            assert streamed == expected, (collection_name, where, streamed, expected)
+            assert list(streamed) == list(expected), "the response keys moved"
+
+            response = bridge.handle_query(params, accept="application/x-ndjson")
+            lines = b"".join(response.chunks).decode("utf-8").splitlines()
+            assert dict(response.headers)["Content-type"] == "application/x-ndjson"
+            assert dict(response.headers)["X-Result-Count"] == str(expected["count"])
+            assert [json.loads(line) for line in lines] == expected["events"], collection_name
+    finally:
+        bridge_query.STREAM_CHUNK_BYTES = chunk
+
+
+def aggregate(params, indexed=True):
+    """/aggregate through the events index, or folded from Chroma metadata with indexed=False."""
+    index = bridge.event_index
+    bridge.event_index = index if indexed else None
+    try:
+        response = bridge.handle_aggregate(urlencode(params, doseq=True))
+    finally:
+        bridge.event_index = index
+    return response.status, body(response)
+
+
+def test_aggregate_index_matches_scan():
+    reset()
+    events = seed(count=90)
+    for params in ({}, {"group_by": "run_id"}, {"group_by": "run_id,level"}, {"group_by": ["tool_name", "task_id"]},
+                   {"group_by": "level", "run_id": "run-2"}, {"group_by": "tool_name", "since": "2026-10-17T09:00:10Z",
+                                                             "until": "2026-10-17T09:00:20Z"},
+                   {"group_by": "run_id,level", "limit": 4}):
+        replies = [aggregate(params, indexed) for indexed in (True, False)]
+        assert [status for status, _ in replies] == [200, 200], replies
+        (_, index), (_, scan) = replies
+        assert (index["source"], scan["source"]) == ("index", "scan")
+        assert index["groups"] == scan["groups"] and index["truncated"] == scan["truncated"], (params, index, scan)
+
+    _, reply = aggregate({"group_by": "run_id,level"})
+    expected = {}
+    for event in events:
+        key = (event["run_id"], event["level"])
+        expected[key] = expected.get(key, 0) + 1
+    assert {(g["key"]["run_id"], g["key"]["level"]): g["count"] for g in reply["groups"]} == expected
+    counts = [group["count"] for group in reply["groups"]]
+    assert counts == sorted(counts, reverse=True) and reply["total"] == 90 and not reply["truncated"]
+    _, reply = aggregate({"group_by": "run_id,level", "limit": 4})
+    assert len(reply["groups"]) == 4 and reply["truncated"]
+    for params in ({"group_by": "msg"}, {"group_by": "level,level"}, {"collection": "artifacts"}):
+        assert aggregate(params)[0] == 400, params
+
+
+def test_storage_mode_checked_both_ways():
+    class Stored:
+        def __init__(self, vector):
+            self.vector = vector
+
+        def get(self, limit=None, include=None):
+            return {"ids": ["x"] if self.vector else [], "embeddings": [self.vector] if self.vector else []}
+
+    lean, full, empty = Stored([1.0] * bridge.LEAN_EMBEDDING_DIM), Stored([0.25] * 384), Stored(None)
+    for mode, vector_store, ok in (("lean", lean, True), ("lean", full, False), ("full", full, True),
+                                   ("full", lean, False), ("full", empty, True), ("lean", empty, True)):
+        targets = {name: empty for name in bridge.NON_SEMANTIC_COLLECTIONS}
+        targets["artifacts"] = vector_store
+        try:
+            bridge.check_storage_mode(mode, targets)
+            assert ok, f"{mode} mode started against mismatched vectors"
+        except ValueError as e:
+            assert not ok, f"{mode} mode refused matching vectors: {e}"
+
+
+def main():
+    tests = [test_metadata_rejected_before_accept, test_batch_results_are_per_event,
+             test_dedup_window_expiry_and_bound, test_dedup_window_warmed_after_restart,
+             test_redelivery_after_dedup_window_counted_once, test_concurrent_writes_of_one_event_counted_once,
+             test_stats_snapshot_and_rebuild_match_ingest,
+             test_write_behind_commit_last_envelope_wins,
+             test_index_lock_not_held_during_chroma_write, test_index_pages_match_collection_scan,
+             test_keyset_walk_starts_at_first_event, test_offset_page_reads_offset_plus_limit, test_limit_validated,
+             test_streamed_query_matches_buffered_response, test_aggregate_index_matches_scan, test_storage_mode_checked_both_ways]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the hooks' segmented local event log
+(hooks/event_log.py): size-based rotation, whole-line appends from
+concurrent processes, and compression of closed segments that readers
+still see through.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOOKS = Path(__file__).resolve().parent / "hooks"
+sys.path.insert(0, str(HOOKS))
+from event_log import EventLog, iter_events, iter_lines, list_segments  # noqa: E402
+
+
+def today():
+    return time.strftime("%Y%m%d", time.gmtime())
+
+
+def event(i, size=60):
+    return {"event_id": f"e{i}", "ts": f"2026-10-17T09:00:{i % 60:02d}.000Z", "msg": "x" * size}
+
+
+def test_rotation_by_size():
+    os.environ["ZO_LOG_COMPRESSION"] = "none"
+    with tempfile.TemporaryDirectory() as root:
+        log = EventLog(Path(root), segment_bytes=400)
+        paths = [log.append(event(i)) for i in range(20)]
+        segments = list_segments(Path(root), "events")
+        assert [(s.day, s.seq) for s in segments] == [(today(), seq) for seq in range(len(segments))], segments
+        assert len(segments) > 3, "segments did not rotate"
+        assert paths[0].name == f"events-{today()}.jsonl" and paths[-1] == segments[-1].path
+        line = len(json.dumps(event(0)))
+        for segment in segments:
+            assert segment.path.stat().st_size < 400 + line + 1, f"{segment.path.name} grew past its limit"
+        assert [e["event_id"] for e in iter_events(Path(root), "events")] == [f"e{i}" for i in range(20)]
+
+
+def test_concurrent_appends_stay_whole():
+    os.environ["ZO_LOG_COMPRESSION"] = "none"
+    writer = ("import sys; sys.path.insert(0, sys.argv[1]); from pathlib import Path; from event_log import EventLog\n"
+              "log = EventLog(Path(sys.argv[2]), segment_bytes=1 << 40)\n"
+              "for i in range(25): log.append({'event_id': f'{sys.argv[3]}-{i}', 'msg': sys.argv[3] * 200000})")
+    with tempfile.TemporaryDirectory() as root:
+        procs = [subprocess.Popen([sys.executable, "-c", writer, str(HOOKS), root, name]) for name in "abcd"]
+        assert all(proc.wait(timeout=60) == 0 for proc in procs)
+        events = list(iter_events(Path(root), "events"))
+        assert len(events) == 100, f"{len(events)} of 100 lines parse"
+        assert all(e["msg"] == e["event_id"][0] * 200000 for e in events), "lines were interleaved"
+
+
+def test_closed_segments_compressed_and_readable():
+    os.environ["ZO_LOG_COMPRESSION"] = "gzip"
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        old = root / "events-20200101.jsonl"
+        old.write_text(json.dumps(event(100)) + "\n" + '{"event_id": "torn"')
+        log = EventLog(root, segment_bytes=400)
+        log.compress_in_background = lambda: None  # Compressed explicitly below
+        for i in range(12):
+            log.append(event(i))
+        assert log.compress_closed(grace=0) == len(list_segments(root, "events")) - 1
+        segments = list_segments(root, "events")
+        assert all(s.compression == ".gz" for s in segments[:-1]) and segments[-1].compression is None, segments
+        assert not old.exists() and (root / "events-20200101.jsonl.gz").exists()
+        assert list(iter_lines(segments[0].path)) == [json.dumps(event(100)).encode() + b"\n"], "torn tail was read"
+
+        # Appends go on in the open segment, not in the names freed by compression
+        written = log.append(event(12))
+        assert written == list_segments(root, "events")[-1].path, written
+        assert not (root / f"events-{today()}.jsonl").exists()
+        ids = [e["event_id"] for e in iter_events(root, "events")]
+        assert ids == ["e100"] + [f"e{i}" for i in range(13)], ids
+        log.compress_closed(grace=0)
+        assert written.exists(), "the open segment was compressed"
+
+
+def main():
+    tests = [test_rotation_by_size, test_concurrent_appends_stay_whole, test_closed_segments_compressed_and_readable]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
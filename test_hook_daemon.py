@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the resident hook daemon (hooks/hook_daemon.py): hooks
+forwarded by concurrent clients run side by side with their own
+environment and output, events a hook queues in the outbox are synced
+before the daemon replies, and a hook that overruns its timeout is killed
+in the daemon and run by the client itself.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+HOOKS = Path(__file__).resolve().parent / "hooks"
+
+
+class FakeBridge(ThreadingHTTPServer):
+    """/ingest that records event ids; the first `slow` replies wait `delay` seconds."""
+
+    def __init__(self, delay=0.0, slow=0):
+        super().__init__(("127.0.0.1", 0), BridgeHandler)
+        self.received = []
+        self.delay = delay
+        self.slow = slow
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/ingest"
+
+    def handle_error(self, request, client_address):
+        pass  # A hook killed while waiting for its reply
+
+
+class BridgeHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        event = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        bridge = self.server
+        bridge.received.append(event["event_id"])
+        if len(bridge.received) <= bridge.slow:
+            time.sleep(bridge.delay)
+        self.send_response(201)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+def base_env(tmp):
+    env = dict(os.environ)
+    env.update({
+        "ZO_HOOK_DAEMON_SOCKET": os.path.join(tmp, "daemon.sock"),
+        "ZO_EVENT_LOG_DIR": os.path.join(tmp, "events"),
+        "ZO_BREAKER_FILE": os.path.join(tmp, "breaker.json"),
+        "ZO_BLOB_DIR": os.path.join(tmp, "blobs"),
+        "ZO_HOOK_TIMING": "off",
+        "ZO_EVENT_DELIVERY": "direct",
+        "ZO_WIRE_FORMAT": "json",
+        "ZO_WIRE_ENCODING": "identity",
+    })
+    return env
+
+
+# Runs the daemon with os.fsync() logging the inode of every file it syncs
+FSYNC_LOGGING_DAEMON = """
+import os, runpy, sys
+log, daemon = sys.argv[1], sys.argv[2]
+real_fsync = os.fsync
+def fsync(fd):
+    real_fsync(fd)
+    with open(log, "a") as f:
+        f.write(f"{os.fstat(fd).st_ino}\\n")
+os.fsync = fsync
+sys.argv = [daemon]
+runpy.run_path(daemon, run_name="__main__")
+"""
+
+
+def start_daemon(env, fsync_log=None):
+    script = [str(HOOKS / "hook_daemon.py")]
+    if fsync_log:
+        script = ["-c", FSYNC_LOGGING_DAEMON, fsync_log] + script
+    daemon = subprocess.Popen([sys.executable] + script, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    path = env["ZO_HOOK_DAEMON_SOCKET"]
+    for _ in range(100):
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                return daemon
+            except OSError:
+                pass
+            finally:
+                probe.close()
+        time.sleep(0.05)
+    daemon.kill()
+    raise AssertionError("daemon did not start listening")
+
+
+def run_session_start(env, session_id):
+    """Start the session_start hook as Claude Code would; returns the process."""
+    hook = subprocess.Popen([sys.executable, str(HOOKS / "session_start.py")], env=env, text=True,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    hook.stdin.write(json.dumps({"session_id": session_id, "cwd": env.get("PWD", "")}))
+    hook.stdin.close()
+    return hook
+
+
+def finish(hook):
+    out, err = hook.stdout.read(), hook.stderr.read()
+    return hook.wait(timeout=20), out, err
+
+
+def test_concurrent_hooks_isolated():
+    slow, fast = FakeBridge(delay=1.5, slow=1), FakeBridge()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = base_env(tmp)
+        daemon = start_daemon(env)
+        try:
+            started = time.monotonic()
+            first = run_session_start(dict(env, ZO_EVENT_ENDPOINT=slow.endpoint), "s-slow")
+            time.sleep(0.3)  # The slow hook is now waiting on its bridge inside the daemon
+            second = run_session_start(dict(env, ZO_EVENT_ENDPOINT=fast.endpoint), "s-fast")
+            code, out, err = finish(second)
+            elapsed = time.monotonic() - started
+            assert code == 0, err
+            assert elapsed < 1.5, f"second hook waited {elapsed:.2f}s behind the first"
+            assert fast.endpoint in out and slow.endpoint not in out, out
+            assert "in-process" not in err, err
+
+            code, out, err = finish(first)
+            assert code == 0, err
+            assert slow.endpoint in out and fast.endpoint not in out, out
+            assert len(slow.received) == 1 and len(fast.received) == 1, (slow.received, fast.received)
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+    slow.shutdown()
+    fast.shutdown()
+
+
+def test_outbox_synced_before_reply():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = base_env(tmp)
+        fsync_log = os.path.join(tmp, "fsync.log")
+        daemon = start_daemon(env, fsync_log)
+        try:
+            outbox = os.path.join(tmp, "outbox")
+            hook = run_session_start(dict(env, ZO_EVENT_DELIVERY="outbox", ZO_OUTBOX_DIR=outbox,
+                                          ZO_OUTBOX_FSYNC="batch", ZO_EVENT_ENDPOINT="http://127.0.0.1:9/ingest"),
+                                     "s-outbox")
+            code, out, err = finish(hook)
+            assert code == 0 and "in-process" not in err, err
+            segments = [name for name in os.listdir(outbox) if name.endswith(".ndjson")]
+            assert len(segments) == 1, segments
+            synced = open(fsync_log).read().split() if os.path.exists(fsync_log) else []
+            assert str(os.stat(os.path.join(outbox, segments[0])).st_ino) in synced, "queued event was not fsynced"
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+
+def test_timeout_falls_back_to_client():
+    bridge = FakeBridge(delay=5, slow=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = base_env(tmp)
+        daemon = start_daemon(env)
+        try:
+            started = time.monotonic()
+            hook = run_session_start(dict(env, ZO_EVENT_ENDPOINT=bridge.endpoint, ZO_HOOK_DAEMON_TIMEOUT="1",
+                                          ZO_SEND_DEADLINE="4"), "s-timeout")
+            code, out, err = finish(hook)
+            elapsed = time.monotonic() - started
+            assert code == 0, err
+            assert "running session_start in-process" in err, err
+            assert "hookSpecificOutput" in out, out
+            assert elapsed < 4, f"client took {elapsed:.2f}s"
+            # Killed in the daemon while waiting on the bridge, then sent again by the client
+            assert len(bridge.received) == 2, bridge.received
+            assert daemon.poll() is None, "a timed-out hook took the daemon down"
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+    bridge.shutdown()
+
+
+def main():
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+        print("[OK] skipped: the hook daemon needs Unix sockets and fork()")
+        return
+    tests = [test_concurrent_hooks_isolated, test_outbox_synced_before_reply, test_timeout_falls_back_to_client]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for hook phase timing (hooks/hook_timing.py): the ring file
+keeps the newest samples once it wraps and never grows, concurrent hook
+processes do not lose records, and the report's percentiles are the
+nearest-rank values per hook and phase.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+HOOKS = Path(__file__).resolve().parent / "hooks"
+sys.path.insert(0, str(HOOKS))
+from hook_timing import HEADER, RECORD, HookTimer, TimingRing, percentile, summarize  # noqa: E402
+
+
+def test_ring_wraps_to_newest_samples():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "timing.ring")
+        ring = TimingRing(path, capacity=5)
+        for i in range(12):
+            ring.append("pre_tool_use", "PreToolUse", {"total": i / 1000, "send": None})
+            assert os.path.getsize(path) == HEADER.size + min(i + 1, 5) * RECORD.size
+        samples = ring.read()
+        assert [round(s["phases"]["total"] * 1000) for s in samples] == [7, 8, 9, 10, 11], samples
+        assert all("send" not in s["phases"] for s in samples), "an unmeasured phase was recorded"
+        assert samples == sorted(samples, key=lambda s: s["ts"])
+        # The capacity is the file's own, whatever a later opener asks for
+        TimingRing(path, capacity=50).append("pre_tool_use", "PreToolUse", {"total": 0.012})
+        assert [round(s["phases"]["total"] * 1000) for s in TimingRing(path).read()] == [8, 9, 10, 11, 12]
+        assert os.path.getsize(path) == HEADER.size + 5 * RECORD.size
+
+        with open(path, "r+b") as f:
+            f.write(b"JUNK")
+        try:
+            ring.read()
+            assert False, "a foreign file was read as a ring"
+        except ValueError:
+            pass
+        ring.append("stop", "Stop", {"total": 0.001})  # Started afresh
+        assert [s["hook"] for s in ring.read()] == ["stop"]
+
+
+def test_concurrent_hooks_keep_every_record():
+    writer = ("import sys; sys.path.insert(0, sys.argv[1]); from hook_timing import TimingRing\n"
+              "ring = TimingRing(sys.argv[2], capacity=1000)\n"
+              "for i in range(50): ring.append(sys.argv[3], '', {'total': i / 1000})")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "timing.ring")
+        procs = [subprocess.Popen([sys.executable, "-c", writer, str(HOOKS), path, f"hook-{n}"]) for n in range(4)]
+        assert all(proc.wait(timeout=60) == 0 for proc in procs)
+        samples = TimingRing(path).read()
+        assert len(samples) == 200, len(samples)
+        for n in range(4):
+            totals = [s["phases"]["total"] for s in samples if s["hook"] == f"hook-{n}"]
+            assert [round(t * 1000) for t in totals] == list(range(50)), f"hook-{n} records lost or torn"
+
+
+def test_percentiles_per_hook_and_phase():
+    assert percentile([3.0], 99) == 3.0
+    values = [i / 1000 for i in range(100, 0, -1)]  # 1..100ms, unsorted
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (0.051, 0.096, 0.1)
+
+    samples = [{"hook": "pre_tool_use", "hook_event_name": "PreToolUse",
+                "phases": {"total": i / 1000, "send": i / 2000} if i % 2 else {"total": i / 1000}}
+               for i in range(1, 101)]
+    samples.append({"hook": "stop", "hook_event_name": "Stop", "phases": {"total": 0.25}})
+    rows = {(r["hook"], r["phase"]): r for r in summarize(samples)}
+    assert list(rows) == [("pre_tool_use", "send"), ("pre_tool_use", "total"), ("stop", "total")], list(rows)
+    total = rows[("pre_tool_use", "total")]
+    assert (total["n"], total["p50_ms"], total["p95_ms"], total["p99_ms"]) == (100, 51.0, 96.0, 100.0), total
+    send = rows[("pre_tool_use", "send")]
+    assert send["n"] == 50 and send["p50_ms"] == 25.5 and send["p99_ms"] == 49.5, send
+    assert rows[("stop", "total")]["p50_ms"] == 250.0
+
+
+def test_timer_records_only_when_enabled():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "timing.ring")
+        os.environ["ZO_HOOK_TIMING_FILE"] = path
+        try:
+            os.environ["ZO_HOOK_TIMING"] = "0"
+            timer = HookTimer("stop", script=False)
+            with timer.phase("send"):
+                pass
+            timer.finish("Stop")
+            assert timer.detail is None and not os.path.exists(path)
+
+            os.environ["ZO_HOOK_TIMING"] = "1"
+            timer = HookTimer("stop", script=False)
+            for _ in range(2):
+                with timer.phase("send"):
+                    pass
+            timer.finish("Stop")
+        finally:
+            os.environ.pop("ZO_HOOK_TIMING", None)
+            os.environ.pop("ZO_HOOK_TIMING_FILE", None)
+        [sample] = TimingRing(path).read()
+        assert sample["hook_event_name"] == "Stop" and set(sample["phases"]) == {"send", "total"}, sample
+        assert sample["phases"]["total"] >= sample["phases"]["send"]
+
+        report = subprocess.run([sys.executable, str(HOOKS / "hook_timing.py"), "--file", path, "report", "--json"],
+                                capture_output=True, text=True, timeout=30)
+        assert report.returncode == 0, report.stderr
+        assert [(r["hook"], r["phase"], r["n"]) for r in json.loads(report.stdout)] == [("stop", "send", 1),
+                                                                                        ("stop", "total", 1)]
+
+
+def main():
+    tests = [test_ring_wraps_to_newest_samples, test_concurrent_hooks_keep_every_record,
+             test_percentiles_per_hook_and_phase, test_timer_records_only_when_enabled]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
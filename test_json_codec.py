@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Differential test for the JSON shims (hooks/fast_json.py, bridge_json.py).
+Parsed values must match json.loads exactly (types included), encoded
+output must parse back to the same value, and envelope hashes / event
+lines built from either backend's parse must be byte-identical.
+Without orjson installed both shims are the stdlib and this passes trivially.
+"""
+import json
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "hooks"))
+sys.path.insert(0, str(ROOT))
+import bridge_json  # noqa: E402
+import fast_json  # noqa: E402
+from event_utils import encode_event, hash_content, seal_envelope  # noqa: E402
+
+fast_json.preload()
+CODECS = [("fast_json", fast_json), ("bridge_json", bridge_json)]
+
+EDGE_CASES = [
+    '{"a": 1, "b": [true, false, null], "c": {"d": "e"}}',
+    '{"big": 123456789012345678901234567890}',
+    '{"neg": -9223372036854775809, "max": 18446744073709551615, "min": -9223372036854775808}',
+    '[1e16, 1.0, -0.0, 0.1, 1e-7, 2.5e+300, 12345678901234567890.0]',
+    '[NaN, Infinity, -Infinity]',
+    '[1e400]',
+    '"\\ud800 lone surrogate"',
+    '"\\ud83d\\ude00 pair"',
+    '"caf\\u00e9 \\u0000 \\t \\" \\\\ /"',
+    '{"dup": 1, "dup": 2}',
+    '  {"padded": true}  ',
+    '{"unicode": "é中\U0001f600"}',
+    '[]', '{}', '""', '0', 'null',
+    '', '{', '[1,]', '{"a" 1}', "{'a': 1}", '﻿{}', '[1] x',
+]
+
+FRAGMENTS = ["a", "Z", "é", "中", "😀", "\n", "\t", '"', "\\", "/", "\x00", "\x1f", " ", ",", ":", " ", "0", "{", "]"]
+
+
+def same(a, b):
+    """Equal values of equal types (repr distinguishes 1 from 1.0 and keeps key order)."""
+    return repr(a) == repr(b)
+
+
+def parse(codec, text):
+    for data in (text, text.encode("utf-8", "surrogatepass")):
+        try:
+            yield "ok", codec.loads(data)
+        except ValueError as e:
+            yield "error", type(e)
+
+
+def expected_parse(text):
+    for data in (text, text.encode("utf-8", "surrogatepass")):
+        try:
+            yield "ok", json.loads(data)
+        except ValueError as e:
+            yield "error", type(e)
+
+
+def random_string(rng):
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 10)))
+
+
+def random_value(rng, depth=0, floats=True):
+    kind = rng.random()
+    if depth > 3 or kind < 0.35:
+        return random_string(rng)
+    if kind < 0.5:
+        return rng.choice([rng.randint(-10 ** 6, 10 ** 6), rng.randint(-2 ** 80, 2 ** 80), 2 ** 63, -2 ** 63 - 1])
+    if kind < 0.6:
+        return rng.choice([True, False, None])
+    if kind < 0.7 and floats:
+        return rng.choice([rng.uniform(-1e6, 1e6), rng.random() * 10 ** rng.randint(-30, 30), 0.0, -0.0])
+    if kind < 0.85:
+        return [random_value(rng, depth + 1, floats) for _ in range(rng.randint(0, 4))]
+    return {random_string(rng): random_value(rng, depth + 1, floats) for _ in range(rng.randint(0, 4))}
+
+
+def test_edge_cases():
+    for text in EDGE_CASES:
+        expected = list(expected_parse(text))
+        for name, codec in CODECS:
+            actual = list(parse(codec, text))
+            assert same(actual, expected), f"{name} loads({text!r}): expected {expected!r}, got {actual!r}"
+
+
+def test_random_documents(iterations=5000, seed=4321):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        value = random_value(rng)
+        text = json.dumps(value, ensure_ascii=rng.random() < 0.5)
+        expected = json.loads(text)
+        for name, codec in CODECS:
+            actual = codec.loads(text.encode("utf-8"))
+            assert same(actual, expected), f"{name} loads({text!r}) = {actual!r}"
+
+
+def test_dumps(iterations=5000, seed=99):
+    rng = random.Random(seed)
+    for i in range(iterations):
+        floats = i % 2 == 0
+        value = random_value(rng, floats=floats)
+        for name, codec in CODECS:
+            encoded = codec.dumps_bytes(value)
+            assert same(json.loads(encoded), json.loads(json.dumps(value))), f"{name} dumps({value!r}) = {encoded!r}"
+            if not floats:  # Float spelling may differ (1e16 vs 1e+16); everything else is byte-identical
+                assert encoded == json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            assert codec.dumps(value) == encoded.decode("utf-8")
+
+
+def test_hashes(iterations=2000, seed=7):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        envelope = {
+            "session_id": random_string(rng),
+            "ts": "2024-10-17T09:12:44.331Z",
+            "event_type": "tool_invocation",
+            "msg": random_string(rng),
+            "data": {"tool_input": random_value(rng), "tool_response": random_value(rng)}
+        }
+        text = json.dumps(envelope)
+        expected = json.loads(text)
+        for name, codec in CODECS:
+            actual = codec.loads(text)
+            assert hash_content(actual) == hash_content(expected), f"{name}: hash differs for {text!r}"
+            assert encode_event(seal_envelope(actual, "sha256")) == encode_event(seal_envelope(expected, "sha256"))
+
+
+def main():
+    print(f"[INFO] fast_json backend: {fast_json.backend()}, bridge_json backend: {bridge_json.BACKEND}")
+    tests = [test_edge_cases, test_random_documents, test_dumps, test_hashes]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
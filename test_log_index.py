@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the event log sidecar indexes (hooks/log_index.py):
+indexed lookups return what a full scan returns, indexes catch up with
+appends and torn writes, are rebuilt for a replaced segment, and stay
+valid once their segment is compressed.
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "hooks"))
+from event_log import EventLog, iter_events, list_segments  # noqa: E402
+from log_index import SegmentIndex, find_events, index_path  # noqa: E402
+
+
+def event(i):
+    return {"event_id": f"e{i}", "ts": f"2026-10-17T09:{i // 60:02d}:{i % 60:02d}.000Z", "run_id": f"run-{i % 3}",
+            "session_id": f"session-{i % 2}", "event_type": ["tool_invocation", "error"][i % 5 == 0],
+            "tool_name": ["Bash", "Read", "Edit", "Write"][i % 4]}
+
+
+def scan(root, since=None, until=None, **filters):
+    """Reference answer: every event, filtered in Python."""
+    return [e["event_id"] for e in iter_events(root, "events")
+            if all(e.get(k) == v for k, v in filters.items())
+            and (not since or e["ts"] >= since) and (not until or e["ts"] < until)]
+
+
+QUERIES = [{}, {"run_id": "run-1"}, {"event_type": "error", "tool_name": "Bash"}, {"session_id": "session-0"},
+           {"run_id": "run-2", "since": "2026-10-17T09:00:30.000Z", "until": "2026-10-17T09:01:10.000Z"},
+           {"run_id": "missing"}]
+
+
+def check_queries(root):
+    for query in QUERIES:
+        found = [e["event_id"] for e in find_events(root, "events", **query)]
+        assert found == scan(root, **query), (query, found)
+
+
+def test_lookups_match_scan():
+    os.environ["ZO_LOG_COMPRESSION"] = "none"
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        log = EventLog(root, segment_bytes=2000)
+        for i in range(90):
+            log.append(event(i))
+        check_queries(root)
+        segments = list_segments(root, "events")
+        assert len(segments) > 2 and all(index_path(s).exists() for s in segments)
+        first = SegmentIndex(segments[0])
+        assert not first.overlaps(since="2026-10-18T00:00:00.000Z") and first.overlaps(until="2026-10-17T09:00:01.000Z")
+        bash, run_0 = set(first.lookup(tool_name="Bash")), set(first.lookup(run_id="run-0"))
+        assert first.lookup(tool_name="Bash", run_id="run-0") == sorted(bash & run_0) and bash & run_0
+
+
+def test_index_follows_appends_and_torn_writes():
+    os.environ["ZO_LOG_COMPRESSION"] = "none"
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        log = EventLog(root)
+        for i in range(10):
+            log.append(event(i))
+        check_queries(root)
+        segment = list_segments(root, "events")[0]
+        with segment.path.open("ab") as f:
+            f.write(b'{"event_id": "half", "run_id": "run-1"')  # A hook still writing
+        assert "half" not in [e["event_id"] for e in find_events(root, "events", run_id="run-1")]
+        assert SegmentIndex(segment).data["lines"] == 10
+
+        with segment.path.open("ab") as f:
+            f.write(b', "ts": "2026-10-17T09:00:10.500Z"}\n')
+        for i in range(10, 20):
+            log.append(event(i))
+        check_queries(root)
+        index = SegmentIndex(segment)
+        assert index.data["lines"] == 21 and index.data["indexed_bytes"] == segment.path.stat().st_size
+        assert "half" in [e["event_id"] for e in find_events(root, "events", run_id="run-1")]
+
+
+def test_replaced_segment_reindexed():
+    os.environ["ZO_LOG_COMPRESSION"] = "none"
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        path = root / "events-20200101.jsonl"
+        path.write_text("".join(json.dumps(event(i)) + "\n" for i in range(30)))
+        check_queries(root)
+        segment = list_segments(root, "events")[0]
+        # Same size, different content: only the head fingerprint tells them apart
+        lines = [json.dumps(dict(event(i), run_id=f"run-{(i + 1) % 3}")) for i in range(30)]
+        path.write_text("".join(line + "\n" for line in lines))
+        assert path.stat().st_size == SegmentIndex(segment).data["indexed_bytes"]
+        check_queries(root)
+
+        path.write_text("".join(line + "\n" for line in lines[:5]))  # Truncated
+        check_queries(root)
+        assert SegmentIndex(segment).data["lines"] == 5
+
+
+def test_index_survives_compression():
+    os.environ["ZO_LOG_COMPRESSION"] = "gzip"
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        old = root / "events-20200101.jsonl"
+        old.write_text("".join(json.dumps(event(i)) + "\n" for i in range(40)))
+        check_queries(root)
+        sidecar = index_path(list_segments(root, "events")[0]).read_bytes()
+
+        log = EventLog(root)
+        log.compress_in_background = lambda: None
+        assert log.compress_closed(grace=0) == 1
+        segment = list_segments(root, "events")[0]
+        assert segment.compression == ".gz" and index_path(segment) == old.with_name(old.name + ".idx")
+        assert not SegmentIndex(segment).refresh(), "compression forced a rebuild"
+        assert index_path(segment).read_bytes() == sidecar
+        check_queries(root)
+
+
+def main():
+    tests = [test_lookups_match_scan, test_index_follows_appends_and_torn_writes, test_replaced_segment_reindexed,
+             test_index_survives_compression]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
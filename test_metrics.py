@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the bridge's sharded metrics (bridge_metrics.py): a
+scrape sums every thread's counters and histograms, shards of exited
+threads are handed to new ones without losing counts, and recording never
+waits on the registry lock.
+"""
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bridge_metrics import BridgeMetrics  # noqa: E402
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_snapshot_merges_every_thread():
+    metrics = BridgeMetrics(buckets=(0.01, 0.1, 1.0))
+    start = threading.Barrier(8)
+
+    def record(i):
+        start.wait(5)
+        for _ in range(1000):
+            metrics.inc("requests", label="ingest")
+        metrics.inc("in_flight", 1)
+        metrics.inc("in_flight", -1 if i % 2 else 0)
+        for seconds in (0.005, 0.05, 0.5, 5.0):
+            metrics.observe("latency", "ingest", seconds)
+
+    run_threads(8, record)
+    snapshot = metrics.snapshot()
+    assert metrics.value(snapshot, "requests", "ingest") == 8000
+    assert metrics.value(snapshot, "in_flight") == 4
+    counts = snapshot[("hist", "latency", "ingest")]
+    assert counts[:4] == [8, 8, 8, 8] and abs(counts[-1] - 8 * 5.555) < 1e-9, counts
+    rendered = metrics.render_histogram(snapshot, "latency", "bridge_latency_seconds", "Latency", "stage")
+    assert 'bridge_latency_seconds_bucket{stage="ingest",le="0.1"} 16' in rendered, rendered
+    assert 'bridge_latency_seconds_count{stage="ingest"} 32' in rendered, rendered
+    assert 'requests{route="ingest"} 8000' in metrics.render_values(snapshot, "requests", "requests", "Requests",
+                                                                      "counter", "route")
+
+
+def test_exited_threads_shards_reused():
+    metrics = BridgeMetrics()
+    scraped = []
+    done = threading.Event()
+
+    def scrape():
+        while not done.is_set():
+            scraped.append(metrics.value(metrics.snapshot(), "requests"))
+
+    scraper = threading.Thread(target=scrape)
+    scraper.start()
+    for batch in range(50):  # One thread per request, as in the threaded engine
+        run_threads(10, lambda i: metrics.inc("requests"))
+    done.set()
+    scraper.join()
+    assert metrics.value(metrics.snapshot(), "requests") == 500
+    assert scraped == sorted(scraped), "a scrape lost counts an earlier one had"
+    assert len(metrics._shards) <= 20, f"{len(metrics._shards)} shards for 10 threads at a time"
+
+
+def test_recording_does_not_take_registry_lock():
+    metrics = BridgeMetrics()
+    run_threads(3, lambda i: metrics.inc("requests"))  # Leaves three free shards
+    with metrics._lock:  # A scrape in progress
+        recorded = threading.Event()
+
+        def record():
+            metrics.inc("requests")
+            metrics.observe("latency", None, 0.2)
+            recorded.set()
+
+        threads = [threading.Thread(target=record) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        assert recorded.wait(5), "a new thread waited on the registry lock"
+        for thread in threads:
+            thread.join(5)
+        assert not any(thread.is_alive() for thread in threads)
+    assert metrics.value(metrics.snapshot(), "requests") == 23
+
+
+def main():
+    tests = [test_snapshot_merges_every_thread, test_exited_threads_shards_reused,
+             test_recording_does_not_take_registry_lock]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the hook outbox drainer (hooks/outbox.py) against a
+small in-process HTTP bridge: resuming a segment from its .ack offset after
+a crash, dead-lettering invalid and torn records, and per-event fallback
+when a batch reply fails some events.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "hooks"))
+from outbox import (  # noqa: E402
+    DEAD_LETTER_FILE, MAX_EVENT_ATTEMPTS, SEGMENT_PREFIX, SEGMENT_SUFFIX, OutboxDrainer, RetryableError
+)
+
+
+class FakeBridge(ThreadingHTTPServer):
+    """
+    /ingest and /ingest/batch over an in-memory event list.
+
+    Like a bridge whose bulk write fails as a whole, a batch holding a
+    `poison` event answers 500 for every event in it; `rejected` events are
+    refused with 400 everywhere and `poison` ones also fail alone.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BridgeHandler)
+        self.stored = []
+        self.poison = set()
+        self.rejected = set()
+        self.requests = []  # (path, event count)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/ingest"
+
+    def result(self, event, batch_failed):
+        event_id = event["event_id"]
+        if event_id in self.rejected:
+            return {"event_id": event_id, "status": "error", "code": 400, "error": "rejected"}
+        if batch_failed or event_id in self.poison:
+            return {"event_id": event_id, "status": "error", "code": 500, "error": "write failed"}
+        if event_id in self.stored:
+            return {"event_id": event_id, "status": "duplicate"}
+        self.stored.append(event_id)
+        return {"event_id": event_id, "status": "created"}
+
+
+class BridgeHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        bridge = self.server
+        if self.path == "/ingest/batch":
+            events = [json.loads(line) for line in body.splitlines() if line.strip()]
+            bridge.requests.append((self.path, len(events)))
+            batch_failed = any(event["event_id"] in bridge.poison for event in events)
+            self.reply(200, {"results": [bridge.result(event, batch_failed) for event in events]})
+        else:
+            bridge.requests.append((self.path, 1))
+            result = bridge.result(json.loads(body), False)
+            self.reply(result.get("code", 201), result)
+
+
+WIRE_ENV = {"ZO_WIRE_FORMAT": "json", "ZO_WIRE_ENCODING": "identity"}
+
+
+def setup_function(function=None):
+    """Plain JSON bodies the fake bridge can read (also run by pytest before each test)."""
+    os.environ.update(WIRE_ENV)
+
+
+def write_segment(root, event_ids, bucket=0):
+    """A sealed segment (its time bucket is long over) holding these events."""
+    path = Path(root) / f"{SEGMENT_PREFIX}{bucket:012d}{SEGMENT_SUFFIX}"
+    with path.open("ab") as f:
+        for event_id in event_ids:
+            f.write(json.dumps({"event_id": event_id, "msg": "x"}).encode() + b"\n")
+    return path
+
+
+def dead_letters(root):
+    path = Path(root) / DEAD_LETTER_FILE
+    if not path.exists():
+        return []
+    return [json.loads(json.loads(line)["line"])["event_id"] for line in path.read_text().splitlines()]
+
+
+def test_resume_from_ack_after_crash():
+    bridge = FakeBridge()
+    bridge.poison.add("e3")
+    with tempfile.TemporaryDirectory() as root:
+        segment = write_segment(root, [f"e{i}" for i in range(6)])
+        try:
+            OutboxDrainer(Path(root), bridge.endpoint, batch_size=2).drain_once()
+            assert False, "a failing event should keep its segment waiting"
+        except RetryableError:
+            pass
+        assert bridge.stored == ["e0", "e1", "e2"], bridge.stored
+        acked = int(Path(f"{segment}.ack").read_text())
+        assert segment.read_bytes()[acked:].startswith(b'{"event_id": "e3"'), "ack is not at the first failed event"
+
+        # A new drainer (the old one crashed) picks up at the ack offset
+        bridge.poison.clear()
+        bridge.requests.clear()
+        assert OutboxDrainer(Path(root), bridge.endpoint, batch_size=2).drain_once() == 3
+        assert bridge.stored == [f"e{i}" for i in range(6)], bridge.stored
+        assert sum(count for _, count in bridge.requests) == 3, bridge.requests
+        assert not segment.exists() and not Path(f"{segment}.ack").exists()
+        assert dead_letters(root) == []
+    bridge.shutdown()
+
+
+def test_invalid_and_torn_records_dead_lettered():
+    bridge = FakeBridge()
+    with tempfile.TemporaryDirectory() as root:
+        for bucket in (0, int(time.time())):  # Sealed, then still open for appends
+            segment = write_segment(root, ["e0"], bucket)
+            with segment.open("ab") as f:
+                f.write(b"not json\n")
+            write_segment(root, ["e1"], bucket)
+            with segment.open("ab") as f:
+                f.write(b'{"event_id": "torn"')
+        drainer = OutboxDrainer(Path(root), bridge.endpoint)
+        assert drainer.drain_once() == 4
+        assert bridge.stored == ["e0", "e1"], bridge.stored  # Redeliveries answer "duplicate"
+
+        records = [json.loads(line) for line in (Path(root) / DEAD_LETTER_FILE).read_text().splitlines()]
+        # The open segment's tail may still be completed by its writer
+        assert [(r["reason"], r["line"]) for r in records] == [
+            ("invalid JSON", "not json"), ("truncated record", '{"event_id": "torn"'),
+            ("invalid JSON", "not json")], records
+        assert [p.name for p in drainer.segments()] == [segment.name]
+    bridge.shutdown()
+
+
+def test_failed_batch_events_resent_alone():
+    bridge = FakeBridge()
+    bridge.poison.add("e5")
+    bridge.rejected.add("e3")
+    with tempfile.TemporaryDirectory() as root:
+        segment = write_segment(root, [f"e{i}" for i in range(6)])
+        drainer = OutboxDrainer(Path(root), bridge.endpoint, batch_size=10)
+        try:
+            drainer.drain_once()
+            assert False, "a failing event should keep its segment waiting"
+        except RetryableError:
+            pass
+        # The batch failed as a whole; every event but the poison one got in on its own
+        assert bridge.stored == ["e0", "e1", "e2", "e4"], bridge.stored
+        assert bridge.requests[0] == ("/ingest/batch", 6) and ("/ingest", 1) in bridge.requests, bridge.requests
+        assert dead_letters(root) == ["e3"], dead_letters(root)
+
+        for _ in range(MAX_EVENT_ATTEMPTS):
+            try:
+                drainer.drain_once()
+                break
+            except RetryableError:
+                pass
+        assert dead_letters(root) == ["e3", "e5"], dead_letters(root)
+        assert bridge.stored == ["e0", "e1", "e2", "e4"], bridge.stored
+        assert not segment.exists(), "drained segment was not removed"
+    bridge.shutdown()
+
+
+def main():
+    tests = [test_resume_from_ack_after_crash, test_invalid_and_torn_records_dead_lettered,
+             test_failed_batch_events_resent_alone]
+    failed = 0
+    for test in tests:
+        setup_function(test)
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the hooks' shared transport (hooks/transport.py)
+against a small in-process HTTP bridge: the circuit breaker shared through
+its state file, the per-send deadline, and falling back to plain JSON when
+the bridge refuses an encoded body.
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "hooks"))
+import transport  # noqa: E402
+
+WIRE_ENV = {"ZO_WIRE_ENCODING": "gzip", "ZO_WIRE_FORMAT": "json", "ZO_WIRE_MIN_BYTES": "1",
+            "ZO_WIRE_DOWNGRADE_SECONDS": "0.2"}
+
+
+class FakeBridge(ThreadingHTTPServer):
+    """
+    Records (Content-Encoding, body) per request. Encoded bodies are answered
+    with `refusal` = (status, reply text) while it is set, every body with
+    `status` while that is set, and each reply waits `delay` seconds.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BridgeHandler)
+        self.received = []
+        self.refusal = None
+        self.status = None
+        self.delay = 0.0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/ingest"
+
+    def handle_error(self, request, client_address):
+        pass  # A client that gave up on a slow reply
+
+    def encodings(self):
+        return [encoding for encoding, _ in self.received]
+
+
+class BridgeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, text):
+        data = json.dumps({"status": text}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        encoding = self.headers.get("Content-Encoding")
+        self.server.received.append((encoding, body))
+        time.sleep(self.server.delay)
+        if self.server.status:
+            self.reply(self.server.status, "unavailable")
+        elif encoding and self.server.refusal:
+            self.reply(*self.server.refusal)
+        else:
+            self.reply(201, "created")
+
+
+def setup_function(function=None):
+    """Gzip every body (also run by pytest before each test)."""
+    os.environ.update(WIRE_ENV)
+
+
+def teardown_function(function=None):
+    transport.close_connections()
+    for name in WIRE_ENV:
+        os.environ.pop(name, None)
+
+
+def send(bridge):
+    return transport.send_body("POST", bridge.url, b'{"event_id": "e1"}', "application/json",
+                               deadline=transport.Deadline(2))
+
+
+def fresh(bridge):
+    transport._plain_bridges.clear()
+    bridge.received.clear()
+
+
+def test_breaker_opens_and_closes():
+    bridge = FakeBridge()
+    bridge.status = 503
+    with tempfile.TemporaryDirectory() as tmp:
+        state = Path(tmp) / "breaker.json"
+        breaker = transport.CircuitBreaker(state, failures=2, cooldown=0.5)
+        event = {"event_id": "e1"}
+        for _ in range(2):
+            assert not transport.send_event(bridge.url, event, transport.Deadline(0.25), breaker=breaker)
+        sent = len(bridge.received)
+        # Another process reads the same state file and skips HTTP altogether
+        other = transport.CircuitBreaker(state, failures=2, cooldown=0.5)
+        assert not other.allow(transport.breaker_key(bridge.url)), "circuit not open after 2 failed sends"
+        assert not transport.send_event(bridge.url, event, transport.Deadline(1), breaker=other)
+        assert len(bridge.received) == sent, "an open circuit still sent the event"
+
+        time.sleep(0.6)  # Cool-off over: the next send goes through and closes the circuit
+        bridge.status = None
+        assert transport.send_event(bridge.url, event, transport.Deadline(1), breaker=other)
+        assert json.loads(state.read_text())[transport.breaker_key(bridge.url)]["failures"] == 0
+    bridge.shutdown()
+
+
+def test_deadline_bounds_retries_and_slow_replies():
+    bridge = FakeBridge()
+    with tempfile.TemporaryDirectory() as tmp:
+        breaker = transport.CircuitBreaker(Path(tmp) / "breaker.json", failures=100)
+        bridge.status = 503
+        started = time.monotonic()
+        assert not transport.send_event(bridge.url, {"event_id": "e1"}, transport.Deadline(0.5), breaker=breaker)
+        elapsed = time.monotonic() - started
+        assert elapsed < 0.8, f"retries ran {elapsed:.2f}s past a 0.5s deadline"
+        assert len(bridge.received) > 1, "a 503 was not retried"
+
+        # One slow reply spends the budget; the socket timeout is what is left of it
+        bridge.status, bridge.delay = None, 1.0
+        started = time.monotonic()
+        assert not transport.send_event(bridge.url, {"event_id": "e2"}, transport.Deadline(0.3), breaker=breaker)
+        elapsed = time.monotonic() - started
+        assert elapsed < 0.6, f"a slow reply held the send for {elapsed:.2f}s"
+        deadline = transport.Deadline(0)
+        assert deadline.expired
+        try:
+            transport.request("GET", bridge.url, deadline=deadline)
+            assert False, "a spent deadline still sent the request"
+        except transport.TransportError as e:
+            assert "deadline" in str(e), e
+    bridge.shutdown()
+
+
+def test_server_error_not_remembered():
+    bridge = FakeBridge()
+    fresh(bridge)
+    bridge.refusal = (500, "internal error")
+    send(bridge)
+    assert bridge.encodings() == ["gzip", None], bridge.encodings()
+    send(bridge)
+    assert bridge.encodings() == ["gzip", None, "gzip", None], "a 500 downgraded the bridge"
+    bridge.refusal = None
+    send(bridge)
+    assert bridge.encodings()[-1] == "gzip"
+    assert gzip.decompress(bridge.received[-1][1]) == b'{"event_id": "e1"}'
+    bridge.shutdown()
+
+
+def test_encoding_refusal_downgrades_until_expiry():
+    bridge = FakeBridge()
+    for refusal in ((415, "Unsupported Content-Encoding: gzip"), (400, "Invalid gzip body")):
+        fresh(bridge)
+        bridge.refusal = refusal
+        send(bridge)
+        send(bridge)
+        assert bridge.encodings() == ["gzip", None, None], (refusal, bridge.encodings())
+        time.sleep(0.3)  # ZO_WIRE_DOWNGRADE_SECONDS
+        bridge.refusal = None
+        send(bridge)
+        assert bridge.encodings()[-1] == "gzip", "the downgrade did not expire"
+    bridge.shutdown()
+
+
+def test_unrelated_bad_request_not_remembered():
+    bridge = FakeBridge()
+    fresh(bridge)
+    bridge.refusal = (400, "Missing event_id")
+    send(bridge)
+    send(bridge)
+    assert bridge.encodings() == ["gzip", None, "gzip", None], bridge.encodings()
+    bridge.shutdown()
+
+
+def main():
+    tests = [test_breaker_opens_and_closes, test_deadline_bounds_retries_and_slow_replies,
+             test_server_error_not_remembered, test_encoding_refusal_downgrades_until_expiry,
+             test_unrelated_bad_request_not_remembered]
+    failed = 0
+    for test in tests:
+        setup_function(test)
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+        finally:
+            teardown_function(test)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the hooks' Unix socket transport (hooks/transport.py)
+against the asyncio engine serving TCP and a socket: events and queries
+round-trip over the socket on one pooled connection, and with
+ZO_UNIX_FALLBACK_URL set a missing or dead socket falls back to TCP.
+"""
+import atexit
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "hooks"))
+sys.path.insert(0, str(ROOT))
+import transport  # noqa: E402
+from bridge_async_server import AsyncBridgeServer  # noqa: E402
+from outbox import batch_endpoint_for  # noqa: E402
+
+TMP = tempfile.mkdtemp(prefix="uds-test-")
+atexit.register(shutil.rmtree, TMP, ignore_errors=True)
+SOCKET = os.path.join(TMP, "bridge.sock")
+received = []  # (method, target, body)
+
+
+def dispatch(method, target, headers, read_body, start_time):
+    body = read_body(int(headers.get("content-length", "0") or 0))
+    received.append((method, target, body))
+    reply = json.dumps({"status": "created", "target": target}).encode()
+    return types.SimpleNamespace(status=201, headers=[("Content-type", "application/json")], body=reply, chunks=None)
+
+
+PORT = None
+
+
+def setup_function(function=None):
+    """Start the shared bridge once; plain JSON bodies (also run by pytest before each test)."""
+    global PORT
+    if PORT is None:
+        probe = socket.socket()
+        probe.bind(("127.0.0.1", 0))
+        PORT = probe.getsockname()[1]
+        probe.close()
+        ready = threading.Event()
+        server = AsyncBridgeServer(dispatch, workers=2)
+        threading.Thread(target=server.run, args=("127.0.0.1", PORT, ready.set),
+                         kwargs={"unix_path": SOCKET}, daemon=True).start()
+        assert ready.wait(5), "bridge did not start"
+    os.environ.update({"ZO_WIRE_FORMAT": "json", "ZO_WIRE_ENCODING": "identity"})
+    received.clear()
+
+
+def teardown_function(function=None):
+    transport.close_connections()
+    os.environ.pop("ZO_UNIX_FALLBACK_URL", None)
+
+
+def test_unix_round_trip():
+    assert transport.split_unix_url(f"unix://{SOCKET}") == (SOCKET, "/ingest")
+    assert transport.split_unix_url(f"unix://{SOCKET}/ingest/batch") == (SOCKET, "/ingest/batch")
+    assert batch_endpoint_for(f"unix://{SOCKET}") == f"unix://{SOCKET}/ingest/batch"
+    assert transport.breaker_key(f"unix://{SOCKET}/query") == f"unix://{SOCKET}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        breaker = transport.CircuitBreaker(Path(tmp) / "breaker.json")
+        event = {"event_id": "e1", "run_id": "run-1"}
+        assert transport.send_event(f"unix://{SOCKET}", event, transport.Deadline(2), breaker=breaker)
+    reply = transport.request("GET", f"unix://{SOCKET}/query?run_id=run-1", deadline=transport.Deadline(2))
+    assert json.loads(reply)["target"] == "/query?run_id=run-1", reply
+    method, target, body = received[0]
+    assert (method, target) == ("POST", "/ingest") and json.loads(body)["event_id"] == "e1", received[0]
+    assert received[1][:2] == ("GET", "/query?run_id=run-1")
+    # Both requests went over one kept-alive connection
+    assert [len(conns) for key, conns in transport._pool.items() if key[0] == "unix"] == [1], transport._pool
+
+
+def test_missing_socket_falls_back_to_tcp():
+    stale = os.path.join(TMP, "stale.sock")
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    dead.bind(stale)  # A socket file nothing listens on, as a crashed bridge leaves behind
+    try:
+        for path in (os.path.join(TMP, "missing.sock"), stale):
+            url = f"unix://{path}/ingest"
+            try:
+                transport.request("POST", url, b"{}", deadline=transport.Deadline(1))
+                assert False, f"{path} answered without a fallback"
+            except transport.TransportError:
+                pass
+            assert not received
+
+            os.environ["ZO_UNIX_FALLBACK_URL"] = f"http://127.0.0.1:{PORT}/"
+            reply = transport.request("POST", url + "?wait=1", b'{"event_id": "e2"}', deadline=transport.Deadline(1))
+            assert json.loads(reply)["target"] == "/ingest?wait=1", reply
+            assert received == [("POST", "/ingest?wait=1", b'{"event_id": "e2"}')], received
+            assert ("http", f"127.0.0.1:{PORT}") in transport._pool, "the fallback did not go over TCP"
+            os.environ.pop("ZO_UNIX_FALLBACK_URL")
+            received.clear()
+            transport.close_connections()
+    finally:
+        dead.close()
+
+    # Only a missing listener falls back; a bridge answering on the socket is used
+    os.environ["ZO_UNIX_FALLBACK_URL"] = "http://127.0.0.1:9/"
+    transport.request("POST", f"unix://{SOCKET}", b"{}", deadline=transport.Deadline(1))
+    assert received[0][1] == "/ingest"
+
+
+def main():
+    if not hasattr(socket, "AF_UNIX"):
+        print("[OK] skipped: needs Unix sockets")
+        return
+    tests = [test_unix_round_trip, test_missing_socket_falls_back_to_tcp]
+    failed = 0
+    for test in tests:
+        setup_function(test)
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+        finally:
+            teardown_function(test)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
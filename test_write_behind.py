@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the bridge's write-behind queue (bridge_write_behind.py):
+WAL replay after a restart (including a torn final record), drain on
+close(), retry of a batch while the store is down, and dead-lettering of
+events that keep failing on their own.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bridge_write_behind import WriteBehindQueue  # noqa: E402
+
+
+class Store:
+    """Commit target: records committed event ids, fails on request."""
+
+    def __init__(self, down_calls=0):
+        self.committed = []
+        self.calls = 0
+        self.down_calls = down_calls  # First calls fail whatever the batch holds
+        self.lock = threading.Lock()
+
+    def commit(self, events):
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.down_calls:
+                raise ConnectionError("store unavailable")
+            if any(event.get("poison") for event in events):
+                raise ValueError("rejected by store")
+            self.committed.extend(event["event_id"] for event in events)
+
+
+def events(count, poison=()):
+    return [{"event_id": f"e{i}", **({"poison": True} if i in poison else {})} for i in range(count)]
+
+
+def test_drain_on_close():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Store()
+        queue = WriteBehindQueue(store.commit, os.path.join(tmp, "ingest.wal"), max_batch=4, max_delay_ms=5)
+        queue.start()
+        for event in events(10):
+            queue.submit([event])
+        assert queue.close() == 0
+        assert store.committed == [f"e{i}" for i in range(10)], store.committed
+        assert os.path.getsize(queue.wal_path) == 0, "WAL not truncated after a full drain"
+
+
+def test_replay_after_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        wal = os.path.join(tmp, "ingest.wal")
+        down = Store(down_calls=10 ** 9)
+        first = WriteBehindQueue(down.commit, wal, max_delay_ms=5)
+        first.start()
+        first.submit(events(5))
+        assert first.close(timeout=0.3) == 5
+        with open(wal, "ab") as f:
+            f.write(b'{"event_id": "torn"')  # Crash in the middle of an append
+
+        store = Store()
+        second = WriteBehindQueue(store.commit, wal, max_delay_ms=5)
+        replayed = second.start()
+        assert [event["event_id"] for event in replayed] == [f"e{i}" for i in range(5)]
+        second.submit([{"event_id": "after"}])
+        assert second.close() == 0
+        assert store.committed == [f"e{i}" for i in range(5)] + ["after"], store.committed
+
+
+def test_outage_retries_whole_batch():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Store(down_calls=20)
+        queue = WriteBehindQueue(store.commit, os.path.join(tmp, "ingest.wal"), max_delay_ms=5)
+        queue.start()
+        queue.submit(events(6))
+        assert queue.close() == 0
+        assert sorted(store.committed) == sorted(f"e{i}" for i in range(6)), store.committed
+        assert queue.dead_lettered == 0 and not os.path.exists(queue.dead_letter_path)
+
+
+def test_poison_events_dead_lettered():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Store()
+        queue = WriteBehindQueue(store.commit, os.path.join(tmp, "ingest.wal"), max_batch=16, max_delay_ms=50)
+        queue.start()
+        queue.submit(events(12, poison={3, 8}))
+        queue.submit(events(14)[12:])
+        assert queue.close(timeout=10) == 0, "a poison event stalled the queue"
+        assert sorted(store.committed) == sorted(f"e{i}" for i in range(14) if i not in (3, 8)), store.committed
+        with open(queue.dead_letter_path, "rb") as f:
+            dead = [json.loads(line) for line in f]
+        assert [record["event"]["event_id"] for record in dead] == ["e3", "e8"], dead
+        assert all(record["error"] == "rejected by store" for record in dead)
+        assert queue.dead_lettered == 2
+        assert os.path.getsize(queue.wal_path) == 0, "dead-lettered events were not acknowledged"
+
+
+def main():
+    tests = [test_drain_on_close, test_replay_after_restart, test_outage_retries_whole_batch,
+             test_poison_events_dead_lettered]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the zo-logs CLI (hooks/zo_logs.py) over a few days of
+segments: searches answered by bytes.find over the mmap and by the sidecar
+indexes return what a full scan returns, -i matches case-insensitively
+across chunk boundaries, and segments outside the time range are skipped.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+HOOKS = Path(__file__).resolve().parent / "hooks"
+sys.path.insert(0, str(HOOKS))
+import zo_logs  # noqa: E402
+from event_log import iter_events, list_segments  # noqa: E402
+from log_index import SegmentIndex, index_path  # noqa: E402
+from zo_logs import Query, search, select_segments  # noqa: E402
+
+DAYS = ("2026-10-15", "2026-10-16", "2026-10-17")
+
+
+def event(day, i):
+    return {"event_id": f"{day}-e{i}", "ts": f"{day}T09:{i // 60:02d}:{i % 60:02d}.000Z", "run_id": f"run-{i % 3}",
+            "session_id": f"session-{i % 2}", "event_type": ["tool_invocation", "error"][i % 5 == 0],
+            "level": ["info", "error"][i % 5 == 0], "tool_name": ["Bash", "Read", "Edit", "Write"][i % 4],
+            "indexable_text": f"ran {['PyTest', 'make', 'git status'][i % 3]} step {i}"}
+
+
+def write_logs(root):
+    for day in DAYS:
+        path = root / f"events-{day.replace('-', '')}.jsonl"
+        path.write_text("".join(json.dumps(event(day, i)) + "\n" for i in range(90)))
+
+
+def expected(root, query):
+    """Reference answer: every event, filtered in Python."""
+    return [e["event_id"] for e in iter_events(root, "events") if query.matches(e)]
+
+
+def found(root, query):
+    return [json.loads(line)["event_id"] for line in search(root, query, workers=1)]
+
+
+QUERIES = [dict(run_id="run-1"), dict(tool_name="Bash", event_type="error"), dict(session_id="session-0", level="info"),
+           dict(text="make"), dict(text="pytest", ignore_case=True), dict(text="PYTEST", ignore_case=True, run_id="run-0"),
+           dict(run_id="run-2", since="2026-10-16T09:00:30.000Z", until="2026-10-17T09:00:10.000Z"),
+           dict(run_id="missing")]
+
+
+def check_queries(root):
+    for filters in QUERIES:
+        query = Query(**filters)
+        assert found(root, query) == expected(root, query), filters
+
+
+def test_mmap_needle_search():
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        write_logs(root)
+        scan = zo_logs._scan_buffer
+        scanned = []
+        zo_logs._scan_buffer = lambda query, buf: scanned.append(type(buf).__name__) or scan(query, buf)
+        try:
+            check_queries(root)
+        finally:
+            zo_logs._scan_buffer = scan
+        assert not any(index_path(s).exists() for s in list_segments(root, "events"))
+        assert set(scanned) == {"mmap"}, scanned
+
+
+def test_index_search():
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        write_logs(root)
+        for segment in list_segments(root, "events"):
+            SegmentIndex(segment).refresh()
+        scan = zo_logs._scan_buffer
+
+        def no_scan(query, buf):
+            assert query.text, f"{query.fields} was not answered from the index"
+            return scan(query, buf)
+
+        zo_logs._scan_buffer = no_scan
+        try:
+            check_queries(root)
+        finally:
+            zo_logs._scan_buffer = scan
+
+
+def test_ignore_case_across_chunks():
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        write_logs(root)
+        chunk = zo_logs.FOLD_CHUNK
+        try:
+            for size in (7, 64, 1000):  # Needles straddle chunk boundaries
+                zo_logs.FOLD_CHUNK = size
+                for text in ("pytest", "GIT STATUS", "Step 8"):
+                    query = Query(text=text, ignore_case=True)
+                    assert found(root, query) == expected(root, query) != [], (size, text)
+        finally:
+            zo_logs.FOLD_CHUNK = chunk
+
+        cli = subprocess.run([sys.executable, str(HOOKS / "zo_logs.py"), "--dir", str(root), "--text", "PYTEST", "-i",
+                              "--since", "2026-10-17", "--workers", "2"], capture_output=True, text=True, timeout=60)
+        assert cli.returncode == 0, cli.stderr
+        ids = [json.loads(line)["event_id"] for line in cli.stdout.splitlines()]
+        assert ids == [f"2026-10-17-e{i}" for i in range(0, 90, 3)], ids
+
+
+def test_time_range_prunes_segments():
+    with tempfile.TemporaryDirectory() as root:
+        root = Path(root)
+        write_logs(root)
+        query = Query(since="2026-10-16T00:00:00.000Z", until="2026-10-16T23:00:00.000Z")
+        assert [s.day for s in select_segments(root, "events", query)] == ["20261016"]
+        assert found(root, query) == [f"2026-10-16-e{i}" for i in range(90)]
+
+        # Within a day, the index's ts range rules the segment out unread
+        for segment in list_segments(root, "events"):
+            SegmentIndex(segment).refresh()
+        query = Query(since="2026-10-17T10:00:00.000Z", run_id="run-1")
+        assert [s.day for s in select_segments(root, "events", query)] == ["20261017"]
+        read_lines = SegmentIndex.read_lines
+        SegmentIndex.read_lines = lambda *args: (_ for _ in ()).throw(AssertionError("pruned segment was read"))
+        try:
+            assert found(root, query) == []
+        finally:
+            SegmentIndex.read_lines = read_lines
+
+
+def main():
+    tests = [test_mmap_needle_search, test_index_search, test_ignore_case_across_chunks, test_time_range_prunes_segments]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[ERROR] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()